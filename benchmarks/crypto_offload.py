@@ -0,0 +1,136 @@
+"""Compares the event loop blocking time per poll for the crypto options.
+
+Polls the fake device of the tests and measures the CPU time of the event
+loop thread per callback, i.e. how long a single step of the poll blocked
+other tasks. CPU time instead of wall time keeps the fake device, which runs
+in a process of its own, out of the measurement on machines with few cores.
+
+Run from the repository root:
+
+    python -m benchmarks.crypto_offload --polls 20 --response-size 8192
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from pathlib import Path
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "custom_components"))
+
+from rscp_lib.RscpValue import RscpValue  # noqa: E402
+
+from e3dc_rscp_connect import client as client_module  # noqa: E402
+from e3dc_rscp_connect.client import RscpClient  # noqa: E402
+from tests.fake_rscp_server import FakeRscpServer  # noqa: E402
+
+KEY = "benchmark_key"
+# each answered value is a CString of this length plus 7 bytes value header
+VALUE_SIZE = 200
+
+
+class _CallbackTimer:
+    "Records the thread CPU time of each event loop callback."
+
+    def __init__(self) -> None:
+        self.durations: list[float] = []
+        self.__run = asyncio.Handle._run  # noqa: SLF001
+
+    def __enter__(self) -> "_CallbackTimer":
+        run = self.__run
+        durations = self.durations
+
+        def timed_run(handle):
+            start = time.thread_time()
+            run(handle)
+            durations.append(time.thread_time() - start)
+
+        asyncio.Handle._run = timed_run  # noqa: SLF001
+        return self
+
+    def __exit__(self, *args) -> None:
+        asyncio.Handle._run = self.__run  # noqa: SLF001
+
+
+async def _poll(port: int, requests, polls: int, executor) -> dict:
+    client = RscpClient(
+        "127.0.0.1",
+        port,
+        "user",
+        "password",
+        KEY,
+        max_frame_size=None,
+        crypto_executor=executor,
+    )
+    await client._connect_and_login()  # noqa: SLF001
+
+    blocked = []
+    durations = []
+    for _ in range(polls):
+        start = time.perf_counter()
+        with _CallbackTimer() as timer:
+            # a task of its own, so that all steps of the poll are timed
+            await asyncio.ensure_future(client.send_and_receive(requests))
+        durations.append(time.perf_counter() - start)
+        blocked.append((sum(timer.durations), max(timer.durations, default=0.0)))
+    client.client.disconnect()
+
+    return {
+        "blocked_total_ms": statistics.mean(x[0] for x in blocked) * 1000,
+        "blocked_max_ms": statistics.mean(x[1] for x in blocked) * 1000,
+        "poll_ms": statistics.mean(durations) * 1000,
+    }
+
+
+def _serve(port_queue: multiprocessing.Queue) -> None:
+    async def serve():
+        server = FakeRscpServer(
+            KEY, values={"TAG_INFO_SERIAL_NUMBER": "S" * VALUE_SIZE}
+        )
+        port_queue.put(await server.start())
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def main(polls: int, response_size: int) -> None:
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(port_queue,), daemon=True)
+    server.start()
+    port = port_queue.get()
+    requests = [
+        RscpValue().withTagName("TAG_INFO_REQ_SERIAL_NUMBER", None)
+        for _ in range(max(1, response_size // (VALUE_SIZE + 7)))
+    ]
+
+    try:
+        results = {}
+        # a slice of the socket read size decrypts each chunk in one go
+        for slice_size in (4096, client_module.CRYPTO_SLICE_SIZE, 256):
+            client_module.CRYPTO_SLICE_SIZE = slice_size
+            results[f"loop/{slice_size}"] = await _poll(port, requests, polls, None)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            results["executor"] = await _poll(port, requests, polls, executor)
+    finally:
+        server.terminate()
+
+    print(f"{polls} polls, response of ~{len(requests) * (VALUE_SIZE + 7)} bytes")
+    print(
+        f"{'crypto in':<12}{'blocked/poll':>16}{'longest block':>16}{'poll time':>12}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<12}{result['blocked_total_ms']:>13.2f} ms"
+            f"{result['blocked_max_ms']:>13.2f} ms{result['poll_ms']:>9.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--response-size", type=int, default=8192)
+    args = parser.parse_args()
+    asyncio.run(main(args.polls, args.response_size))
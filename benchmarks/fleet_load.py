@@ -0,0 +1,189 @@
+"""Polls many fake devices at once, with and without the fleet scheduler.
+
+Each device is a fake device of the tests, all of them run in a process of
+their own. Every simulated config entry polls its device in the update
+interval, like the coordinator does. Without the fleet scheduler the polls
+of all entries are due in the same second, each client has a crypto thread
+of its own and all polls run at once. With it the polls are spread over
+the interval, at most DEFAULT_MAX_CONCURRENT_POLLS run at once and the
+clients share the crypto pool.
+
+Reported are the lateness of the polls (the seconds a poll started after it
+was due), the longest poll, the most polls running at once, the crypto
+threads and the longest event loop callback.
+
+Run from the repository root:
+
+    python -m benchmarks.fleet_load --devices 30 --interval 5 --duration 30
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import math
+import multiprocessing
+from pathlib import Path
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "custom_components"))
+
+from benchmarks.crypto_offload import _CallbackTimer  # noqa: E402
+from e3dc_rscp_connect.client import RscpClient  # noqa: E402
+from e3dc_rscp_connect.fleet_scheduler import FleetScheduler  # noqa: E402
+from tests.fake_plant import FakePlant  # noqa: E402
+from tests.fake_rscp_server import FakeRscpServer  # noqa: E402
+
+KEY = "benchmark_key"
+
+
+def _serve(devices: int, latency: float, port_queue: multiprocessing.Queue) -> None:
+    async def serve():
+        servers = [
+            FakeRscpServer(
+                KEY,
+                latency=latency,
+                plant=FakePlant.create(wallboxes=2, inverters=2, batteries=1),
+            )
+            for _ in range(devices)
+        ]
+        port_queue.put([await x.start() for x in servers])
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def _entry(
+    client: RscpClient,
+    scheduler: FleetScheduler,
+    entry_id: str,
+    interval: float,
+    until: float,
+    aligned: bool,
+    results: dict,
+) -> None:
+    "Polls like the coordinator of a config entry until the clock time until."
+    while True:
+        if aligned:
+            # the coordinator of Home Assistant schedules on whole seconds
+            due = math.ceil(time.monotonic() + interval / 2)
+        else:
+            due = scheduler.next_poll(entry_id, interval)
+        if due >= until:
+            return
+        await asyncio.sleep(due - time.monotonic())
+        async with scheduler.poll_slot(due) as lateness:
+            start = time.monotonic()
+            await client.fetch_data()
+            results["lateness"].append(lateness)
+            results["durations"].append(time.monotonic() - start)
+
+
+async def _run(ports: list[int], interval: float, duration: float, fleet: bool):
+    devices = len(ports)
+    if fleet:
+        scheduler = FleetScheduler()
+    else:
+        # only measures, all polls run at once
+        scheduler = FleetScheduler(max_concurrent_polls=devices)
+    executors = []
+    clients = []
+    for index, port in enumerate(ports):
+        scheduler.register(f"entry{index}")
+        if fleet:
+            executor = scheduler.crypto_executor
+        else:
+            executor = ThreadPoolExecutor(max_workers=1)
+            executors.append(executor)
+        clients.append(
+            RscpClient(
+                "127.0.0.1", port, "user", "password", KEY, crypto_executor=executor
+            )
+        )
+    await asyncio.gather(*(x.identify_device() for x in clients))
+    threads = sum(
+        x.name.startswith(("e3dc", "ThreadPool")) for x in threading.enumerate()
+    )
+
+    results = {index: {"lateness": [], "durations": []} for index in range(devices)}
+    until = time.monotonic() + duration
+    with _CallbackTimer() as timer:
+        await asyncio.gather(
+            *(
+                _entry(
+                    client,
+                    scheduler,
+                    f"entry{index}",
+                    interval,
+                    until,
+                    not fleet,
+                    results[index],
+                )
+                for index, client in enumerate(clients)
+            )
+        )
+
+    for index, client in enumerate(clients):
+        client.close()
+        scheduler.unregister(f"entry{index}")
+    for executor in executors:
+        executor.shutdown()
+
+    lateness = sorted(x for result in results.values() for x in result["lateness"])
+    return {
+        "polls": len(lateness),
+        "lateness_p50_ms": statistics.median(lateness) * 1000,
+        "lateness_p95_ms": lateness[math.ceil(0.95 * len(lateness)) - 1] * 1000,
+        # the system which waited longest
+        "lateness_max_ms": lateness[-1] * 1000,
+        "poll_max_ms": max(max(x["durations"]) for x in results.values()) * 1000,
+        "peak_in_flight": scheduler.stats.peak_in_flight,
+        "crypto_threads": threads,
+        "blocked_max_ms": max(timer.durations, default=0.0) * 1000,
+    }
+
+
+async def main(devices: int, interval: float, duration: float, latency: float):
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=_serve, args=(devices, latency, port_queue), daemon=True
+    )
+    server.start()
+    ports = port_queue.get()
+
+    try:
+        results = {
+            "aligned": await _run(ports, interval, duration, fleet=False),
+            "fleet": await _run(ports, interval, duration, fleet=True),
+        }
+    finally:
+        server.terminate()
+
+    print(
+        f"{devices} devices, update interval {interval:g} s, {duration:g} s, "
+        f"device latency {latency * 1000:g} ms"
+    )
+    names = list(results["fleet"])
+    print(f"{'':<18}" + "".join(f"{x:>12}" for x in results))
+    for name in names:
+        print(
+            f"{name:<18}"
+            + "".join(
+                f"{result[name]:>12.1f}"
+                if isinstance(result[name], float)
+                else f"{result[name]:>12}"
+                for result in results.values()
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=30)
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+    asyncio.run(main(args.devices, args.interval, args.duration, args.latency))
@@ -0,0 +1,290 @@
+"""Measures the CPU time and memory of each stage of a poll.
+
+The stages are the work done on every update interval, from collecting the
+request tags to writing the entity states. Payloads are synthetic answers of
+the simulated plant of the tests, for plants with 1 to 7 wallboxes and
+inverters and 2 batteries. No device or network is involved.
+
+Run from the repository root, or as a script from anywhere:
+
+    python -m benchmarks.poll_hot_path --sizes 1x1,7x7 --iterations 200
+    python benchmarks/poll_hot_path.py --sizes 1x1,7x7 --iterations 200
+
+Save the results with --save and compare a later run against them with
+--compare, the run fails if a stage got slower than the tolerance.
+"""
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+# the repository root for the fake plant of the tests, also when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "custom_components"))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from rscp_lib.RscpFrame import RscpFrame  # noqa: E402
+
+from e3dc_rscp_connect import sensor  # noqa: E402
+from e3dc_rscp_connect.const import DOMAIN, POLL_GROUPS  # noqa: E402
+from e3dc_rscp_connect.framing import DEFAULT_MAX_FRAME_SIZE, RscpRequest  # noqa: E402
+from e3dc_rscp_connect.model.EnergyAccumulator import EnergyAccumulator  # noqa: E402
+from e3dc_rscp_connect.model.RscpHandlerPipeline import (  # noqa: E402
+    RscpHandlerPipeline,
+)
+from e3dc_rscp_connect.model.SgReadyRscpModel import SgReadyRscpModel  # noqa: E402
+from e3dc_rscp_connect.model.StorageRscpModel import StorageRscpModel  # noqa: E402
+from e3dc_rscp_connect.model.WallboxRscpModel import WallboxRscpModel  # noqa: E402
+from e3dc_rscp_connect.poll_metrics import PollMetrics  # noqa: E402
+from tests.fake_plant import FakePlant  # noqa: E402
+
+BATTERIES = 2
+DEFAULT_SIZES = "1x1,3x3,7x7"
+DEFAULT_TOLERANCE = 0.25
+
+
+@dataclass
+class StageResult:
+    "Timing and memory of one stage, times in microseconds per poll."
+
+    mean_us: float
+    median_us: float
+    # highest memory use above the start of the stage, and memory still in use
+    # after the stage
+    peak_kib: float
+    retained_kib: float
+
+
+class PollBenchmark:
+    """One plant with its models, handler pipeline and entities.
+
+    Each stage works on the output of the previous one, like a poll does.
+    """
+
+    def __init__(self, hass: HomeAssistant, wallboxes: int, inverters: int) -> None:
+        self.plant = FakePlant.create(wallboxes, inverters, BATTERIES)
+        self.storage = StorageRscpModel(
+            self.plant.serial,
+            self.plant.assembly_serial,
+            self.plant.mac_address,
+            self.plant.sw_release,
+        )
+        self.wallboxes = [
+            WallboxRscpModel(index, x.serial, x.device_name, x.firmware_version)
+            for index, x in enumerate(self.plant.wallboxes)
+        ]
+        self.sg_ready = SgReadyRscpModel()
+        self.energy = EnergyAccumulator()
+        self.pipeline = RscpHandlerPipeline()
+        for handler in (self.storage, *self.wallboxes, self.sg_ready):
+            self.pipeline.add_handler(handler)
+        self.hass = hass
+        self.entities = []
+        self.tags = []
+        self.request_frames = []
+        self.response_frames = []
+        self.values = []
+
+    async def setup(self) -> None:
+        "Identifies the inverters and creates the entities, like the first poll."
+        await self.pipeline.process(self.__answer(await self.pipeline.collect_tags()))
+        await self.collect_tags()
+        self.pack_request()
+        self.response_frames = [
+            RscpFrame().packFrame(self.__answer(frame.values))
+            for frame in RscpRequest(
+                self.tags, POLL_GROUPS, DEFAULT_MAX_FRAME_SIZE
+            ).frames
+        ]
+        self.unpack_response()
+
+        coordinator = SimpleNamespace(
+            storage=self.storage.get_model(),
+            sg_ready=self.sg_ready.get_model(),
+            wallboxes=[x.get_model() for x in self.wallboxes],
+            data={},
+            last_update_success=True,
+            poll_metrics=PollMetrics(),
+            energy=self.energy.get_model(),
+            unique_id_suffix="",
+        )
+        # write every state, like the default options
+        coordinator.create_power_write_filter = lambda name: None
+        coordinator.get_wallbox = lambda index: next(
+            (x for x in coordinator.wallboxes if x.index == index), None
+        )
+        entry = SimpleNamespace(entry_id="benchmark")
+        self.hass.data[DOMAIN] = {entry.entry_id: {"coordinator": coordinator}}
+        await sensor.async_setup_entry(self.hass, entry, self.entities.extend)
+        for number, entity in enumerate(self.entities):
+            entity.hass = self.hass
+            entity.entity_id = f"sensor.benchmark_{number}"
+
+    def __answer(self, requests) -> list:
+        return [self.plant.answer(x) for x in requests]
+
+    async def collect_tags(self) -> None:
+        self.tags = await self.pipeline.collect_tags()
+
+    def pack_request(self) -> None:
+        # build the frames like an uncached collect_request() does
+        self.request_frames = RscpRequest(
+            self.tags, POLL_GROUPS, DEFAULT_MAX_FRAME_SIZE
+        ).pack()
+
+    def unpack_response(self) -> None:
+        values = []
+        for buffer in self.response_frames:
+            frame = RscpFrame()
+            frame.unpack(buffer)
+            values.extend(frame.getRscpValues())
+        self.values = values
+
+    async def process(self) -> None:
+        await self.pipeline.process(self.values)
+        self.energy.integrate(self.storage.get_model().powers, time.monotonic())
+
+    def handle_wallbox_data(self) -> None:
+        for value in self.values:
+            if value.getTagName() == "TAG_WB_DATA":
+                for wallbox in self.wallboxes:
+                    if wallbox.handle_rscp_data(value):
+                        break
+
+    def write_entities(self) -> None:
+        # what the coordinator triggers for each entity after an update
+        for entity in self.entities:
+            entity._handle_coordinator_update()  # noqa: SLF001
+
+    def stages(self) -> dict[str, Callable[[], Awaitable[None] | None]]:
+        "Returns the stages in the order of a poll."
+        return {
+            "collect_tags": self.collect_tags,
+            "pack_request": self.pack_request,
+            "unpack_response": self.unpack_response,
+            "process": self.process,
+            "wallbox_handle_rscp_data": self.handle_wallbox_data,
+            "entity_writes": self.write_entities,
+        }
+
+
+async def _run_stage(stage, iterations: int) -> StageResult:
+    async def call():
+        result = stage()
+        if result is not None:
+            await result
+
+    await call()
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await call()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return StageResult(
+        mean_us=statistics.mean(durations) * 1e6,
+        median_us=statistics.median(durations) * 1e6,
+        peak_kib=(peak - before) / 1024,
+        retained_kib=(current - before) / 1024,
+    )
+
+
+async def run(sizes: list[tuple[int, int]], iterations: int) -> dict:
+    "Returns the results per plant size and stage."
+    hass = HomeAssistant(str(Path(__file__).parent))
+    results = {}
+    for wallboxes, inverters in sizes:
+        benchmark = PollBenchmark(hass, wallboxes, inverters)
+        await benchmark.setup()
+        results[f"{wallboxes}x{inverters}"] = {
+            name: asdict(await _run_stage(stage, iterations))
+            for name, stage in benchmark.stages().items()
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    "Returns the stages whose median time grew by more than tolerance."
+    regressions = []
+    for size, stages in results.items():
+        for name, result in stages.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            if result["median_us"] > reference["median_us"] * (1 + tolerance):
+                regressions.append(
+                    f"{size} {name}: {result['median_us']:.1f} us, "
+                    f"baseline {reference['median_us']:.1f} us"
+                )
+    return regressions
+
+
+def _print(results: dict) -> None:
+    print(
+        f"{'plant':<6}{'stage':<26}{'mean':>11}{'median':>11}"
+        f"{'peak mem':>13}{'retained':>13}"
+    )
+    for size, stages in results.items():
+        total = 0.0
+        for name, result in stages.items():
+            total += result["median_us"]
+            print(
+                f"{size:<6}{name:<26}{result['mean_us']:>8.1f} us"
+                f"{result['median_us']:>8.1f} us{result['peak_kib']:>9.1f} KiB"
+                f"{result['retained_kib']:>9.1f} KiB"
+            )
+        print(f"{size:<6}{'poll total':<26}{'':>11}{total:>8.1f} us")
+
+
+def _parse_sizes(sizes: str) -> list[tuple[int, int]]:
+    "Parses WALLBOXESxINVERTERS,..."
+    return [tuple(int(x) for x in size.split("x")) for size in sizes.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help="plants as WALLBOXESxINVERTERS, separated by commas (1-7 each)",
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--save", type=Path, help="write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON results of a baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    # warnings of the models and entities without platform are expected here
+    logging.basicConfig(level=logging.ERROR)
+    results = asyncio.run(run(_parse_sizes(args.sizes), args.iterations))
+    _print(results)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if args.compare:
+        regressions = compare(
+            results, json.loads(args.compare.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,44 @@
 """e3dc_rscp_connect is a home assistant integration to provide data connector to E3DC storage systems."""
 
-import logging
-
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 
 from . import const
 from .coordinator import E3dcRscpCoordinator
+from .identification_cache import IdentificationCache
+from .log import get_logger
 from rscp_lib.RscpConnection import RscpConnectionException
 
 DOMAIN = const.DOMAIN
 
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Sets up the integration from config entry."""
-    try:
-        coordinator = E3dcRscpCoordinator(hass, entry)
-        await coordinator.client.client.connect()
-
-        await coordinator.async_config_entry_first_refresh()
-    except RscpConnectionException as err:
-        raise ConfigEntryNotReady(f"Error establishing the connection {err}") from err
+    coordinator = E3dcRscpCoordinator(hass, entry)
+    if await coordinator.async_restore_identification():
+        # the entities are set up from the cache, the device is identified
+        # again with the first update
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), "e3dc_rscp_connect first refresh"
+        )
+    else:
+        try:
+            # a client shared with another entry may be connected already
+            await coordinator.client.connect()
+
+            await coordinator.async_config_entry_first_refresh()
+        except Exception as err:
+            # releases the shared client and the poll slot of the entry
+            await coordinator.async_shutdown()
+            if isinstance(err, RscpConnectionException):
+                raise ConfigEntryNotReady(
+                    f"Error establishing the connection {err}"
+                ) from err
+            raise
 
     # Speichere den Koordinator zentral
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
@@ -48,7 +62,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     data = hass.data[DOMAIN][entry.entry_id]
     coordinator = data["coordinator"]
     await coordinator.stop_remote_control()
-    coordinator.client.client.disconnect()
+    # disconnects the device, unless another entry of the device still uses it
+    await coordinator.async_shutdown()
 
     unload_ok = await hass.config_entries.async_unload_platforms(
         entry, ["sensor", "select", "number", "switch"]
@@ -56,3 +71,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    "Removes the cached identification of a removed entry."
+    await IdentificationCache(hass, entry.entry_id).async_remove()
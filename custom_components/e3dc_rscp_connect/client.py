@@ -1,36 +1,159 @@
 "Client which uses RscpConnections to E3DC storage devices."
 
 import asyncio
-import logging
+from collections import deque
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import functools
+import time
 
-from rscp_lib.RscpConnection import RscpConnection
+from rscp_lib.RscpConnection import RscpConnection, RscpConnectionException
 from rscp_lib.RscpEncryption import RscpEncryption
 from rscp_lib.RscpFrame import RscpFrame
 from rscp_lib.RscpValue import RscpValue
+from .connection_supervisor import (
+    ConnectionSupervisor,
+    RscpAuthorizationException,
+    RscpCircuitOpenException,
+    RscpClientException,
+    RscpCommunicationException,
+    RscpConnectFailedException,
+    RscpRequestTimeoutException,
+)
+from .const import DEFAULT_READ_TIMEOUT, POLL_GROUP_STATE, REMOTE_CONTROL_PERIOD
+from .framing import (
+    DEFAULT_MAX_FRAME_SIZE,
+    RscpFrameDecoder,
+    is_response_to,
+    split_values,
+)
+from .log import LazyRscpValue, get_logger
+from .model.EnergyAccumulator import EnergyAccumulator
+from .model.EnergyDataModel import EnergyDataModel
 from .model.RscpHandlerPipeline import RscpHandlerPipeline
 from .model.SgReadyRscpModel import SgReadyRscpModel
 from .model.StorageRscpModel import StorageRscpModel
 from .model.WallboxDataModel import WallboxDataModel
-from .model.WallboxRscpModel import WallboxRscpModel
+from .model.WallboxRscpModel import WALLBOX_INDEXES, WallboxRscpModel
+from .poll_metrics import PollMetrics, PollSample
+from .request_queue import (
+    QueueDelayStats,
+    RequestPriority,
+    RscpRequestExpiredException,
+    RscpRequestQueue,
+    RscpRequestSupersededException,
+)
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__)
+
+# received data is decrypted in slices of this size, the event loop may run
+# other tasks between two slices (multiple of the cipher block size)
+CRYPTO_SLICE_SIZE = 1024
+
+# the device answers it with the user level, it is the smallest request of a session
+KEEP_ALIVE_TAG = "TAG_RSCP_REQ_USER_LEVEL"
+
+# seconds from queueing a request until its response is complete. Control
+# commands are small and wait for user interaction, polls and identification
+# may be large and wait behind other requests.
+REQUEST_TIMEOUTS = {
+    RequestPriority.CONTROL: 5.0,
+    RequestPriority.POLL: 30.0,
+    RequestPriority.IDENTIFICATION: 60.0,
+}
+
+
+@dataclass
+class _PendingRequest:
+    "Request which has been written in pipelined mode and waits for its responses."
+
+    frames: list[bytes]
+    future: asyncio.Future
+    responses: list[bytes] = field(default_factory=list)
+    sample: PollSample | None = None
+
+
+@dataclass
+class RequestTimeoutStats:
+    "Requests which weren't answered in time and responses which arrived too late."
+
+    # timed out requests per priority class
+    timeouts: dict[str, int] = field(
+        default_factory=lambda: {x.name.lower(): 0 for x in RequestPriority}
+    )
+    # response frames of timed out or cancelled requests which were dropped
+    late_frames: int = 0
 
 
 class RscpClient:
     "Class which holds an RscpConnection to communicate with an E3DC storage device."
 
     def __init__(
-        self, host: str, port: int, username: str, password: str, rscp_key: str
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        rscp_key: str,
+        poll_intervals: dict[str, float] | None = None,
+        max_frame_size: int | None = DEFAULT_MAX_FRAME_SIZE,
+        pipelined: bool = False,
+        crypto_executor: Executor | None = None,
+        supervisor: ConnectionSupervisor | None = None,
+        read_timeout: float | None = DEFAULT_READ_TIMEOUT,
     ) -> None:
-        "Initializes the client connection."
-        self.client = RscpConnection(
-            host, port, RscpEncryption(rscp_key), username, password
-        )
+        """Initializes the client connection.
+
+        poll_intervals holds the interval in seconds per poll group, groups
+        without interval are polled on every update. Requests are split into
+        frames of at most max_frame_size bytes. In pipelined mode requests are
+        written without waiting for the responses of earlier requests. With a
+        crypto_executor frames are encrypted and decrypted in the executor
+        instead of the event loop. The supervisor decides when a lost
+        connection is established again. A connection which doesn't deliver
+        data of an awaited response for read_timeout seconds is half open, it
+        is closed.
+        """
+        self.__encryption = RscpEncryption(rscp_key)
+        self.client = RscpConnection(host, port, self.__encryption, username, password)
+        self.__decoder = RscpFrameDecoder(self.__encryption)
+        self.__crypto_executor = crypto_executor
         self.__storage: StorageRscpModel | None = None
         self.__sg_ready = None
         self.__wallboxes = []
-        self.__handlerPipeline = RscpHandlerPipeline()
-        self.__lock = asyncio.Lock()
+        self.__max_frame_size = max_frame_size
+        # changes when a device is identified, see identification_revision
+        self.__identification_revision = 0
+        self.__handlerPipeline = RscpHandlerPipeline(poll_intervals, max_frame_size)
+        self.__poll_intervals = dict(poll_intervals or {})
+        # the running poll, which other callers join instead of polling again
+        self.__running_poll: asyncio.Future | None = None
+        self.__merged_polls = 0
+        # per subscriber the changed fields it didn't pop yet, see pop_changed_fields
+        self.__change_subscribers: dict[object, set[str]] = {}
+        self.__last_poll_frame_count = 0
+        # serializes writes by priority, in lock-step mode a request holds its
+        # slot until the response is read
+        self.__queue = RscpRequestQueue()
+        self.__pipelined = pipelined
+        self.__read_lock = asyncio.Lock()
+        self.__pending: deque[_PendingRequest] = deque()
+        # remote control setpoint which is sent along with the next poll
+        self.__piggyback_setpoint: RscpValue | None = None
+        self.__piggybacked_setpoints = 0
+        self.__standalone_setpoints = 0
+        self.__poll_metrics = PollMetrics()
+        self.__energy = EnergyAccumulator()
+        self.__supervisor = supervisor or ConnectionSupervisor()
+        self.__read_timeout = read_timeout
+        # time.monotonic() when the device last sent data
+        self.__last_activity = 0.0
+        self.__keep_alives = 0
+        self.__connect_lock = asyncio.Lock()
+        # lock-step request frames whose responses are dropped when they arrive
+        self.__late_frames: deque[bytes] = deque()
+        self.__timeout_stats = RequestTimeoutStats()
 
     @property
     def wallboxes(self):
@@ -51,6 +174,61 @@ class RscpClient:
                 return wallbox
         return None
 
+    @property
+    def pipelined(self) -> bool:
+        "Returns True if requests are pipelined, False if lock-step is used."
+        return self.__pipelined
+
+    @property
+    def queue_stats(self) -> dict[RequestPriority, QueueDelayStats]:
+        "Returns the queueing delay statistics per priority class."
+        return self.__queue.stats
+
+    @property
+    def piggybacked_setpoints(self) -> int:
+        "Returns the number of remote control setpoints sent along with a poll."
+        return self.__piggybacked_setpoints
+
+    @property
+    def standalone_setpoints(self) -> int:
+        "Returns the number of remote control setpoints sent in a frame of their own."
+        return self.__standalone_setpoints
+
+    @property
+    def poll_metrics(self) -> PollMetrics:
+        "Returns the timing and size metrics of the polls."
+        return self.__poll_metrics
+
+    @property
+    def max_frame_size(self) -> int | None:
+        "Returns the byte budget of a request frame, None if requests aren't split."
+        return self.__max_frame_size
+
+    @property
+    def last_poll_frame_count(self) -> int:
+        "Returns the number of frames the last poll was split into."
+        return self.__last_poll_frame_count
+
+    @property
+    def supervisor(self) -> ConnectionSupervisor:
+        "Returns the supervisor of the connection."
+        return self.__supervisor
+
+    @property
+    def timeout_stats(self) -> RequestTimeoutStats:
+        "Returns the counters of timed out requests and late responses."
+        return self.__timeout_stats
+
+    @property
+    def idle_time(self) -> float:
+        "Returns the seconds since the device last sent data."
+        return time.monotonic() - self.__last_activity
+
+    @property
+    def keep_alives(self) -> int:
+        "Returns the number of keep-alive requests sent."
+        return self.__keep_alives
+
     @property
     def storage(self):
         "Get access to storage data."
@@ -65,19 +243,175 @@ class RscpClient:
             return None
         return self.__sg_ready.get_model()
 
+    @property
+    def energy(self) -> EnergyDataModel:
+        "Get access to the energy counters integrated from the power values."
+        return self.__energy.get_model()
+
+    @property
+    def energy_accumulator(self) -> EnergyAccumulator:
+        "Returns the accumulator of the energy counters."
+        return self.__energy
+
+    def pop_changed_fields(self, subscriber: object = None) -> set[str]:
+        """Returns the data model fields changed since the last call and resets them.
+
+        The paths start with "storage.", "sg_ready.", "energy." or
+        "wallboxes.<index>.". A subscriber, see subscribe_changes, gets the
+        fields changed since its own last call.
+        """
+        changed = self.__energy.get_model().pop_changed_fields("energy.")
+        if self.__storage is not None:
+            changed |= self.__storage.get_model().pop_changed_fields("storage.")
+        if self.__sg_ready is not None:
+            changed |= self.__sg_ready.get_model().pop_changed_fields("sg_ready.")
+        for wallbox in self.wallboxes:
+            changed |= wallbox.pop_changed_fields(f"wallboxes.{wallbox.index}.")
+        for other, pending in self.__change_subscribers.items():
+            if other is not subscriber:
+                pending |= changed
+        if subscriber in self.__change_subscribers:
+            changed |= self.__change_subscribers[subscriber]
+            self.__change_subscribers[subscriber] = set()
+        return changed
+
+    def subscribe_changes(self, subscriber: object) -> None:
+        "Tracks the changed fields for subscriber, e.g. a coordinator which shares the client."
+        self.__change_subscribers.setdefault(subscriber, set())
+
+    def unsubscribe_changes(self, subscriber: object) -> None:
+        "Stops tracking the changed fields for subscriber."
+        self.__change_subscribers.pop(subscriber, None)
+
+    @property
+    def poll_intervals(self) -> dict[str, float]:
+        "Returns the poll interval in seconds per poll group."
+        return dict(self.__poll_intervals)
+
+    def set_poll_intervals(self, poll_intervals: dict[str, float]) -> None:
+        "Sets the poll interval in seconds per poll group, groups without are polled always."
+        self.__poll_intervals = dict(poll_intervals)
+        self.__handlerPipeline.set_group_intervals(poll_intervals)
+
+    def set_update_interval(self, update_interval: float) -> None:
+        "Sets the update interval in seconds the polls are expected in."
+        self.__energy.set_update_interval(update_interval)
+
+    @property
+    def merged_polls(self) -> int:
+        "Returns the number of polls which joined a running poll."
+        return self.__merged_polls
+
     async def _connect_and_login(self) -> None:
+        # a keep-alive may connect in the background while a request arrives
+        async with self.__connect_lock:
+            await self.__connect_and_login()
+
+    async def __connect_and_login(self) -> None:
         if not self.client.is_connected():
-            await self.client.connect()
+            try:
+                await self.client.connect()
+            except RscpConnectionException as err:
+                raise RscpConnectFailedException(f"Couldn't connect: {err}") from err
+            self.__supervisor.record_connect()
+            # a new connection starts a new stream, drop data of the old one
+            self.__decoder.reset()
+            self.__late_frames.clear()
+            self.__fail_pending(RscpConnectionException("Connection reestablished!"))
         if self.client.is_connected() and not self.client.is_authorized():
-            if not await self.client.authorize():
-                raise ConnectionError(
+            try:
+                authorized = await self.client.authorize()
+            except RscpConnectionException as err:
+                raise RscpCommunicationException(
+                    f"Connection lost during authorization: {err}"
+                ) from err
+            except Exception as err:
+                # the response can't be decrypted with a wrong RSCP key
+                self.client.disconnect()
+                raise RscpAuthorizationException(
+                    "Couldn't authorize! Rscp Key correct?"
+                ) from err
+            if not authorized:
+                self.client.disconnect()
+                raise RscpAuthorizationException(
                     "Couldn't authorize! Check username and password!"
                 )
+            self.__last_activity = time.monotonic()
+
+    def close(self) -> None:
+        """Disconnects, the client isn't used afterwards.
+
+        The crypto executor belongs to the caller, it may be shared with other
+        clients.
+        """
+        self.client.disconnect()
+
+    def __is_ready(self) -> bool:
+        return self.client.is_connected() and self.client.is_authorized()
+
+    async def connect(self) -> None:
+        "Establishes and authorizes the connection, unless it is ready."
+        async with self.__supervised():
+            pass
+
+    async def keep_alive(self, max_idle: float = 0.0) -> None:
+        """Prepares the session for the next request.
+
+        A lost connection is established and authorized again. A connection
+        which has been idle for more than max_idle seconds gets a keep-alive
+        request, if it fails the connection is established again right away.
+        """
+        if self.__is_ready() and self.idle_time > max_idle:
+            try:
+                async with self.__supervised():
+                    await self.send_and_receive(
+                        [RscpValue().withTagName(KEEP_ALIVE_TAG, None)],
+                        priority=RequestPriority.IDENTIFICATION,
+                    )
+                self.__keep_alives += 1
+                return
+            except RscpCircuitOpenException:
+                raise
+            except Exception as err:
+                _LOGGER.debug("Keep-alive failed, reconnecting: %s", err)
+                self.client.disconnect()
+        if not self.__is_ready():
+            await self.connect()
+
+    @asynccontextmanager
+    async def __supervised(self):
+        """Connects if needed and reports the result of the enclosed requests to the supervisor.
+
+        Raises RscpCircuitOpenException without connecting while the
+        supervisor pauses the connection. A request which timed out or
+        expired in the queue doesn't count as failure, the connection stays
+        usable and a broken one is closed by the read timeout.
+        """
+        self.__supervisor.before_request()
+        try:
+            if not self.__is_ready():
+                _LOGGER.debug("Not connected, try to reconnect!")
+                await self._connect_and_login()
+            yield
+        except (
+            RscpRequestSupersededException,
+            RscpRequestExpiredException,
+            RscpRequestTimeoutException,
+            asyncio.CancelledError,
+        ):
+            self.__supervisor.record_cancelled()
+            raise
+        except Exception as err:
+            self.__supervisor.record_failure(err)
+            raise
+        else:
+            self.__supervisor.record_success()
 
     def __add_identified_storage(self, storage):
         def set_storage(self, storage):
             _LOGGER.info("Set identified storage: %s!", storage.ident_serial)
             self.__storage = storage
+            self.__identification_revision += 1
             self.__handlerPipeline.add_handler(storage)
 
         if storage is None:
@@ -89,7 +423,8 @@ class RscpClient:
             return
 
         if storage == self.__storage:
-            _LOGGER.info("Re-Identified storage: %s!", storage.ident_serial)
+            _LOGGER.debug("Re-Identified storage: %s!", storage.ident_serial)
+            self.__storage.update_identification(storage)
         else:
             set_storage(self, storage)
 
@@ -97,6 +432,7 @@ class RscpClient:
         def set_sg_ready(self, sg_ready):
             _LOGGER.info("Set identified sg ready!")
             self.__sg_ready = sg_ready
+            self.__identification_revision += 1
             self.__handlerPipeline.add_handler(sg_ready)
 
         if sg_ready is None:
@@ -108,7 +444,7 @@ class RscpClient:
             return
 
         if sg_ready == self.__sg_ready:
-            _LOGGER.info("Re-Identified sg_ready!")
+            _LOGGER.debug("Re-Identified sg_ready!")
         else:
             set_sg_ready(self, sg_ready)
 
@@ -118,112 +454,547 @@ class RscpClient:
             return
 
         if wallbox in self.__wallboxes:
-            _LOGGER.info("Re-Identified wallbox: %s", wallbox.serial)
+            _LOGGER.debug("Re-Identified wallbox: %s", wallbox.serial)
+            known = self.__wallboxes[self.__wallboxes.index(wallbox)]
+            known.update_identification(wallbox)
             return
 
         _LOGGER.info("Identified wallbox: %s", wallbox.serial)
         self.__wallboxes.append(wallbox)
+        self.__identification_revision += 1
         self.__handlerPipeline.add_handler(wallbox)
 
+    @property
+    def identification(self) -> dict:
+        """Returns the identified devices as JSON serializable dict.
+
+        Besides the identification data of the storage, the wallboxes and
+        SG Ready it holds the inverter and battery indexes found by the polls.
+        restore_identification takes it to restore the devices.
+        """
+        return self.__identification_of(self.wallboxes)
+
+    def __identification_of(self, wallboxes: list) -> dict:
+        storage = self.storage
+        return {
+            "storage": None
+            if storage is None
+            else {
+                "serial": storage.serial,
+                "assembly_serial": storage.assembly_serial,
+                "mac_addr": storage.mac_addr,
+                "sw_version": storage.sw_version,
+                "inverters": sorted(storage.inverters),
+                "batteries": sorted(storage.device_states.battery),
+            },
+            "sg_ready": self.__sg_ready is not None,
+            "wallboxes": [
+                {
+                    "index": wallbox.index,
+                    "serial": wallbox.serial,
+                    "device_name": wallbox.device_name,
+                    "firmware_version": wallbox.firmware_version,
+                }
+                for wallbox in sorted(wallboxes, key=lambda x: x.index)
+            ],
+        }
+
+    @property
+    def identification_revision(self) -> int:
+        "Returns a number which changes whenever devices are identified or found by a poll."
+        if self.__storage is None:
+            return self.__identification_revision
+        return self.__identification_revision + self.__storage.get_rscp_tags_revision()
+
+    def restore_identification(self, identification: dict) -> None:
+        """Restores the devices of an earlier identification.
+
+        The restored devices are polled right away, identify_device applies
+        the differences to the devices found by the device.
+        """
+        storage = identification.get("storage")
+        if storage is not None:
+            model = StorageRscpModel(
+                storage["serial"],
+                storage["assembly_serial"],
+                storage["mac_addr"],
+                storage["sw_version"],
+            )
+            model.restore_devices(storage["inverters"], storage["batteries"])
+            self.__add_identified_storage(model)
+        if identification.get("sg_ready"):
+            self.__add_identified_sg_ready(SgReadyRscpModel())
+        for wallbox in identification.get("wallboxes", ()):
+            self.__add_indentified_wallbox(
+                WallboxRscpModel(
+                    wallbox["index"],
+                    wallbox["serial"],
+                    wallbox["device_name"],
+                    wallbox["firmware_version"],
+                )
+            )
+
     async def identify_device(self) -> dict:
-        "Reads serial number and firmware version from device."
-        try:
-            if not self.client.is_connected() or not self.client.is_authorized():
-                _LOGGER.info("Not connected, try to reconnect!")
-                await self._connect_and_login()
+        """Reads serial number and firmware version from device.
 
-            # self.__wallboxes.clear()
+        Returns the identification of the devices which answered, like
+        identification. Restored wallboxes which didn't answer are missing.
+        """
+        try:
+            async with self.__supervised():
+                # self.__wallboxes.clear()
 
-            requests = []
-            requests.extend(StorageRscpModel.get_identification_tags())
-            requests.extend(WallboxRscpModel.get_identification_tags())
-            requests.extend(SgReadyRscpModel.get_identification_tags())
+                requests = []
+                requests.extend(StorageRscpModel.get_identification_tags())
+                requests.extend(WallboxRscpModel.get_identification_tags())
+                requests.extend(SgReadyRscpModel.get_identification_tags())
 
-            received_values = await self.send_and_receive(requests)
-            for x in received_values:
-                _LOGGER.info("Received identification: %s", x.toString())
+                received_values = await self.send_and_receive(
+                    requests, priority=RequestPriority.IDENTIFICATION
+                )
             # TODO read serial number and firmware from wallbox and add data to coordinator *and* to device_info
             #
-            for value in received_values:
-                storage = StorageRscpModel.identify(value)
+            answered = self.__add_identified_devices(received_values)
 
-                if storage is not None:
-                    self.__add_identified_storage(storage)
-                    continue
+        except RscpClientException:
+            raise
+        except Exception as err:
+            raise RscpCommunicationException(
+                f"Identification failed! Rscp Key correct? {err}"
+            ) from err
 
-                wallbox = WallboxRscpModel.identify(value)
-                if wallbox is not None:
-                    self.__add_indentified_wallbox(wallbox)
-                    continue
+        return self.__identification_of(
+            [x.get_model() for x in self.__wallboxes if x in answered]
+        )
 
-                sg_ready = SgReadyRscpModel.identify(value)
-                if sg_ready is not None:
-                    self.__add_identified_sg_ready(sg_ready)
-                    continue
+    async def reidentify_device(self) -> None:
+        """Looks for devices added since the last identification and for firmware updates.
 
-        except ConnectionError as err:
-            raise Exception(f"Error: {err}") from err
+        Only the wallbox indexes without wallbox and SG Ready, if it wasn't
+        found, are probed. The identification data of the storage and the
+        wallboxes is only read again if the software release of the storage
+        changed. Without identified storage the device is fully identified.
+        """
+        if self.__storage is None:
+            await self.identify_device()
+            return
+
+        known_indexes = {x.index for x in self.__wallboxes}
+        requests = [
+            RscpValue().withTagName("TAG_INFO_REQ_SW_RELEASE", None),
+            *WallboxRscpModel.get_identification_tags(
+                x for x in WALLBOX_INDEXES if x not in known_indexes
+            ),
+        ]
+        if self.__sg_ready is None:
+            requests.extend(SgReadyRscpModel.get_identification_tags())
+
+        try:
+            async with self.__supervised():
+                received_values = await self.send_and_receive(
+                    requests, priority=RequestPriority.IDENTIFICATION
+                )
+        except RscpClientException:
+            raise
         except Exception as err:
-            # TODO make Exception more specific
-            raise Exception(f"Identification failed! Rscp Key correct?") from err
+            raise RscpCommunicationException(
+                f"Re-identification failed: {err}"
+            ) from err
+
+        sw_release = next(
+            (
+                x.getValue()
+                for x in received_values
+                if x.getTagName() == "TAG_INFO_SW_RELEASE"
+            ),
+            None,
+        )
+        if sw_release is not None and sw_release != self.storage.sw_version:
+            _LOGGER.info("Software release changed to %s, identify again", sw_release)
+            await self.identify_device()
+            return
+        # the storage identification needs all of its tags
+        self.__add_identified_devices(
+            [x for x in received_values if x.getTagName() != "TAG_INFO_SW_RELEASE"]
+        )
+
+    def __add_identified_devices(
+        self, received_values: list[RscpValue]
+    ) -> list[WallboxRscpModel]:
+        "Adds the identified devices, returns the wallboxes which answered."
+        wallboxes = []
+        for x in received_values:
+            _LOGGER.debug("Received identification: %s", LazyRscpValue(x))
+
+        for value in received_values:
+            storage = StorageRscpModel.identify(value)
 
-        return
+            if storage is not None:
+                self.__add_identified_storage(storage)
+                continue
 
-    async def send_and_receive(self, rscpValuesToSend: list) -> list:
+            wallbox = WallboxRscpModel.identify(value)
+            if wallbox is not None:
+                self.__add_indentified_wallbox(wallbox)
+                wallboxes.append(wallbox)
+                continue
+
+            sg_ready = SgReadyRscpModel.identify(value)
+            if sg_ready is not None:
+                self.__add_identified_sg_ready(sg_ready)
+                continue
+        return wallboxes
+
+    async def send_and_receive(
+        self,
+        rscpValuesToSend: list,
+        priority: RequestPriority = RequestPriority.CONTROL,
+        deadline: float | None = None,
+    ) -> list:
         """Sends and receives data to the device.
 
-        Packs a list of RscpValues into a frame and send it to the device.
+        Packs a list of RscpValues into frames and send them to the device.
         The answer of the device is returned as list of RscpValues.
-        Serialized via a lock because the protocol is strictly request/response.
+        Requests are queued by priority, see send_and_receive_frames().
         """
-        async with self.__lock:
-            await self.client.send(RscpFrame().packFrame(rscpValuesToSend))
-            recv_buffer = await self.client.receive()
+        return await self.send_and_receive_frames(
+            [
+                RscpFrame().packFrame(values)
+                for values in split_values(rscpValuesToSend, self.__max_frame_size)
+            ],
+            priority,
+            deadline,
+        )
 
-            if recv_buffer is None:
-                _LOGGER.warning("Recv buffer is None, decryption failure???")
-                return []
+    async def send_and_receive_frame(
+        self, frame: bytes, priority: RequestPriority = RequestPriority.CONTROL
+    ) -> list:
+        """Sends an already packed frame and returns the answer as list of RscpValues."""
+        return await self.send_and_receive_frames([frame], priority)
 
-            recvd_frame_length = RscpFrame.getFrameLength(recv_buffer)
+    async def send_and_receive_frames(
+        self,
+        frames: list[bytes],
+        priority: RequestPriority = RequestPriority.CONTROL,
+        deadline: float | None = None,
+        key: str | None = None,
+        sample: PollSample | None = None,
+        timeout: float | None = None,
+    ) -> list:
+        """Sends already packed frames back to back and returns the merged answers.
 
-            frame = RscpFrame()
-            if len(recv_buffer) > recvd_frame_length:
-                frame.unpack(recv_buffer[0:recvd_frame_length])
+        The device answers each frame with a frame of its own, the values of all
+        answers are returned in the order of the requests. Waiting requests get
+        the connection by priority. A request which didn't get it before its
+        deadline (time.monotonic()) fails, and a waiting request is replaced by a
+        newer one with the same key. A request which isn't answered within
+        timeout seconds, by default the timeout of its priority class in
+        REQUEST_TIMEOUTS, raises RscpRequestTimeoutException; its late response
+        is dropped. The timings and sizes of the transfer are added to sample.
+        """
+        if timeout is None:
+            timeout = REQUEST_TIMEOUTS[priority]
+        request_timeout = asyncio.timeout(timeout)
+        try:
+            async with request_timeout:
+                return await self.__transfer(frames, priority, deadline, key, sample)
+        except TimeoutError as err:
+            # the queue raises RscpRequestExpiredException, a TimeoutError too
+            if not request_timeout.expired():
+                raise
+            self.__timeout_stats.timeouts[priority.name.lower()] += 1
+            raise RscpRequestTimeoutException(
+                f"No response within {timeout} s"
+            ) from err
+
+    async def __transfer(
+        self,
+        frames: list[bytes],
+        priority: RequestPriority,
+        deadline: float | None,
+        key: str | None,
+        sample: PollSample | None,
+    ) -> list:
+        enqueued = time.monotonic()
+        async with self.__queue.slot(priority, deadline, key):
+            if sample is not None:
+                sample.queue_wait = time.monotonic() - enqueued
+            if self.__pipelined:
+                pending = _PendingRequest(
+                    frames, asyncio.get_running_loop().create_future(), sample=sample
+                )
+                # append before writing, a fast response may be read by another request
+                self.__pending.append(pending)
+                try:
+                    await self.__send_frames(frames, sample)
+                except BaseException as err:
+                    self.__pending.remove(pending)
+                    self.__fail_pending(err)
+                    raise
+            else:
+                await self.__send_frames(frames, sample)
+                return self.__unpack_values(
+                    await self.__receive_frames(frames, sample), sample
+                )
 
-            return frame.getRscpValues()
+        try:
+            return await self.__receive_pipelined(pending)
+        except asyncio.CancelledError:
+            # the response is still read, but dropped when it arrives
+            pending.future.cancel()
+            raise
+
+    async def __send_frames(
+        self, frames: list[bytes], sample: PollSample | None
+    ) -> None:
+        try:
+            for frame in frames:
+                await self.__send_frame(frame, sample)
+        except BaseException:
+            # a partly written request can't be completed, start a new stream
+            self.client.disconnect()
+            raise
+
+    async def __send_frame(
+        self, frame: bytes, sample: PollSample | None = None
+    ) -> None:
+        start = time.monotonic()
+        if self.__crypto_executor is None:
+            ciphertext = self.__encryption.encrypt(frame)
+        else:
+            # frames are encrypted one after another, so the CBC IV chain stays intact
+            ciphertext = await asyncio.get_running_loop().run_in_executor(
+                self.__crypto_executor, self.__encryption.encrypt, frame
+            )
+        if sample is not None:
+            # the write to the socket isn't part of the encryption time
+            sample.encrypt += time.monotonic() - start
+            sample.request_bytes += len(frame)
+        await self.client._send(ciphertext)  # noqa: SLF001
+
+    async def __receive_frames(
+        self, requests: list[bytes], sample: PollSample | None = None
+    ) -> list[bytes]:
+        """Reads from the connection until the responses to requests are received.
+
+        Bytes received behind the last complete frame stay in the decoder and
+        are used for the next response. Late responses of cancelled requests
+        are dropped first. If this request is cancelled, the responses still
+        missing are dropped when they arrive with a later request.
+        """
+        responses = []
+        try:
+            while len(responses) < len(requests):
+                if not self.__decoder.has_frames():
+                    await self.__receive_chunk(sample)
+                    continue
+                for buffer in self.__decoder.pop_frames():
+                    if not self.__drop_late_frame(buffer):
+                        responses.append(buffer)
+        except asyncio.CancelledError:
+            if self.client.is_connected():
+                self.__late_frames.extend(requests[len(responses) :])
+            raise
+        return responses
+
+    def __drop_late_frame(self, buffer: bytes) -> bool:
+        "Returns True if buffer is the late response of a cancelled request."
+        if not self.__late_frames:
+            return False
+        request = self.__late_frames.popleft()
+        if not is_response_to(request, buffer):
+            self.client.disconnect()
+            raise RscpConnectionException("Late response doesn't match the request!")
+        self.__timeout_stats.late_frames += 1
+        return True
+
+    async def __receive_chunk(self, sample: PollSample | None = None) -> None:
+        # read the raw data, decryption is done by the decoder because a
+        # chunk doesn't need to end on a cipher block boundary
+        start = time.monotonic()
+        try:
+            chunk = await asyncio.wait_for(
+                self.client._receive(None),  # noqa: SLF001
+                self.__read_timeout,
+            )
+        except TimeoutError as err:
+            # the device didn't answer, e.g. the socket is half open after it restarted
+            self.client.disconnect()
+            raise RscpCommunicationException(
+                f"No data received for {self.__read_timeout} s, reconnecting"
+            ) from err
+        if not chunk:
+            self.client.disconnect()
+            raise RscpConnectionException("Connection closed by device!")
+        received = time.monotonic()
+        self.__last_activity = received
+        # a received chunk is fed completely even if the request is cancelled,
+        # else the stream is out of sync
+        if self.__crypto_executor is None:
+            offset = 0
+            try:
+                while offset < len(chunk):
+                    if offset > 0:
+                        await asyncio.sleep(0)
+                    self.__decoder.feed(chunk[offset : offset + CRYPTO_SLICE_SIZE])
+                    offset += CRYPTO_SLICE_SIZE
+            except asyncio.CancelledError:
+                self.__decoder.feed(chunk[offset:])
+                raise
+        else:
+            feeding = asyncio.get_running_loop().run_in_executor(
+                self.__crypto_executor, self.__decoder.feed, chunk
+            )
+            try:
+                await asyncio.shield(feeding)
+            except asyncio.CancelledError:
+                await feeding
+                raise
+        if sample is not None:
+            sample.network += received - start
+            sample.decrypt += time.monotonic() - received
+            sample.response_bytes += len(chunk)
+
+    async def __receive_pipelined(self, pending: _PendingRequest) -> list:
+        """Reads responses until the pending request is answered.
+
+        Only one request reads at a time, it hands the received frames to the
+        pending requests in the order they have been written.
+        """
+        while not pending.future.done():
+            async with self.__read_lock:
+                if pending.future.done():
+                    break
+                try:
+                    await self.__receive_chunk(pending.sample)
+                    self.__dispatch_frames()
+                except Exception as err:
+                    self.client.disconnect()
+                    self.__fail_pending(err)
+        return pending.future.result()
+
+    def __dispatch_frames(self) -> None:
+        for buffer in self.__decoder.pop_frames():
+            if not self.__pending:
+                raise RscpConnectionException("Received a frame without request!")
+            pending = self.__pending[0]
+            if not is_response_to(pending.frames[len(pending.responses)], buffer):
+                # the device doesn't answer in order, don't pipeline anymore
+                _LOGGER.warning(
+                    "Response doesn't match the pipelined request, falling back to lock-step mode!"
+                )
+                self.__pipelined = False
+                raise RscpConnectionException("Response doesn't match the request!")
+
+            pending.responses.append(buffer)
+            if pending.future.cancelled():
+                self.__timeout_stats.late_frames += 1
+            if len(pending.responses) == len(pending.frames):
+                self.__pending.popleft()
+                # the requesting task may have been cancelled meanwhile
+                if not pending.future.done():
+                    pending.future.set_result(
+                        self.__unpack_values(pending.responses, pending.sample)
+                    )
+
+    def __fail_pending(self, err: Exception) -> None:
+        "Fails all pending pipelined requests, their responses can't be matched anymore."
+        while self.__pending:
+            pending = self.__pending.popleft()
+            if not pending.future.done():
+                pending.future.set_exception(RscpConnectionException(str(err)))
+
+    @staticmethod
+    def __unpack_values(buffers: list[bytes], sample: PollSample | None = None) -> list:
+        start = time.monotonic()
+        values = []
+        for buffer in buffers:
+            frame = RscpFrame()
+            frame.unpack(buffer)
+            values.extend(frame.getRscpValues())
+        if sample is not None:
+            sample.decode += time.monotonic() - start
+        return values
 
     async def send_set_sun_mode_request(self, index: int, value: bool):
         """Sends a sun mode set request to the storage."""
 
         wallbox = self._get_wallbox(index)
         if wallbox is not None:
-            await wallbox.get_sun_mode_request(value, self.send_and_receive)
+            async with self.__supervised():
+                await wallbox.get_sun_mode_request(value, self.send_and_receive)
+            self.__handlerPipeline.request_group(POLL_GROUP_STATE)
 
     async def send_set_max_charge_current(self, index: int, value: int):
         """Sends a set max charge current request to the wallbox."""
 
         wallbox = self._get_wallbox(index)
         if wallbox is not None:
-            await wallbox.set_max_charge_current_request(value, self.send_and_receive)
+            async with self.__supervised():
+                await wallbox.set_max_charge_current_request(
+                    value, self.send_and_receive
+                )
+            self.__handlerPipeline.request_group(POLL_GROUP_STATE)
 
     async def send_set_min_charge_current(self, index: int, value: int):
         """Sends a set min charge current request to the wallbox."""
 
         wallbox = self._get_wallbox(index)
         if wallbox is not None:
-            await wallbox.set_min_charge_current_request(value, self.send_and_receive)
+            async with self.__supervised():
+                await wallbox.set_min_charge_current_request(
+                    value, self.send_and_receive
+                )
+            self.__handlerPipeline.request_group(POLL_GROUP_STATE)
 
-    async def send_battery_remote_power(self, power_w: int):
+    async def send_battery_remote_power(
+        self, power_w: int, next_poll: float | None = None
+    ) -> bool:
         """Sends a battery remote control power setpoint.
 
         Positive values charge the battery, negative values discharge it.
         Mode 0 = manual power control.
+        If the next poll is due (next_poll, time.monotonic()) within the remote
+        control period, the setpoint is sent along with the poll. A setpoint
+        which is still waiting for its poll is replaced and sent on its own.
+        Returns False if the setpoint is held for the poll.
+
+        A held setpoint reaches the device up to one period later than a
+        setpoint sent on its own, so two setpoints can be up to two periods
+        apart. One setpoint per update is saved, e.g. one of ten with an
+        update interval of 10 seconds.
         """
-        await self.__storage.send_battery_remote_control(power_w, self.send_and_receive)
+        if (
+            self.__piggyback_setpoint is None
+            and next_poll is not None
+            and next_poll - time.monotonic() <= REMOTE_CONTROL_PERIOD
+        ):
+            self.__piggyback_setpoint = StorageRscpModel.create_remote_control_request(
+                power_w
+            )
+            return False
+
+        if self.__piggyback_setpoint is not None:
+            _LOGGER.debug("Poll didn't take the setpoint in time, send it on its own")
+            self.__piggyback_setpoint = None
+
+        # a setpoint is outdated as soon as the next one is due
+        send_and_receive = functools.partial(
+            self.send_and_receive,
+            deadline=time.monotonic() + REMOTE_CONTROL_PERIOD,
+        )
+        async with self.__supervised():
+            await self.__storage.send_battery_remote_control(power_w, send_and_receive)
+        self.__standalone_setpoints += 1
+        self.__handlerPipeline.request_group(POLL_GROUP_STATE)
+        return True
 
     async def disable_remote_control(self):
         """Disables the remote control of the storage."""
-        await self.__storage.disable_remote_control(self.send_and_receive)
+        self.__piggyback_setpoint = None
+        async with self.__supervised():
+            await self.__storage.disable_remote_control(self.send_and_receive)
+        self.__handlerPipeline.request_group(POLL_GROUP_STATE)
 
     def __get_value_for_path(self, path, rscp_value: RscpValue):
         "Returns the value for the given path, or None if path not found."
@@ -235,29 +1006,86 @@ class RscpClient:
     async def _fetch_data(self):
         _LOGGER.debug("Fetch data")
         try:
-            if not self.client.is_connected():
-                _LOGGER.debug("Not connected, try to reconnect!")
-                await self._connect_and_login()
-
-            requests = await self.__handlerPipeline.collect_tags()
-            # transfer data and wait for response
-            received_values = await self.send_and_receive(requests)
-            if received_values is None:
-                _LOGGER.warning(
-                    "Received no values from device: %s for tags: %s",
-                    getattr(self.__storage, "serial", None),
-                    " ".join([request.getTagName() for request in requests]),
+            async with self.__supervised():
+                request = await self.__handlerPipeline.collect_request()
+                # transfer data and wait for response
+                self.__last_poll_frame_count = len(request.frames)
+                _LOGGER.debug(
+                    "Poll %d bytes in %d frames", len(request), len(request.frames)
                 )
-            else:
-                await self.__handlerPipeline.process(received_values)
+                setpoint, self.__piggyback_setpoint = self.__piggyback_setpoint, None
+                sample = PollSample(
+                    request_tags=len(request.values) + (1 if setpoint else 0),
+                    frames=len(request.frames),
+                )
+                start = time.monotonic()
+                try:
+                    received_values = await self.send_and_receive_frames(
+                        request.pack([setpoint] if setpoint else None),
+                        RequestPriority.POLL,
+                        key="poll",
+                        sample=sample,
+                    )
+                    # the energy is integrated with the time the powers were received
+                    received_at = time.monotonic()
+                except BaseException:
+                    # hand the setpoint to the next poll or setpoint, e.g. after a
+                    # timeout or a superseded poll, if no newer setpoint exists
+                    if setpoint is not None and self.__piggyback_setpoint is None:
+                        self.__piggyback_setpoint = setpoint
+                    raise
+                if setpoint is not None:
+                    self.__piggybacked_setpoints += 1
+                    self.__handlerPipeline.request_group(POLL_GROUP_STATE)
+                if received_values is None:
+                    _LOGGER.warning(
+                        "Received no values from device: %s for tags: %s",
+                        getattr(self.__storage, "serial", None),
+                        " ".join([value.getTagName() for value in request.values]),
+                    )
+                else:
+                    dispatch_start = time.monotonic()
+                    sample.unhandled_tags = await self.__handlerPipeline.process(
+                        received_values
+                    )
+                    if self.__storage is not None:
+                        self.__energy.integrate(
+                            self.__storage.get_model().powers, received_at
+                        )
+                    sample.dispatch = time.monotonic() - dispatch_start
+                    sample.response_tags = len(received_values)
+                    self.__handlerPipeline.mark_polled(request.groups)
+                    sample.total = time.monotonic() - start
+                    self.__poll_metrics.record(sample)
 
+        except RscpRequestSupersededException:
+            # a newer poll is queued, it updates the data instead
+            _LOGGER.debug("Poll superseded by a newer poll")
+        except RscpCircuitOpenException:
+            raise
+        except RscpRequestTimeoutException:
+            # the late response is dropped, the connection stays usable
+            self.__poll_metrics.record_failure()
+            raise
+        except RscpClientException:
+            self.__poll_metrics.record_failure()
+            self.client.disconnect()
+            raise
         except Exception as err:
+            self.__poll_metrics.record_failure()
             self.client.disconnect()
-            raise Exception(f"Error during data fetch: {err}") from err
+            raise RscpCommunicationException(f"Error during data fetch: {err}") from err
 
     async def fetch_data(self):
         "Creates RSCP frames and send it to the device, to fetch updated data!"
         result_values = {}
         _LOGGER.debug("Grab data from fetch_data")
-        await self._fetch_data()
+        # config entries sharing the client join a running poll, it requests
+        # the due groups of all of them
+        if self.__running_poll is None or self.__running_poll.done():
+            self.__running_poll = asyncio.ensure_future(self._fetch_data())
+        else:
+            self.__merged_polls += 1
+        # a cancelled caller doesn't cancel the poll of the others
+        await asyncio.shield(self.__running_poll)
         return result_values
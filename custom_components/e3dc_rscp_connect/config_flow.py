@@ -5,7 +5,31 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
 
-from .const import DOMAIN
+from .const import (
+    CONF_IDENTIFY_INTERVAL,
+    CONF_MAX_FRAME_SIZE,
+    CONF_OFFLOAD_CRYPTO,
+    CONF_PIPELINED,
+    CONF_POWER_DEADBAND,
+    CONF_POWER_DEADBAND_PERCENT,
+    CONF_POWER_MIN_WRITE_INTERVAL,
+    CONF_READ_TIMEOUT,
+    CONF_SLOW_INTERVAL,
+    CONF_STATE_INTERVAL,
+    CONF_UPDATE_INTERVAL,
+    DEFAULT_IDENTIFY_INTERVAL,
+    DEFAULT_OFFLOAD_CRYPTO,
+    DEFAULT_PIPELINED,
+    DEFAULT_POWER_DEADBAND,
+    DEFAULT_POWER_DEADBAND_PERCENT,
+    DEFAULT_POWER_MIN_WRITE_INTERVAL,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_SLOW_INTERVAL,
+    DEFAULT_STATE_INTERVAL,
+    DEFAULT_UPDATE_INTERVAL,
+    DOMAIN,
+)
+from .framing import DEFAULT_MAX_FRAME_SIZE
 
 
 class E3DCRscpConnectConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -60,8 +84,66 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     vol.Required("password", default=current.get("password", "")): str,
                     vol.Required("key", default=current.get("key", "")): str,
                     vol.Required(
-                        "update_interval", default=current.get("update_interval", "10")
-                    ): int,
+                        CONF_UPDATE_INTERVAL,
+                        default=current.get(
+                            CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
+                        ),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_STATE_INTERVAL,
+                        default=current.get(
+                            CONF_STATE_INTERVAL, DEFAULT_STATE_INTERVAL
+                        ),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_SLOW_INTERVAL,
+                        default=current.get(CONF_SLOW_INTERVAL, DEFAULT_SLOW_INTERVAL),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_IDENTIFY_INTERVAL,
+                        default=current.get(
+                            CONF_IDENTIFY_INTERVAL, DEFAULT_IDENTIFY_INTERVAL
+                        ),
+                    ): vol.All(int, vol.Range(min=60)),
+                    vol.Required(
+                        CONF_READ_TIMEOUT,
+                        default=current.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Required(
+                        CONF_MAX_FRAME_SIZE,
+                        default=current.get(
+                            CONF_MAX_FRAME_SIZE, DEFAULT_MAX_FRAME_SIZE
+                        ),
+                    ): vol.All(int, vol.Range(min=64)),
+                    vol.Required(
+                        CONF_PIPELINED,
+                        default=current.get(CONF_PIPELINED, DEFAULT_PIPELINED),
+                    ): bool,
+                    vol.Required(
+                        CONF_OFFLOAD_CRYPTO,
+                        default=current.get(
+                            CONF_OFFLOAD_CRYPTO, DEFAULT_OFFLOAD_CRYPTO
+                        ),
+                    ): bool,
+                    vol.Required(
+                        CONF_POWER_DEADBAND,
+                        default=current.get(
+                            CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND
+                        ),
+                    ): vol.All(int, vol.Range(min=0)),
+                    vol.Required(
+                        CONF_POWER_DEADBAND_PERCENT,
+                        default=current.get(
+                            CONF_POWER_DEADBAND_PERCENT, DEFAULT_POWER_DEADBAND_PERCENT
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                    vol.Required(
+                        CONF_POWER_MIN_WRITE_INTERVAL,
+                        default=current.get(
+                            CONF_POWER_MIN_WRITE_INTERVAL,
+                            DEFAULT_POWER_MIN_WRITE_INTERVAL,
+                        ),
+                    ): vol.All(int, vol.Range(min=0)),
                 }
             ),
         )
@@ -0,0 +1,120 @@
+"Shares the connection to a device between the config entries of the device."
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from homeassistant.core import HomeAssistant, callback
+
+from .client import RscpClient
+from .const import DOMAIN
+from .log import get_logger
+
+_LOGGER = get_logger(__name__)
+
+# key of the registry in hass.data[DOMAIN], the other keys are entry ids
+CONNECTION_REGISTRY = "connections"
+
+
+@dataclass
+class _SharedClient:
+    client: RscpClient
+    # connection options the client was created with
+    options: dict[str, object]
+    # poll intervals per config entry which uses the client
+    users: dict[str, dict[str, float]] = field(default_factory=dict)
+    # update interval per config entry which uses the client
+    update_intervals: dict[str, float] = field(default_factory=dict)
+
+
+def _merge_poll_intervals(users: dict[str, dict[str, float]]) -> dict[str, float]:
+    "Returns the shortest interval per poll group, groups without interval are polled always."
+    intervals = list(users.values())
+    groups = set.intersection(*(set(x) for x in intervals))
+    return {group: min(x[group] for x in intervals) for group in groups}
+
+
+class RscpConnectionRegistry:
+    """The clients of the devices, each shared by all config entries of its device.
+
+    A device only accepts a few concurrent RSCP connections. Config entries
+    with the same host, port and credentials use one RscpClient: its handler
+    pipeline polls each group with the shortest interval of the entries,
+    polls of the entries which are due at the same time are merged into one
+    request, and each entry gets the changed fields for its own entities.
+    """
+
+    def __init__(self) -> None:
+        "Inits an empty registry."
+        self.__clients: dict[tuple, _SharedClient] = {}
+
+    def acquire(
+        self,
+        key: tuple,
+        entry_id: str,
+        poll_intervals: dict[str, float],
+        options: dict[str, object],
+        create: Callable[[], RscpClient],
+        update_interval: float | None = None,
+    ) -> RscpClient:
+        """Returns the client of the device key for the config entry entry_id.
+
+        The first entry of a device creates the client with create and its
+        connection options, the last entry which releases it closes it. The
+        client expects polls in the shortest update interval of the entries.
+        """
+        shared = self.__clients.get(key)
+        if shared is None:
+            shared = self.__clients[key] = _SharedClient(create(), dict(options))
+        else:
+            _LOGGER.info(
+                "Sharing the connection to %s:%d with %d other entries",
+                key[0],
+                key[1],
+                len(shared.users),
+            )
+            differing = sorted(x for x in options if options[x] != shared.options[x])
+            if differing:
+                _LOGGER.warning(
+                    "Connection options %s of entry %s differ from the shared "
+                    "connection to %s:%d, which keeps the options of the first entry",
+                    ", ".join(differing),
+                    entry_id,
+                    key[0],
+                    key[1],
+                )
+        shared.users[entry_id] = dict(poll_intervals)
+        if update_interval is not None:
+            shared.update_intervals[entry_id] = update_interval
+        self.__apply_intervals(shared)
+        return shared.client
+
+    def release(self, key: tuple, entry_id: str) -> None:
+        "Releases the client of the config entry, the last entry closes it."
+        shared = self.__clients.get(key)
+        if shared is None or shared.users.pop(entry_id, None) is None:
+            return
+        shared.update_intervals.pop(entry_id, None)
+        if shared.users:
+            self.__apply_intervals(shared)
+            return
+        del self.__clients[key]
+        shared.client.close()
+
+    @staticmethod
+    def __apply_intervals(shared: _SharedClient) -> None:
+        shared.client.set_poll_intervals(_merge_poll_intervals(shared.users))
+        if shared.update_intervals:
+            shared.client.set_update_interval(min(shared.update_intervals.values()))
+
+    def entry_count(self, key: tuple) -> int:
+        "Returns the number of config entries which use the client of the device."
+        shared = self.__clients.get(key)
+        return 0 if shared is None else len(shared.users)
+
+
+@callback
+def async_get_registry(hass: HomeAssistant) -> RscpConnectionRegistry:
+    "Returns the connection registry of hass, it is created on first use."
+    return hass.data.setdefault(DOMAIN, {}).setdefault(
+        CONNECTION_REGISTRY, RscpConnectionRegistry()
+    )
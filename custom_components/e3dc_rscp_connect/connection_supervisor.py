@@ -0,0 +1,210 @@
+"Supervises the connection to the device with a backoff and a circuit breaker."
+
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from enum import StrEnum
+import random
+import time
+
+from rscp_lib.RscpConnection import RscpConnectionException
+
+from .log import get_logger
+
+_LOGGER = get_logger(__name__)
+
+# consecutive failures after which the circuit opens
+DEFAULT_FAILURE_THRESHOLD = 3
+# pause of the first opening of the circuit in seconds, it doubles with every
+# failed probe up to DEFAULT_BACKOFF_MAX
+DEFAULT_BACKOFF_INITIAL = 10
+DEFAULT_BACKOFF_MAX = 300
+# the pause is varied by up to this fraction, so clients don't retry in lockstep
+DEFAULT_BACKOFF_JITTER = 0.2
+
+
+class RscpClientException(RscpConnectionException):
+    "Base class of the errors raised by RscpClient."
+
+
+class RscpConnectFailedException(RscpClientException):
+    "Raised if the TCP connection to the device couldn't be established."
+
+
+class RscpAuthorizationException(RscpClientException):
+    "Raised if the device didn't accept the user, the password or the RSCP key."
+
+
+class RscpCommunicationException(RscpClientException):
+    "Raised if a request failed on an established connection."
+
+
+class RscpRequestTimeoutException(RscpCommunicationException):
+    "Raised if a request wasn't answered within its timeout."
+
+
+class RscpCircuitOpenException(RscpClientException):
+    "Raised instead of connecting while the circuit breaker pauses the connection."
+
+
+class CircuitState(StrEnum):
+    "States of the circuit breaker."
+
+    # requests are sent, a failed request reconnects with the next one
+    CLOSED = "closed"
+    # requests fail without connecting until the backoff expired
+    OPEN = "open"
+    # a single request probes the connection
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class ConnectionStats:
+    "Counters of the connection to the device."
+
+    connects: int = 0
+    # connects after the first one
+    reconnects: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    circuit_opened: int = 0
+    # requests which failed because the circuit was open
+    rejected: int = 0
+    # seconds without working connection, of the outages which ended
+    downtime: float = 0.0
+    last_error: str | None = None
+
+
+class ConnectionSupervisor:
+    """Decides if a request may use the connection and tracks its health.
+
+    Up to failure_threshold consecutive failures the next request connects
+    again right away. Then the circuit opens: requests fail without
+    connecting until the backoff expired. The backoff doubles with every
+    failed probe up to backoff_max and varies by jitter. After the backoff
+    the circuit is half open, a single request probes the connection and
+    closes the circuit if it succeeds.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        backoff_initial: float = DEFAULT_BACKOFF_INITIAL,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        jitter: float = DEFAULT_BACKOFF_JITTER,
+        clock: Callable[[], float] = time.monotonic,
+        random_source: Callable[[], float] = random.random,
+    ) -> None:
+        "Inits a closed circuit."
+        self.failure_threshold = failure_threshold
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.stats = ConnectionStats()
+        self.__clock = clock
+        self.__random = random_source
+        self.__state = CircuitState.CLOSED
+        # clock() when the open circuit becomes half open
+        self.__retry_at = 0.0
+        # openings since the circuit was closed, the exponent of the backoff
+        self.__openings = 0
+        self.__probing = False
+        # clock() of the first failure of the current outage
+        self.__down_since: float | None = None
+
+    @property
+    def state(self) -> CircuitState:
+        "Returns the state of the circuit breaker."
+        if self.__state is CircuitState.OPEN and self.__clock() >= self.__retry_at:
+            return CircuitState.HALF_OPEN
+        return self.__state
+
+    @property
+    def retry_in(self) -> float:
+        "Returns the seconds until the open circuit allows a probe, 0 if not open."
+        if self.__state is not CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self.__retry_at - self.__clock())
+
+    def before_request(self) -> None:
+        """Raises RscpCircuitOpenException if the request must not use the connection.
+
+        In half open state the first request is allowed as probe, the next
+        ones fail until the probe finished.
+        """
+        if self.__state is CircuitState.CLOSED:
+            return
+        if self.__state is CircuitState.OPEN:
+            remaining = self.__retry_at - self.__clock()
+            if remaining > 0:
+                self.stats.rejected += 1
+                raise RscpCircuitOpenException(
+                    f"Connection paused for {remaining:.0f} s after "
+                    f"{self.stats.consecutive_failures} failures"
+                )
+            self.__state = CircuitState.HALF_OPEN
+        if self.__probing:
+            self.stats.rejected += 1
+            raise RscpCircuitOpenException("Connection is being probed")
+        self.__probing = True
+
+    def record_connect(self) -> None:
+        "Counts an established connection."
+        self.stats.connects += 1
+        if self.stats.connects > 1:
+            self.stats.reconnects += 1
+
+    def record_success(self) -> None:
+        "Closes the circuit after a successful request."
+        if self.__down_since is not None:
+            downtime = self.__clock() - self.__down_since
+            self.stats.downtime += downtime
+            self.__down_since = None
+            _LOGGER.info("Connection restored after %.0f seconds", downtime)
+        self.__state = CircuitState.CLOSED
+        self.__openings = 0
+        self.__probing = False
+        self.stats.consecutive_failures = 0
+
+    def record_cancelled(self) -> None:
+        "Ends a probe which didn't finish, e.g. it was replaced or timed out."
+        self.__probing = False
+
+    def record_failure(self, err: Exception) -> None:
+        "Counts a failed request, the circuit opens after too many failures."
+        now = self.__clock()
+        self.stats.failures += 1
+        self.stats.consecutive_failures += 1
+        self.stats.last_error = f"{type(err).__name__}: {err}"
+        if self.__down_since is None:
+            self.__down_since = now
+        self.__probing = False
+        if (
+            self.__state is CircuitState.CLOSED
+            and self.stats.consecutive_failures < self.failure_threshold
+        ):
+            return
+
+        backoff = min(self.backoff_max, self.backoff_initial * 2**self.__openings)
+        backoff *= 1 + self.jitter * (2 * self.__random() - 1)
+        self.__openings += 1
+        self.__state = CircuitState.OPEN
+        self.__retry_at = now + backoff
+        self.stats.circuit_opened += 1
+        _LOGGER.warning(
+            "Connection failed %d times, pausing it for %.0f seconds: %s",
+            self.stats.consecutive_failures,
+            backoff,
+            err,
+        )
+
+    def as_dict(self) -> dict:
+        "Returns the state and the counters, e.g. for diagnostics."
+        current_downtime = (
+            0.0 if self.__down_since is None else self.__clock() - self.__down_since
+        )
+        return {
+            **asdict(self.stats),
+            "state": str(self.state),
+            "retry_in": self.retry_in,
+            "current_downtime": current_downtime,
+        }
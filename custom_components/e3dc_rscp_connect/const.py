@@ -7,3 +7,45 @@ CONF_PORT = "port"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_KEY = "key"
+CONF_UPDATE_INTERVAL = "update_interval"
+CONF_STATE_INTERVAL = "state_interval"
+CONF_SLOW_INTERVAL = "slow_interval"
+CONF_IDENTIFY_INTERVAL = "identify_interval"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_MAX_FRAME_SIZE = "max_frame_size"
+CONF_PIPELINED = "pipelined"
+CONF_OFFLOAD_CRYPTO = "offload_crypto"
+CONF_POWER_DEADBAND = "power_deadband"
+CONF_POWER_DEADBAND_PERCENT = "power_deadband_percent"
+CONF_POWER_MIN_WRITE_INTERVAL = "power_min_write_interval"
+
+DEFAULT_UPDATE_INTERVAL = 10
+DEFAULT_STATE_INTERVAL = 30
+DEFAULT_SLOW_INTERVAL = 600
+# devices added later and firmware updates are looked for hourly
+DEFAULT_IDENTIFY_INTERVAL = 3600
+# a connection without data for this many seconds while waiting for a response
+# is considered half open
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_PIPELINED = False
+DEFAULT_OFFLOAD_CRYPTO = False
+# power sensors write every changed value by default
+DEFAULT_POWER_DEADBAND = 0
+DEFAULT_POWER_DEADBAND_PERCENT = 0.0
+DEFAULT_POWER_MIN_WRITE_INTERVAL = 0
+
+# period of the battery remote control loop in seconds
+REMOTE_CONTROL_PERIOD = 1
+
+# an idle connection gets a keep-alive request after this many seconds
+KEEP_ALIVE_INTERVAL = 60
+# a lost connection is established and authorized this many seconds before the
+# next update, so the update doesn't wait for it
+CONNECT_AHEAD = 2
+
+# the requested tags are split into poll groups, each group is polled with its own
+# interval. Power values are polled on every update.
+POLL_GROUP_POWER = "power"
+POLL_GROUP_STATE = "state"
+POLL_GROUP_SLOW = "slow"
+POLL_GROUPS = (POLL_GROUP_POWER, POLL_GROUP_STATE, POLL_GROUP_SLOW)
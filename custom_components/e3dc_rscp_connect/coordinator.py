@@ -2,18 +2,72 @@
 
 import asyncio
 from datetime import UTC, datetime, timedelta
-import logging
 import time
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_at
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .client import RscpClient
+from .connection_registry import async_get_registry
+from .connection_supervisor import (
+    RscpCircuitOpenException,
+    RscpClientException,
+    RscpRequestTimeoutException,
+)
+from .const import (
+    CONF_IDENTIFY_INTERVAL,
+    CONF_MAX_FRAME_SIZE,
+    CONF_OFFLOAD_CRYPTO,
+    CONF_PIPELINED,
+    CONF_POWER_DEADBAND,
+    CONF_POWER_DEADBAND_PERCENT,
+    CONF_POWER_MIN_WRITE_INTERVAL,
+    CONF_READ_TIMEOUT,
+    CONF_SLOW_INTERVAL,
+    CONF_STATE_INTERVAL,
+    CONF_UPDATE_INTERVAL,
+    CONNECT_AHEAD,
+    DEFAULT_IDENTIFY_INTERVAL,
+    DEFAULT_OFFLOAD_CRYPTO,
+    DEFAULT_PIPELINED,
+    DEFAULT_POWER_DEADBAND,
+    DEFAULT_POWER_DEADBAND_PERCENT,
+    DEFAULT_POWER_MIN_WRITE_INTERVAL,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_SLOW_INTERVAL,
+    DEFAULT_STATE_INTERVAL,
+    DEFAULT_UPDATE_INTERVAL,
+    DOMAIN,
+    KEEP_ALIVE_INTERVAL,
+    POLL_GROUP_SLOW,
+    POLL_GROUP_STATE,
+    REMOTE_CONTROL_PERIOD,
+)
+from .deadline_scheduler import DeadlineScheduler, TickStats
+from .fleet_scheduler import FleetScheduler, async_get_fleet_scheduler
+from .framing import DEFAULT_MAX_FRAME_SIZE
+from .identification_cache import IdentificationCache
+from .log import add_secrets, get_logger
+from .model.ChangeTrackingModel import ChangedFields
+from .model.EnergyDataModel import EnergyDataModel
 from .model.SgReadyDataModel import SgReadyDataModel
 from .model.StorageDataModel import StorageDataModel
 from .model.WallboxDataModel import WallboxDataModel
+from .poll_metrics import PollMetrics
+from .request_queue import RscpRequestExpiredException
+from .write_filter import PowerWriteFilter
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__)
+
+
+def _devices(identification: dict) -> tuple:
+    "Returns the devices which have entities: the storage and the wallboxes."
+    storage = identification["storage"]
+    return (
+        storage["serial"] if storage is not None else None,
+        sorted((x["index"], x["serial"]) for x in identification["wallboxes"]),
+    )
 
 
 class E3dcRscpCoordinator(DataUpdateCoordinator):
@@ -30,33 +84,227 @@ class E3dcRscpCoordinator(DataUpdateCoordinator):
         self.username = current["username"]
         self.password = current["password"]
         self.key = current["key"]
+        # rscp_lib or a traceback may contain them
+        add_secrets(self.password, self.key)
         _LOGGER.info(
-            "Host: %s, Port: %d, user: %s, password: %s, key: %s",
-            self.host,
-            self.port,
-            self.username,
-            self.password,
-            self.key,
+            "Host: %s, Port: %d, user: %s", self.host, self.port, self.username
         )
 
         self.__last_device_info_update: datetime | None = None
-        self.__device_info_interval = timedelta(minutes=60)
+        self.__device_info_interval = timedelta(
+            seconds=current.get(CONF_IDENTIFY_INTERVAL, DEFAULT_IDENTIFY_INTERVAL)
+        )
+        self.__reidentify_task: asyncio.Task | None = None
+        self.__entry_id = entry.entry_id
+        self.__identification_cache = IdentificationCache(hass, entry.entry_id)
+        # identification_revision of the client when the cache was last updated
+        self.__identification_revision: int | None = None
+        # devices the entities were set up with, until the device identified them
+        self.__restored_devices: tuple | None = None
 
-        __update_interval = current.get("update_interval", 10)
-        _LOGGER.info("Starting coordinator with update interval: %d", __update_interval)
+        __update_interval = current.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
+        # state and rarely changing values are polled less often than power values
+        poll_intervals = {
+            POLL_GROUP_STATE: current.get(CONF_STATE_INTERVAL, DEFAULT_STATE_INTERVAL),
+            POLL_GROUP_SLOW: current.get(CONF_SLOW_INTERVAL, DEFAULT_SLOW_INTERVAL),
+        }
+        _LOGGER.info(
+            "Starting coordinator with update interval: %d, state interval: %d, slow interval: %d",
+            __update_interval,
+            poll_intervals[POLL_GROUP_STATE],
+            poll_intervals[POLL_GROUP_SLOW],
+        )
+        # the polls are scheduled at the phase of the entry, not by the
+        # coordinator of Home Assistant, see __schedule_update
         super().__init__(
             hass,
             _LOGGER,
             name="E3DC RSCP connect client",
-            update_interval=timedelta(seconds=__update_interval),
+            update_interval=None,
         )
+        self.poll_interval = timedelta(seconds=__update_interval)
+
+        # spreads the polls of all config entries and shares the crypto pool
+        self.__fleet = async_get_fleet_scheduler(hass)
+        self.__fleet.register(entry.entry_id)
+        # due time of the update the poll timer fired for, see __async_scheduled_update
+        self.__due_update: float | None = None
+        self.__unsub_update: CALLBACK_TYPE | None = None
 
-        self.client = RscpClient(
-            self.host, self.port, self.username, self.password, self.key
+        # config entries of the same device share the client and its connection
+        self.__connection_registry = async_get_registry(hass)
+        self.__connection_key = (
+            self.host,
+            self.port,
+            self.username,
+            self.password,
+            self.key,
+        )
+        self.__client_released = False
+        client_options = {
+            CONF_MAX_FRAME_SIZE: current.get(
+                CONF_MAX_FRAME_SIZE, DEFAULT_MAX_FRAME_SIZE
+            ),
+            CONF_PIPELINED: current.get(CONF_PIPELINED, DEFAULT_PIPELINED),
+            CONF_OFFLOAD_CRYPTO: current.get(
+                CONF_OFFLOAD_CRYPTO, DEFAULT_OFFLOAD_CRYPTO
+            ),
+            CONF_READ_TIMEOUT: current.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        }
+        self.client = self.__connection_registry.acquire(
+            self.__connection_key,
+            entry.entry_id,
+            poll_intervals,
+            client_options,
+            lambda: self.__create_client(client_options, poll_intervals),
+            update_interval=__update_interval,
         )
+        self.client.subscribe_changes(self)
+        self.__keep_alive_task: asyncio.Task | None = None
 
         self._remote_power_w: int = 0
         self._remote_task: asyncio.Task | None = None
+        # fires at fixed ticks, so the device gets a setpoint every period
+        self._remote_scheduler = DeadlineScheduler(
+            REMOTE_CONTROL_PERIOD, self._send_remote_setpoint
+        )
+        # time.monotonic() of the next scheduled update, None until the first update
+        self.__next_update: float | None = None
+        # limits of the power sensor states, see create_power_write_filter
+        self.__power_write_limits = (
+            current.get(CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND),
+            current.get(CONF_POWER_DEADBAND_PERCENT, DEFAULT_POWER_DEADBAND_PERCENT),
+            current.get(
+                CONF_POWER_MIN_WRITE_INTERVAL, DEFAULT_POWER_MIN_WRITE_INTERVAL
+            ),
+        )
+        self.__write_filters: dict[str, PowerWriteFilter] = {}
+        # the entities get all updates until they have been updated once
+        self.__notified_success: bool | None = None
+        self.__marked_fields: set[str] = set()
+
+    def __create_client(
+        self, options: dict[str, object], poll_intervals: dict[str, float]
+    ) -> RscpClient:
+        # the Rijndael cipher is pure python, large responses block the event loop
+        crypto_executor = None
+        if options[CONF_OFFLOAD_CRYPTO]:
+            crypto_executor = self.__fleet.crypto_executor
+
+        return RscpClient(
+            self.host,
+            self.port,
+            self.username,
+            self.password,
+            self.key,
+            poll_intervals,
+            max_frame_size=options[CONF_MAX_FRAME_SIZE],
+            pipelined=options[CONF_PIPELINED],
+            crypto_executor=crypto_executor,
+            read_timeout=options[CONF_READ_TIMEOUT],
+        )
+
+    @property
+    def unique_id_suffix(self) -> str:
+        """Returns the suffix of the unique ids of the entities of the entry.
+
+        The unique ids are built from the storage serial. The first config
+        entry of a device keeps them, the other entries with the same host and
+        port get their entry id appended, so their entities don't collide.
+        Unlike the connection key, the credentials are left out: entries with
+        other credentials get their own connection, but read the same storage.
+        """
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            current = entry.options or entry.data
+            if (current["host"], current["port"]) == (self.host, self.port):
+                if entry.entry_id == self.__entry_id:
+                    return ""
+                return f"_{self.__entry_id}"
+        return ""
+
+    @property
+    def connection_entries(self) -> int:
+        "Returns the number of config entries which share the client."
+        return self.__connection_registry.entry_count(self.__connection_key)
+
+    @property
+    def fleet(self) -> FleetScheduler:
+        "Returns the scheduler of the polls of all config entries."
+        return self.__fleet
+
+    @property
+    def poll_phase(self) -> float:
+        "Returns the phase of the polls as fraction of the update interval."
+        return self.__fleet.phase(self.__entry_id)
+
+    async def async_shutdown(self) -> None:
+        "Releases the client in addition to the coordinator shutdown."
+        await super().async_shutdown()
+        self.__unschedule_update()
+        if self.__reidentify_task is not None:
+            self.__reidentify_task.cancel()
+        if self.__keep_alive_task is not None:
+            self.__keep_alive_task.cancel()
+        if not self.__client_released:
+            # the last config entry of the device disconnects it
+            self.__client_released = True
+            self.client.unsubscribe_changes(self)
+            self.__connection_registry.release(self.__connection_key, self.__entry_id)
+            # after the client, the last entry stops the shared crypto pool
+            self.__fleet.unregister(self.__entry_id)
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context=None
+    ) -> CALLBACK_TYPE:
+        "Adds a listener, the polls are scheduled while there are listeners."
+        schedule = not self._listeners
+        remove_listener = super().async_add_listener(update_callback, context)
+        if schedule:
+            self.__schedule_update()
+
+        @callback
+        def remove() -> None:
+            remove_listener()
+            if not self._listeners:
+                self.__unschedule_update()
+
+        return remove
+
+    @callback
+    def __schedule_update(self) -> None:
+        """Schedules the next update at the phase of the entry.
+
+        The coordinator of Home Assistant schedules all entries with the
+        same interval in the same second; the fleet scheduler spreads them.
+        """
+        self.__unschedule_update()
+        if self.__client_released:
+            return
+        if self.config_entry and self.config_entry.pref_disable_polling:
+            return
+        if self.__next_update is None or self.__next_update <= time.monotonic():
+            self.__next_update = self.__fleet.next_poll(
+                self.__entry_id, self.poll_interval.total_seconds()
+            )
+        # the clock of the event loop is time.monotonic()
+        self.__unsub_update = async_call_at(
+            self.hass, self.__async_scheduled_update, self.__next_update
+        )
+
+    @callback
+    def __unschedule_update(self) -> None:
+        if self.__unsub_update is not None:
+            self.__unsub_update()
+            self.__unsub_update = None
+
+    async def __async_scheduled_update(self, _now: datetime) -> None:
+        "Runs the scheduled update, its lateness is measured."
+        self.__unsub_update = None
+        if self.hass.is_stopping:
+            return
+        self.__due_update = self.__next_update
+        await self.async_refresh()
 
     def __device_info_need_update(self):
         now = datetime.now(UTC)
@@ -69,7 +317,71 @@ class E3dcRscpCoordinator(DataUpdateCoordinator):
         return False
 
     async def __update_device_info(self):
-        await self.client.identify_device()
+        try:
+            identified = await self.client.identify_device()
+        except Exception:
+            # try again with the next update
+            self.__last_device_info_update = None
+            raise
+        # the client keeps the restored wallboxes, a removed one is only missing
+        # in the answer of the identification
+        await self.__async_save_identification(identified)
+
+        restored = self.__restored_devices
+        self.__restored_devices = None
+        if restored is not None and restored != _devices(identified):
+            # entities are only created at setup
+            _LOGGER.info("Identified devices differ from the cached ones, reloading")
+            self.hass.config_entries.async_schedule_reload(self.__entry_id)
+
+    def __start_reidentification(self) -> None:
+        if self.__reidentify_task is not None and not self.__reidentify_task.done():
+            return
+        self.__reidentify_task = self.hass.async_create_background_task(
+            self.__async_reidentify(), "e3dc_rscp_connect re-identification"
+        )
+
+    async def __async_reidentify(self) -> None:
+        "Looks for new devices and firmware updates, polls get the connection first."
+        devices = _devices(self.client.identification)
+        try:
+            await self.client.reidentify_device()
+        except Exception as err:
+            # tried again after the next interval, the polls report connection errors
+            _LOGGER.debug("Re-identification failed: %s", err)
+            return
+        await self.__async_save_identification()
+
+        if devices != _devices(self.client.identification):
+            _LOGGER.info("New devices identified, reloading")
+            self.hass.config_entries.async_schedule_reload(self.__entry_id)
+
+    async def __async_save_identification(
+        self, identification: dict | None = None
+    ) -> None:
+        self.__identification_revision = self.client.identification_revision
+        await self.__identification_cache.async_save(
+            identification or self.client.identification
+        )
+
+    async def async_restore_identification(self) -> bool:
+        """Restores the devices identified by an earlier run of the integration.
+
+        Returns False if there is no cached identification. The device is
+        identified again with the first update, changed identification data is
+        applied to the restored devices and the entry is reloaded if devices
+        were added or removed.
+        """
+        identification = await self.__identification_cache.async_load()
+        if not identification or identification.get("storage") is None:
+            return False
+        self.client.restore_identification(identification)
+        self.__identification_revision = self.client.identification_revision
+        self.__restored_devices = _devices(identification)
+        _LOGGER.debug(
+            "Restored identification of %s", identification["storage"]["serial"]
+        )
+        return True
 
     @property
     def wallboxes(self) -> list[WallboxDataModel]:
@@ -86,17 +398,93 @@ class E3dcRscpCoordinator(DataUpdateCoordinator):
         "Get access to the sg ready data."
         return self.client.sg_ready
 
+    @property
+    def energy(self) -> EnergyDataModel:
+        "Get access to the energy counters."
+        return self.client.energy
+
     def get_wallbox(self, index: int) -> WallboxDataModel:
         "Returns the ident data of a give wallbox."
         return self.client.get_wallbox(index)
 
+    def create_power_write_filter(self, name: str) -> PowerWriteFilter | None:
+        """Returns the write filter of a power sensor with the configured limits.
+
+        None is returned if no limit is configured.
+        """
+        write_filter = PowerWriteFilter(*self.__power_write_limits)
+        if not write_filter.enabled:
+            return None
+        self.__write_filters[name] = write_filter
+        return write_filter
+
+    @property
+    def write_filters(self) -> dict[str, PowerWriteFilter]:
+        "Returns the write filters of the power sensors by name."
+        return self.__write_filters
+
+    @property
+    def poll_metrics(self) -> PollMetrics:
+        "Returns the timing and size metrics of the polls."
+        return self.client.poll_metrics
+
+    @callback
+    def async_mark_changed(self, *data_fields: str) -> None:
+        "Updates the entities depending on data_fields with the next update."
+        self.__marked_fields.update(data_fields)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Updates the entities whose data changed since the last update.
+
+        Entities pass the data model fields they depend on as coordinator
+        context, entities without context are updated every time. All entities
+        are updated when the availability changes. The time the entities need
+        to write their states is measured.
+        """
+        start = time.monotonic()
+        changed = ChangedFields(
+            self.client.pop_changed_fields(self) | self.__marked_fields
+        )
+        self.__marked_fields = set()
+        update_all = self.__notified_success is not self.last_update_success
+        self.__notified_success = self.last_update_success
+
+        updates = 0
+        for update_callback, data_fields in list(self._listeners.values()):
+            if update_all or data_fields is None or changed.affects(data_fields):
+                update_callback()
+                updates += 1
+        self.client.poll_metrics.record_fan_out(time.monotonic() - start, updates)
+
     async def _async_update_data(self):
         starttime = time.time()
         data = {}
+        due, self.__due_update = self.__due_update, None
         try:
-            if self.__device_info_need_update():
-                await self.__update_device_info()
-            data = await self.client.fetch_data()
+            # waits while too many entries poll
+            async with self.__fleet.poll_slot(due) as lateness:
+                if lateness is not None:
+                    self.client.poll_metrics.record_lateness(lateness)
+                if self.__device_info_need_update():
+                    if (
+                        self.client.storage is None
+                        or self.__restored_devices is not None
+                    ):
+                        # the entities need the devices, or the restored devices
+                        # are compared to the identified ones
+                        await self.__update_device_info()
+                    else:
+                        # doesn't delay this and the following polls
+                        self.__start_reidentification()
+                data = await self.client.fetch_data()
+            # a poll may find inverters
+            if self.client.identification_revision != self.__identification_revision:
+                await self.__async_save_identification()
+        except RscpClientException as err:
+            # expected while the device is unreachable, the entities become
+            # unavailable and the coordinator logs the first failure
+            raise UpdateFailed(f"Fehler beim Abrufen: {err}") from err
         except Exception as err:
             _LOGGER.exception("Exception in update_data:")
             raise UpdateFailed(f"Fehler beim Abrufen: {err}") from err
@@ -104,6 +492,49 @@ class E3dcRscpCoordinator(DataUpdateCoordinator):
             duration = time.time() - starttime
             _LOGGER.debug("duration of update_data: %.3f seconds", duration)
             return data
+        finally:
+            # the next update is due at the phase of the entry
+            self.__next_update = self.__fleet.next_poll(
+                self.__entry_id, self.poll_interval.total_seconds()
+            )
+            self.__start_keep_alive()
+            if self._listeners:
+                self.__schedule_update()
+
+    def __start_keep_alive(self) -> None:
+        if self.__keep_alive_task is not None:
+            self.__keep_alive_task.cancel()
+        self.__keep_alive_task = self.hass.async_create_background_task(
+            self.__keep_alive(self.__next_update), "e3dc_rscp_connect keep-alive"
+        )
+
+    async def __keep_alive(self, next_update: float) -> None:
+        """Keeps the session warm until the next update and reconnects ahead of it.
+
+        An idle connection gets a keep-alive request every KEEP_ALIVE_INTERVAL,
+        which only happens with long update intervals. CONNECT_AHEAD seconds
+        before the update a lost connection is established again, so the
+        update doesn't wait for the connection and the authorization.
+        """
+        connect_at = next_update - CONNECT_AHEAD
+        while True:
+            ping_at = time.monotonic() - self.client.idle_time + KEEP_ALIVE_INTERVAL
+            if ping_at >= connect_at:
+                break
+            await asyncio.sleep(max(0.0, ping_at - time.monotonic()))
+            if not await self.__try_keep_alive(0.0):
+                break
+        await asyncio.sleep(max(0.0, connect_at - time.monotonic()))
+        await self.__try_keep_alive(KEEP_ALIVE_INTERVAL)
+
+    async def __try_keep_alive(self, max_idle: float) -> bool:
+        try:
+            await self.client.keep_alive(max_idle)
+        except Exception as err:
+            # the next update reports connection errors
+            _LOGGER.debug("Keep-alive failed: %s", err)
+            return False
+        return True
 
     async def set_sun_mode(self, wallbox_id: int, value: bool):
         "Uses the client implementation to change the sun mode."
@@ -134,7 +565,11 @@ class E3dcRscpCoordinator(DataUpdateCoordinator):
 
     async def stop_remote_control(self) -> None:
         "Stops the remote control loop and resets the battery setpoint to 0 W."
-        if self._remote_task is not None and not self._remote_task.done():
+        if self._remote_task is None:
+            # not started by this entry, another entry of the device may
+            # control the battery
+            return
+        if not self._remote_task.done():
             self._remote_task.cancel()
             try:
                 await self._remote_task
@@ -143,16 +578,41 @@ class E3dcRscpCoordinator(DataUpdateCoordinator):
         self._remote_task = None
         await self.client.disable_remote_control()
 
+    @property
+    def remote_control_period(self) -> float:
+        "Returns the period of the remote control loop in seconds."
+        return self._remote_scheduler.period
+
+    @property
+    def remote_control_stats(self) -> TickStats:
+        "Returns the timing of the remote control loop."
+        return self._remote_scheduler.stats
+
     async def _remote_control_loop(self) -> None:
         "Sends the current power setpoint to the battery every second."
         try:
-            while True:
-                try:
-                    await self.client.send_battery_remote_power(self._remote_power_w)
-                except Exception:
-                    _LOGGER.exception(
-                        "Battery remote control: error sending power setpoint"
-                    )
-                await asyncio.sleep(1)
+            await self._remote_scheduler.run()
         except asyncio.CancelledError:
             pass
+
+    async def _send_remote_setpoint(self) -> bool:
+        "Returns whether the setpoint was sent, not held for the next poll."
+        try:
+            return await self.client.send_battery_remote_power(
+                self._remote_power_w, self.__next_update
+            )
+        except RscpRequestExpiredException:
+            # the connection was busy for a whole period, the next
+            # setpoint replaces this one
+            _LOGGER.warning("Battery remote control: power setpoint not sent in time")
+            return False
+        except RscpRequestTimeoutException:
+            _LOGGER.warning("Battery remote control: power setpoint not answered")
+            return True
+        except RscpCircuitOpenException as err:
+            # the polls report the paused connection
+            _LOGGER.debug("Battery remote control: power setpoint not sent: %s", err)
+            return False
+        except Exception:
+            _LOGGER.exception("Battery remote control: error sending power setpoint")
+            return False
@@ -0,0 +1,107 @@
+"Scheduler which runs a callback at fixed ticks of the monotonic clock."
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import time
+
+from .log import get_logger
+
+_LOGGER = get_logger(__name__)
+
+# smoothing of the jitter estimation, same as the interarrival jitter of RFC 3550
+JITTER_GAIN = 1 / 16
+
+
+@dataclass
+class TickStats:
+    "Timing of the ticks of a DeadlineScheduler, all times in seconds."
+
+    ticks: int = 0
+    skipped: int = 0
+    last_lateness: float = 0.0
+    max_lateness: float = 0.0
+    total_lateness: float = 0.0
+    jitter: float = 0.0
+    # time between the ends of two callbacks which delivered something, e.g.
+    # between two sent setpoints
+    last_interval: float = 0.0
+    max_interval: float = 0.0
+
+    @property
+    def mean_lateness(self) -> float:
+        "Returns the mean time a tick fired after its deadline."
+        return self.total_lateness / self.ticks if self.ticks else 0.0
+
+
+class DeadlineScheduler:
+    """Runs a callback at fixed ticks start + n * period.
+
+    The ticks are calculated from the start time, so the duration of the
+    callback doesn't add up to a drift. If a callback takes longer than a
+    period, the missed ticks are skipped instead of running the callback
+    several times in a row. A callback returning False had nothing to deliver
+    at its tick, its tick isn't part of the intervals.
+    """
+
+    def __init__(
+        self,
+        period: float,
+        callback: Callable[[], Awaitable[bool | None]],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        "Inits the scheduler, the callback is called once per period seconds."
+        self.__period = period
+        self.__callback = callback
+        self.__clock = clock
+        self.__stats = TickStats()
+
+    @property
+    def period(self) -> float:
+        "Returns the period in seconds."
+        return self.__period
+
+    @property
+    def stats(self) -> TickStats:
+        "Returns the timing statistics."
+        return self.__stats
+
+    async def run(self) -> None:
+        "Runs the callback at each tick until the task is cancelled."
+        next_tick = self.__clock()
+        last_done: float | None = None
+        while True:
+            delay = next_tick - self.__clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            self.__add_lateness(self.__clock() - next_tick)
+            delivered = await self.__callback() is not False
+
+            done = self.__clock()
+            if delivered:
+                if last_done is not None:
+                    self.__stats.last_interval = done - last_done
+                    self.__stats.max_interval = max(
+                        self.__stats.max_interval, self.__stats.last_interval
+                    )
+                last_done = done
+
+            next_tick += self.__period
+            missed = int((done - next_tick) // self.__period)
+            if missed > 0:
+                # run once for the latest passed tick instead of catching up
+                next_tick += missed * self.__period
+                self.__stats.skipped += missed
+                _LOGGER.debug("Skipped %d ticks of %.3f seconds", missed, self.__period)
+
+    def __add_lateness(self, lateness: float) -> None:
+        stats = self.__stats
+        if stats.ticks > 0:
+            stats.jitter += (abs(lateness - stats.last_lateness) - stats.jitter) * (
+                JITTER_GAIN
+            )
+        stats.ticks += 1
+        stats.last_lateness = lateness
+        stats.max_lateness = max(stats.max_lateness, lateness)
+        stats.total_lateness += lateness
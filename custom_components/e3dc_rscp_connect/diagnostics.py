@@ -0,0 +1,55 @@
+"Diagnostics support for the e3dc_rscp_connect integration."
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_KEY, CONF_PASSWORD, CONF_USERNAME, DOMAIN
+
+TO_REDACT = {CONF_KEY, CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    "Returns the diagnostics of a config entry."
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    client = coordinator.client
+    ticks = coordinator.remote_control_stats
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "remote_control": {
+            "active": coordinator.remote_control_active,
+            "period": coordinator.remote_control_period,
+            "ticks": {**asdict(ticks), "mean_lateness": ticks.mean_lateness},
+            "piggybacked_setpoints": client.piggybacked_setpoints,
+            "standalone_setpoints": client.standalone_setpoints,
+        },
+        "request_queue": {
+            priority.name.lower(): {**asdict(stats), "mean": stats.mean}
+            for priority, stats in client.queue_stats.items()
+        },
+        "connection": {
+            **client.supervisor.as_dict(),
+            "keep_alives": client.keep_alives,
+            "shared_by_entries": coordinator.connection_entries,
+            "merged_polls": client.merged_polls,
+        },
+        "request_timeouts": asdict(client.timeout_stats),
+        "fleet": {
+            **coordinator.fleet.as_dict(),
+            "poll_phase": coordinator.poll_phase,
+        },
+        "poll_metrics": client.poll_metrics.as_dict(),
+        "energy": client.energy_accumulator.as_dict(),
+        "power_write_filters": {
+            name: asdict(x.stats) for name, x in coordinator.write_filters.items()
+        },
+    }
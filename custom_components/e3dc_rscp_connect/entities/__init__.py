@@ -6,6 +6,8 @@ from .device_state_sensor import DeviceStateSensor
 from .device_update_state_sensor import DeviceUpdateStateSensor
 from .emergency_power_sensor import EmergencyPowerSensor
 from .energy_sensor import EnergySensor
+from .entity import with_entry_unique_ids
+from .poll_metric_sensor import PollMetricSensor
 from .power_sensor import PowerSensor
 from .sg_ready_sensor import SGReadySensor
 from .state_of_charge_sensor import StateOfChargeSensor
@@ -21,6 +23,7 @@ __all__ = [
     "DeviceUpdateStateSensor",
     "EmergencyPowerSensor",
     "EnergySensor",
+    "PollMetricSensor",
     "PowerSensor",
     "SGReadySensor",
     "StateOfChargeSensor",
@@ -28,4 +31,5 @@ __all__ = [
     "WallboxMaxCurrentNumber",
     "WallboxMinCurrentNumber",
     "WallboxPowerSensor",
+    "with_entry_unique_ids",
 ]
@@ -23,7 +23,8 @@ class BatteryRemotePowerNumber(E3dcConnectEntity, NumberEntity):
 
     def __init__(self, coordinator: E3dcRscpCoordinator, entry) -> None:
         """Init the entity."""
-        super().__init__(coordinator, entry)
+        # the state only changes by the entity itself, not with a poll
+        super().__init__(coordinator, entry, data_fields=())
         serial = coordinator.storage.serial.lower().replace("-", "_")
         self._attr_unique_id = f"{serial}_battery_remote_power"
         self._attr_name = "Batterie Fernsteuerung Leistung"
@@ -44,7 +45,8 @@ class BatteryRemoteSwitch(E3dcConnectEntity, SwitchEntity):
 
     def __init__(self, coordinator: E3dcRscpCoordinator, entry) -> None:
         """Init the entity."""
-        super().__init__(coordinator, entry)
+        # the state only changes by the entity itself, not with a poll
+        super().__init__(coordinator, entry, data_fields=())
         serial = coordinator.storage.serial.lower().replace("-", "_")
         self._attr_unique_id = f"{serial}_remote_control_active"
         self._attr_name = "Fernsteuerung"
@@ -1,15 +1,27 @@
 """Implements the charging state sensor for a wallbox."""
 
-import logging
-
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.sensor.const import SensorDeviceClass
 
 from ..coordinator import E3dcRscpCoordinator  # noqa: TID252
+from ..log import RateLimitedLogger, get_logger  # noqa: TID252
 from ..model.WallboxDataModel import WallboxDataModel  # noqa: TID252
 from .entity import E3dcConnectEntity
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__)
+
+# charging state (IEC 61851 control pilot state) -> state of the sensor
+CP_STATES = {
+    "A": "cable_disconnected",
+    "A1": "cable_disconnected",
+    "B": "cable_connected",
+    "B1": "cable_connected",
+    "B2": "cable_connected",
+    "C": "charging",
+    "C1": "charging",
+    "C2": "charging",
+    "F": "error",
+}
 
 
 class CpStateSensor(E3dcConnectEntity, SensorEntity):
@@ -24,10 +36,17 @@ class CpStateSensor(E3dcConnectEntity, SensorEntity):
     ) -> None:
         "Init the sensor."
 
-        super().__init__(coordinator, entry, "Wallbox", wallbox_id)
+        super().__init__(
+            coordinator,
+            entry,
+            "Wallbox",
+            wallbox_id,
+            data_fields=(f"wallboxes.{wallbox_id}.cp_state",),
+        )
         self._entry = entry
         self.coordinator = coordinator
         self._index = wallbox_id
+        self._log = RateLimitedLogger(_LOGGER)
 
         self._attr_name = "Wallbox Status"
         serial = coordinator.storage.serial.lower().replace("-", "_")
@@ -51,22 +70,9 @@ class CpStateSensor(E3dcConnectEntity, SensorEntity):
         if not wallbox:
             return None
         cp_state = wallbox.cp_state
-        _LOGGER.warning(f"CP_State: {cp_state}")
-        states = {
-            "A": "cable_disconnected",
-            "A1": "cable_disconnected",
-            "B": "cable_connected",
-            "B1": "cable_connected",
-            "B2": "cable_connected",
-            "C": "charging",
-            "C1": "charging",
-            "C2": "charging",
-            "F": "error",
-        }
-
-        state = states.get(cp_state)
+        state = CP_STATES.get(cp_state)
 
         if state is None:
-            _LOGGER.warning(f"unexpected cp state: {cp_state}")
+            self._log.warning("unexpected cp state: %s", cp_state)
 
         return state
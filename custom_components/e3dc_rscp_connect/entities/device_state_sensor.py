@@ -19,7 +19,11 @@ class DeviceStateSensor(E3dcConnectEntity, SensorEntity):
         index: int,
     ) -> None:
         "Init the sensor."
-        super().__init__(coordinator, entry)
+        super().__init__(
+            coordinator,
+            entry,
+            data_fields=(f"storage.device_states.{device.lower()}.{index}",),
+        )
         self._entry = entry
         self.coordinator = coordinator
 
@@ -41,7 +45,7 @@ class DeviceStateSensor(E3dcConnectEntity, SensorEntity):
 
         states = self.__data_get_func()
 
-        if states is None:
+        if states is None or states.working is None:
             return None
 
         if states.working:
@@ -19,7 +19,11 @@ class DeviceUpdateStateSensor(E3dcConnectEntity, SensorEntity):
         index: int,
     ) -> None:
         "Init the sensor."
-        super().__init__(coordinator, entry)
+        super().__init__(
+            coordinator,
+            entry,
+            data_fields=(f"storage.device_states.{device.lower()}.{index}",),
+        )
         self._entry = entry
         self.coordinator = coordinator
         serial = coordinator.storage.serial.lower().replace("-", "_")
@@ -13,7 +13,9 @@ class EmergencyPowerSensor(E3dcConnectEntity, SensorEntity):
 
     def __init__(self, coordinator: E3dcRscpCoordinator, entry) -> None:
         "Init the sensor."
-        super().__init__(coordinator, entry)
+        super().__init__(
+            coordinator, entry, data_fields=("storage.emergency_power_state",)
+        )
         self._entry = entry
         self.coordinator = coordinator
         self._attr_name = "Emergency Power Status"
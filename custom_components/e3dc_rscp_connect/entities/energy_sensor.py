@@ -1,8 +1,5 @@
 """Implements the energy sensor entity."""
 
-from collections.abc import Callable
-from datetime import UTC, datetime
-
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.components.sensor.const import SensorStateClass
 from homeassistant.const import UnitOfEnergy
@@ -13,28 +10,33 @@ from .entity import E3dcConnectEntity
 
 
 class EnergySensor(E3dcConnectEntity, SensorEntity, RestoreEntity):
-    """This sensor is used to hold energy data of E3DC energy storage system."""
+    """This sensor is used to hold energy data of E3DC energy storage system.
+
+    The energy is integrated by the EnergyAccumulator of the client, the
+    sensor adds the counter of its channel to the restored state.
+    """
 
     def __init__(
         self,
         coordinator: E3dcRscpCoordinator,
         entry,
         name: str,
-        sensor_value_id: str | None = None,
-        data_getter: Callable[[], int | None] | None = None,
-        negative_direction: bool = False,
+        channel: str,
         sub_device_type: str | None = None,
         sub_device_index: str | None = None,
     ) -> None:
-        """Inits the PowerSensor with a location. The location is used to create the attribute name and the unique id."""
-        super().__init__(coordinator, entry, sub_device_type, sub_device_index)
-
-        if data_getter is None and sensor_value_id is None:
-            raise ValueError("either data_getter or sensor_value_id must be set.")
-
-        self._negative_direction = negative_direction
-        self._location = sensor_value_id
-        self._data_getter = data_getter
+        """Inits the EnergySensor for a channel of the EnergyDataModel, e.g. "grid_production"."""
+        super().__init__(
+            coordinator,
+            entry,
+            sub_device_type,
+            sub_device_index,
+            data_fields=(f"energy.{channel}",),
+        )
+
+        self._channel = channel
+        # the restored state minus the counter at the time of the restore
+        self._offset_kwh = 0.0
 
         self._attr_name = name
 
@@ -46,54 +48,24 @@ class EnergySensor(E3dcConnectEntity, SensorEntity, RestoreEntity):
         self._attr_device_class = SensorDeviceClass.ENERGY
         self._attr_state_class = SensorStateClass.TOTAL_INCREASING
 
-        self._last_update = None
-        self._last_power = None
-        self._energy_kwh = 0.0
+    def __counter(self) -> float:
+        energy = self.coordinator.energy
+        if energy is None:
+            return 0.0
+        return getattr(energy, self._channel)
 
     async def async_added_to_hass(self):
-        """Register update callback."""
+        """Continues counting from the restored state."""
         await super().async_added_to_hass()
+        restored = 0.0
         if (last_state := await self.async_get_last_state()) is not None:
             try:
-                self._energy_kwh = float(last_state.state)
+                restored = float(last_state.state)
             except ValueError:
-                self._energy_kwh = 0.0
-
-        self.coordinator.async_add_listener(self._handle_coordinator_update)
-
-    def _handle_coordinator_update(self):
-        """Handle updated data from coordinator."""
-        now = datetime.now(UTC)
-        if self._data_getter is not None:
-            power_watt = self._data_getter()
-        else:
-            power_watt = self.coordinator.data.get(f"{self._location}")
-
-        if power_watt is None:
-            # _LOGGER.warning("Power value missing for location %s", self._location)
-            return
-
-        # check the sign of the power value, count only values for the correct direction!
-        if self._negative_direction:
-            power_watt = min(power_watt, 0)
-            # reverse sign to only create positive counters!
-            power_watt *= -1
-        else:
-            power_watt = max(power_watt, 0)
-
-        if self._last_update is not None:
-            # Zeitdifferenz in Stunden
-            delta_h = (now - self._last_update).total_seconds() / 3600.0
-            avg_power_kw = (self._last_power + power_watt) / 2 / 1000.0
-            self._energy_kwh += avg_power_kw * delta_h
-
-            self.async_write_ha_state()
-
-        # Zustand aktualisieren
-        self._last_update = now
-        self._last_power = power_watt
+                restored = 0.0
+        self._offset_kwh = restored - self.__counter()
 
     @property
     def native_value(self):
         "Returns the native value of the sensor."
-        return round(self._energy_kwh, 3)
+        return round(self._offset_kwh + self.__counter(), 3)
@@ -1,5 +1,7 @@
 """Implements the entity base class."""
 
+from collections.abc import Sequence
+
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from ..const import DOMAIN  # noqa: TID252
@@ -15,9 +17,15 @@ class E3dcConnectEntity(CoordinatorEntity):
         entry,
         sub_device_type: str | None = None,
         sub_device_index: int | None = None,
+        data_fields: tuple[str, ...] | None = None,
     ) -> None:
-        """Inits the entity."""
-        super().__init__(coordinator)
+        """Inits the entity.
+
+        data_fields are the paths of the data model fields the entity shows,
+        e.g. "storage.powers.pv". The entity is only updated when one of them
+        changed, without data_fields it is updated after every poll.
+        """
+        super().__init__(coordinator, data_fields)
         self._entry = entry
         self.coordinator = coordinator
         self._sub_device_type = sub_device_type
@@ -45,3 +53,14 @@ class E3dcConnectEntity(CoordinatorEntity):
             "model": "S10",
             "sw_version": self.coordinator.storage.sw_version,
         }
+
+
+def with_entry_unique_ids(
+    coordinator: E3dcRscpCoordinator, entities: Sequence[E3dcConnectEntity]
+) -> Sequence[E3dcConnectEntity]:
+    "Appends the unique id suffix of the config entry to the unique ids of the entities."
+    suffix = coordinator.unique_id_suffix
+    if suffix:
+        for entity in entities:
+            entity._attr_unique_id = f"{entity._attr_unique_id}{suffix}"
+    return entities
@@ -0,0 +1,68 @@
+"""Implements the diagnostic sensors for the poll metrics."""
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory
+
+from ..coordinator import E3dcRscpCoordinator  # noqa: TID252
+from .entity import E3dcConnectEntity
+
+# statistics of the rolling histogram shown as attributes
+ATTRIBUTE_STATISTICS = ("mean", "p50", "p95", "p99", "max")
+
+
+class PollMetricSensor(E3dcConnectEntity, SensorEntity):
+    """This sensor shows the latest value of a poll metric.
+
+    The statistics of the rolling histogram are attributes, they are not
+    recorded because they change with every poll.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _unrecorded_attributes = frozenset({"count", *ATTRIBUTE_STATISTICS})
+
+    def __init__(
+        self,
+        coordinator: E3dcRscpCoordinator,
+        entry,
+        name: str,
+        metric: str,
+        unit: str | None = None,
+        device_class: SensorDeviceClass | None = None,
+        scale: float = 1.0,
+        enabled_default: bool = False,
+    ) -> None:
+        """Inits the sensor for metric, values are multiplied by scale (e.g. seconds to ms)."""
+        super().__init__(coordinator, entry)
+
+        self._attr_name = name
+        serial = coordinator.storage.serial.lower().replace("-", "_")
+        self._attr_unique_id = f"{serial}_poll_{metric}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_entity_registry_enabled_default = enabled_default
+        self._metric = metric
+        self._scale = scale
+
+    def __scaled(self, value: float | None) -> float | None:
+        if value is None:
+            return None
+        return round(value * self._scale, 3)
+
+    @property
+    def native_value(self):
+        "Get the latest value."
+        return self.__scaled(self.coordinator.poll_metrics[self._metric].last)
+
+    @property
+    def extra_state_attributes(self):
+        "Get the statistics of the last polls."
+        statistics = self.coordinator.poll_metrics[self._metric].as_dict()
+        return {
+            "count": statistics["count"],
+            **{x: self.__scaled(statistics[x]) for x in ATTRIBUTE_STATISTICS},
+        }
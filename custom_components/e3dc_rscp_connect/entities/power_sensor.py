@@ -1,13 +1,18 @@
 """Implements the power sensor entity."""
 
+import time
+
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
     SensorStateClass,
 )
 from homeassistant.const import UnitOfPower
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_call_later
 
 from ..coordinator import E3dcRscpCoordinator  # noqa: TID252
+from ..write_filter import PowerWriteFilter  # noqa: TID252
 from .entity import E3dcConnectEntity
 
 
@@ -23,9 +28,22 @@ class PowerSensor(E3dcConnectEntity, SensorEntity):
         sensor_value_id=None,
         sub_device_type: str | None = None,
         sub_device_index: int | None = None,
+        data_field: str | None = None,
+        write_filter: PowerWriteFilter | None = None,
     ) -> None:
-        """Inits the PowerSensor with a location. The location is used to create the attribute name and the unique id."""
-        super().__init__(coordinator, entry, sub_device_type, sub_device_index)
+        """Inits the PowerSensor with a location. The location is used to create the attribute name and the unique id.
+
+        data_field is the path of the data model field returned by data_getter.
+        The write_filter limits the states written, without it every change is
+        written.
+        """
+        super().__init__(
+            coordinator,
+            entry,
+            sub_device_type,
+            sub_device_index,
+            (data_field,) if data_field else None,
+        )
 
         if data_getter is None and sensor_value_id is None:
             raise ValueError("data_getter or _sensor_value_id must be set!")
@@ -39,10 +57,59 @@ class PowerSensor(E3dcConnectEntity, SensorEntity):
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self.__data_getter = data_getter
         self._sensor_value_id = sensor_value_id
+        self.__write_filter = write_filter
+        self.__written_available: bool | None = None
+        self.__cancel_delayed_write: CALLBACK_TYPE | None = None
 
     @property
-    def native_value(self):
-        """Returns the power value."""
+    def latest_value(self):
+        """Returns the latest power value, even if it hasn't been written as state."""
         if self.__data_getter:
             return self.__data_getter()
         return self.coordinator.data.get(self._sensor_value_id)
+
+    @property
+    def native_value(self):
+        """Returns the power value of the state."""
+        if self.__write_filter is not None and self.__write_filter.stats.written:
+            return self.__write_filter.value
+        return self.latest_value
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Writes the state, unless the write filter holds the value back."""
+        if self.__write_filter is None or self.available != self.__written_available:
+            self.__write_state()
+            return
+
+        delay = self.__write_filter.delay(self.latest_value, time.monotonic())
+        if delay == 0:
+            self.__write_state()
+        elif delay is not None and self.__cancel_delayed_write is None:
+            self.__cancel_delayed_write = async_call_later(
+                self.hass, delay, self.__delayed_write
+            )
+
+    @callback
+    def __delayed_write(self, _now) -> None:
+        # writes the latest value, when the rate limit held back a change
+        self.__cancel_delayed_write = None
+        if not self.__write_filter.within_deadband(self.latest_value):
+            self.__write_state()
+
+    def __write_state(self) -> None:
+        if self.__write_filter is not None:
+            self.__cancel_delayed()
+            self.__write_filter.record_write(self.latest_value, time.monotonic())
+            self.__written_available = self.available
+        self.async_write_ha_state()
+
+    def __cancel_delayed(self) -> None:
+        if self.__cancel_delayed_write is not None:
+            self.__cancel_delayed_write()
+            self.__cancel_delayed_write = None
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancels a delayed write."""
+        self.__cancel_delayed()
+        await super().async_will_remove_from_hass()
@@ -12,7 +12,7 @@ class SGReadySensor(E3dcConnectEntity, SensorEntity):
 
     def __init__(self, coordinator: E3dcRscpCoordinator, entry) -> None:
         "Init the sensor."
-        super().__init__(coordinator, entry)
+        super().__init__(coordinator, entry, data_fields=("sg_ready.state",))
         self._entry = entry
         self.coordinator = coordinator
 
@@ -13,7 +13,7 @@ class StateOfChargeSensor(E3dcConnectEntity, SensorEntity):
 
     def __init__(self, coordinator: E3dcRscpCoordinator, entry) -> None:
         "Init the sensor."
-        super().__init__(coordinator, entry)
+        super().__init__(coordinator, entry, data_fields=("storage.bat_soc",))
 
         self._attr_name = "Ladezustand"
         serial = coordinator.storage.serial.lower().replace("-", "_")
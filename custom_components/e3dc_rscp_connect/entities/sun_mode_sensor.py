@@ -18,7 +18,13 @@ class SunModeSensor(SelectEntity, E3dcConnectEntity):
         wallbox: WallboxDataModel,
     ) -> None:
         "Init the sensor."
-        super().__init__(coordinator, entry, "Wallbox", wallbox_id)
+        super().__init__(
+            coordinator,
+            entry,
+            "Wallbox",
+            wallbox_id,
+            data_fields=(f"wallboxes.{wallbox_id}.sun_mode",),
+        )
         self._entry = entry
         self.coordinator = coordinator
 
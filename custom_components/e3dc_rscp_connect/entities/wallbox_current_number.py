@@ -9,6 +9,11 @@ from ..model.WallboxDataModel import WallboxDataModel  # noqa: TID252
 from .entity import E3dcConnectEntity
 
 
+def _to_float(value: int | None, default: float | None) -> float | None:
+    "Returns the current as float, or default while it is unknown."
+    return default if value is None else float(value)
+
+
 class _WallboxCurrentNumber(E3dcConnectEntity, NumberEntity):
     """Base class for wallbox current number entities with optimistic UI."""
 
@@ -30,6 +35,15 @@ class _WallboxCurrentNumber(E3dcConnectEntity, NumberEntity):
         """Return True while waiting for the device to confirm the new value."""
         return self._assumed_value is not None
 
+    async def _async_set_current(self, value: float, send) -> None:
+        """Optimistically update the UI, then send to device and verify."""
+        self._assumed_value = value
+        self.async_write_ha_state()
+        await send(self._sub_device_index, int(value))
+        # clears the assumed value, even if the device didn't change the current
+        self.coordinator.async_mark_changed(*self.coordinator_context)
+        await self.coordinator.async_request_refresh()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """On coordinator update clear the assumed value so the real device value is shown.
@@ -54,7 +68,13 @@ class WallboxMaxCurrentNumber(_WallboxCurrentNumber):
         wallbox: WallboxDataModel,
     ) -> None:
         """Init the entity."""
-        super().__init__(coordinator, entry, "Wallbox", wallbox.index)
+        super().__init__(
+            coordinator,
+            entry,
+            "Wallbox",
+            wallbox.index,
+            data_fields=(f"wallboxes.{wallbox.index}.currents",),
+        )
 
         serial = coordinator.storage.serial.lower().replace("-", "_")
         device_name = (wallbox.device_name or "wallbox").lower().replace(" ", "_")
@@ -64,26 +84,23 @@ class WallboxMaxCurrentNumber(_WallboxCurrentNumber):
     @property
     def native_min_value(self) -> float:
         currents = self._currents()
-        return float(currents.lower_limit) if currents else 0.0
+        return _to_float(currents and currents.lower_limit, 0.0)
 
     @property
     def native_max_value(self) -> float:
         currents = self._currents()
-        return float(currents.upper_limit) if currents else 32.0
+        return _to_float(currents and currents.upper_limit, 32.0)
 
     @property
     def native_value(self) -> float | None:
         if self._assumed_value is not None:
             return self._assumed_value
         currents = self._currents()
-        return float(currents.max) if currents else None
+        return _to_float(currents and currents.max, None)
 
     async def async_set_native_value(self, value: float) -> None:
         """Optimistically update the UI, then send to device and verify."""
-        self._assumed_value = value
-        self.async_write_ha_state()
-        await self.coordinator.set_max_charge_current(self._sub_device_index, int(value))
-        await self.coordinator.async_request_refresh()
+        await self._async_set_current(value, self.coordinator.set_max_charge_current)
 
 
 class WallboxMinCurrentNumber(_WallboxCurrentNumber):
@@ -99,7 +116,13 @@ class WallboxMinCurrentNumber(_WallboxCurrentNumber):
         wallbox: WallboxDataModel,
     ) -> None:
         """Init the entity."""
-        super().__init__(coordinator, entry, "Wallbox", wallbox.index)
+        super().__init__(
+            coordinator,
+            entry,
+            "Wallbox",
+            wallbox.index,
+            data_fields=(f"wallboxes.{wallbox.index}.currents",),
+        )
 
         serial = coordinator.storage.serial.lower().replace("-", "_")
         device_name = (wallbox.device_name or "wallbox").lower().replace(" ", "_")
@@ -109,23 +132,20 @@ class WallboxMinCurrentNumber(_WallboxCurrentNumber):
     @property
     def native_min_value(self) -> float:
         currents = self._currents()
-        return float(currents.lower_limit) if currents else 0.0
+        return _to_float(currents and currents.lower_limit, 0.0)
 
     @property
     def native_max_value(self) -> float:
         currents = self._currents()
-        return float(currents.max) if currents else 32.0
+        return _to_float(currents and currents.max, 32.0)
 
     @property
     def native_value(self) -> float | None:
         if self._assumed_value is not None:
             return self._assumed_value
         currents = self._currents()
-        return float(currents.min) if currents else None
+        return _to_float(currents and currents.min, None)
 
     async def async_set_native_value(self, value: float) -> None:
         """Optimistically update the UI, then send to device and verify."""
-        self._assumed_value = value
-        self.async_write_ha_state()
-        await self.coordinator.set_min_charge_current(self._sub_device_index, int(value))
-        await self.coordinator.async_request_refresh()
+        await self._async_set_current(value, self.coordinator.set_min_charge_current)
@@ -18,9 +18,16 @@ class WallboxPowerSensor(E3dcConnectEntity, SensorEntity):
         name: str,
         index,
         data_getter,
+        data_field: str | None = None,
     ) -> None:
         """Inits the PowerSensor with a location. The location is used to create the attribute name and the unique id."""
-        super().__init__(coordinator, entry, "Wallbox", index)
+        super().__init__(
+            coordinator,
+            entry,
+            "Wallbox",
+            index,
+            (data_field,) if data_field else None,
+        )
         self._attr_name = name
         self.__data_getter = data_getter
         serial = coordinator.storage.serial.lower().replace("-", "_")
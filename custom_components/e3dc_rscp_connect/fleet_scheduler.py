@@ -0,0 +1,165 @@
+"Schedules the polls of all config entries, so one instance can poll many devices."
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+import math
+import time
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .log import get_logger
+
+_LOGGER = get_logger(__name__)
+
+# key of the scheduler in hass.data[DOMAIN], next to the connection registry
+FLEET_SCHEDULER = "fleet"
+# polls of all config entries which run at the same time, the others wait
+DEFAULT_MAX_CONCURRENT_POLLS = 4
+# the Rijndael cipher is pure python and holds the GIL, more threads don't
+# decrypt faster, they only keep the event loop free
+DEFAULT_CRYPTO_WORKERS = 2
+# the phase of slot n is n times this fraction of the interval (golden ratio),
+# which spreads any number of slots evenly over the interval
+PHASE_STEP = (math.sqrt(5) - 1) / 2
+# shorter intervals, e.g. 0 of an entry created before the option was bounded,
+# are polled with this one
+MIN_POLL_INTERVAL = 1.0
+
+
+@dataclass
+class FleetStats:
+    "Counters of the polls of all config entries."
+
+    polls: int = 0
+    # polls which waited because max_concurrent_polls polls were running
+    queued: int = 0
+    peak_in_flight: int = 0
+
+
+class FleetScheduler:
+    """Spreads the polls of all config entries over their update interval.
+
+    Each entry gets a slot and each slot a phase: the polls of an entry are
+    due at the multiples of its update interval shifted by its phase, so
+    entries with the same interval don't poll in the same second. At most
+    max_concurrent_polls polls run at the same time. The entries which
+    offload the cryptography share a pool of crypto_workers threads; a
+    connection still encrypts and decrypts its frames one after another, so
+    its CBC IV chains stay intact.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_polls: int = DEFAULT_MAX_CONCURRENT_POLLS,
+        crypto_workers: int = DEFAULT_CRYPTO_WORKERS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        "Inits a scheduler without entries."
+        self.max_concurrent_polls = max_concurrent_polls
+        self.crypto_workers = crypto_workers
+        self.stats = FleetStats()
+        self.__clock = clock
+        self.__slots: dict[str, int] = {}
+        self.__semaphore = asyncio.Semaphore(max_concurrent_polls)
+        self.__in_flight = 0
+        self.__crypto_executor: ThreadPoolExecutor | None = None
+
+    def register(self, entry_id: str) -> float:
+        "Assigns the lowest free slot to the config entry and returns its phase."
+        if entry_id not in self.__slots:
+            used = set(self.__slots.values())
+            self.__slots[entry_id] = next(
+                x for x in range(len(used) + 1) if x not in used
+            )
+        phase = self.phase(entry_id)
+        _LOGGER.debug(
+            "Entry %s polls in slot %d at phase %.3f",
+            entry_id,
+            self.__slots[entry_id],
+            phase,
+        )
+        return phase
+
+    def unregister(self, entry_id: str) -> None:
+        "Frees the slot of the config entry, the last entry stops the crypto pool."
+        self.__slots.pop(entry_id, None)
+        if not self.__slots and self.__crypto_executor is not None:
+            self.__crypto_executor.shutdown(wait=False)
+            self.__crypto_executor = None
+
+    def phase(self, entry_id: str) -> float:
+        "Returns the phase of the config entry as fraction of its update interval."
+        return math.modf(self.__slots[entry_id] * PHASE_STEP)[0]
+
+    @property
+    def entries(self) -> int:
+        "Returns the number of registered config entries."
+        return len(self.__slots)
+
+    @property
+    def in_flight(self) -> int:
+        "Returns the number of running polls."
+        return self.__in_flight
+
+    @property
+    def crypto_executor(self) -> ThreadPoolExecutor:
+        "Returns the crypto pool shared by the clients, it is created on first use."
+        if self.__crypto_executor is None:
+            self.__crypto_executor = ThreadPoolExecutor(
+                max_workers=self.crypto_workers, thread_name_prefix="e3dc_rscp_crypto"
+            )
+        return self.__crypto_executor
+
+    def next_poll(self, entry_id: str, interval: float) -> float:
+        """Returns the clock time of the next poll of the config entry.
+
+        That is the next multiple of interval, shifted by the phase of the
+        entry, which is at least half an interval away, so a poll which ended
+        late doesn't start the next one right away.
+        """
+        interval = max(interval, MIN_POLL_INTERVAL)
+        offset = self.phase(entry_id) * interval
+        earliest = self.__clock() + interval / 2
+        return offset + math.ceil((earliest - offset) / interval) * interval
+
+    @asynccontextmanager
+    async def poll_slot(self, due: float | None = None) -> AsyncIterator[float | None]:
+        """Waits until fewer than max_concurrent_polls polls run.
+
+        Yields the lateness of the poll: the seconds it started after the
+        clock time due, which includes the wait for the slot. None is yielded
+        for polls without due time, e.g. requested refreshes.
+        """
+        if self.__semaphore.locked():
+            self.stats.queued += 1
+        async with self.__semaphore:
+            self.__in_flight += 1
+            self.stats.polls += 1
+            self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.__in_flight)
+            try:
+                yield None if due is None else max(0.0, self.__clock() - due)
+            finally:
+                self.__in_flight -= 1
+
+    def as_dict(self) -> dict:
+        "Returns the settings, the state and the counters, e.g. for diagnostics."
+        return {
+            **asdict(self.stats),
+            "entries": self.entries,
+            "in_flight": self.in_flight,
+            "max_concurrent_polls": self.max_concurrent_polls,
+            "crypto_workers": self.crypto_workers,
+            "crypto_pool_running": self.__crypto_executor is not None,
+        }
+
+
+@callback
+def async_get_fleet_scheduler(hass: HomeAssistant) -> FleetScheduler:
+    "Returns the fleet scheduler of hass, it is created on first use."
+    return hass.data.setdefault(DOMAIN, {}).setdefault(
+        FLEET_SCHEDULER, FleetScheduler()
+    )
@@ -0,0 +1,295 @@
+"Helpers to pack RSCP request frames and to split the received byte stream into frames."
+
+import struct
+import time
+
+from rscp_lib.RscpEncryption import RscpEncryption
+from rscp_lib.RscpFrame import RscpFrame
+from rscp_lib.RscpValue import RscpValue
+from .log import get_logger
+
+_LOGGER = get_logger(__name__)
+
+FRAME_MAGIC = 0xDCE3
+FRAME_HEADER_SIZE = struct.calcsize(RscpFrame.frame_header_fmt)
+# if this flag is set in the ctrl field, a CRC32 checksum is appended to the frame
+FRAME_CTRL_CRC_FLAG = 0x10
+FRAME_CRC_SIZE = 4
+# seconds and nanoseconds of the frame timestamp, located behind magic and ctrl
+FRAME_TIMESTAMP_FMT = "<QI"
+FRAME_TIMESTAMP_OFFSET = 4
+# the tag of a response equals the tag of its request with this flag set
+RESPONSE_TAG_FLAG = 0x00800000
+FRAME_TAG_FMT = "<I"
+# default byte budget of a request frame, the size of the response grows with the
+# number of requested tags, so larger requests are split into several frames
+DEFAULT_MAX_FRAME_SIZE = 512
+
+
+def split_values(
+    values: list[RscpValue], max_frame_size: int | None
+) -> list[list[RscpValue]]:
+    """Splits the values into chunks which can be packed into frames of max_frame_size bytes.
+
+    Values are never split, a value which doesn't fit into an empty frame is
+    sent in a frame of its own. Without max_frame_size all values are
+    returned as one chunk.
+    """
+    if not max_frame_size:
+        return [values]
+
+    chunks: list[list[RscpValue]] = []
+    chunk: list[RscpValue] = []
+    chunk_size = FRAME_HEADER_SIZE
+    for value in values:
+        value_size = value.getPackedDataSize()
+        if chunk and chunk_size + value_size > max_frame_size:
+            chunks.append(chunk)
+            chunk = []
+            chunk_size = FRAME_HEADER_SIZE
+        if chunk_size + value_size > max_frame_size:
+            _LOGGER.debug(
+                "%s exceeds the frame size of %d bytes",
+                value.getTagName(),
+                max_frame_size,
+            )
+        chunk.append(value)
+        chunk_size += value_size
+    if chunk or not chunks:
+        chunks.append(chunk)
+    return chunks
+
+
+def is_response_to(request: bytes, response: bytes) -> bool:
+    """Returns True if the first value of the response answers the first value of the request.
+
+    The device answers the values of a request frame in order, so this is
+    used to verify that a response belongs to the request it is matched to.
+    Frames without values can't be checked and are treated as matching.
+    """
+    if len(request) < FRAME_HEADER_SIZE + struct.calcsize(FRAME_TAG_FMT) or len(
+        response
+    ) < FRAME_HEADER_SIZE + struct.calcsize(FRAME_TAG_FMT):
+        return True
+    (request_tag,) = struct.unpack_from(FRAME_TAG_FMT, request, FRAME_HEADER_SIZE)
+    (response_tag,) = struct.unpack_from(FRAME_TAG_FMT, response, FRAME_HEADER_SIZE)
+    return response_tag == request_tag | RESPONSE_TAG_FLAG
+
+
+class RscpFrameDecoder:
+    """Reassembles RSCP frames out of the received byte stream.
+
+    The device encrypts every response with Rijndael-256 CBC and pads it with
+    zeros up to the block size. TCP may deliver a response in several chunks,
+    and a chunk does not need to end on a block boundary. The decoder keeps
+    the undecrypted rest and the incomplete plaintext between calls, so no
+    received byte gets lost.
+    """
+
+    def __init__(self, encryption: RscpEncryption | None) -> None:
+        "Inits the decoder. Without encryption the stream is read as plaintext."
+        self.__encryption = encryption
+        self.__block_size = RscpEncryption.BLOCK_SIZE if encryption else 1
+        self.__cipher_rest = bytearray()
+        self.__plain = bytearray()
+        # stream offset of self.__plain[0], needed to find the padding boundaries
+        self.__offset = 0
+        self.__position = 0
+        self.__frames: list[bytes] = []
+
+    def reset(self) -> None:
+        "Drops all buffered data, needs to be called for each new connection."
+        self.__cipher_rest.clear()
+        self.__plain.clear()
+        self.__offset = 0
+        self.__position = 0
+        self.__frames.clear()
+
+    @property
+    def buffered_bytes(self) -> int:
+        "Returns the number of received bytes which are not part of a complete frame yet."
+        return len(self.__cipher_rest) + len(self.__plain) - self.__position
+
+    def has_frames(self) -> bool:
+        "Returns True if at least one complete frame is available."
+        return len(self.__frames) > 0
+
+    @property
+    def frame_count(self) -> int:
+        "Returns the number of complete frames which are available."
+        return len(self.__frames)
+
+    def pop_frames(self) -> list[bytes]:
+        "Returns all complete frames and removes them from the decoder."
+        frames = self.__frames
+        self.__frames = []
+        return frames
+
+    def feed(self, data: bytes) -> None:
+        """Adds received (encrypted) data to the decoder.
+
+        Raises a ValueError if the stream doesn't contain a valid frame header
+        where one is expected. In this case the stream is out of sync and the
+        connection should be reestablished.
+        """
+        if self.__encryption is None:
+            self.__plain.extend(data)
+        else:
+            self.__cipher_rest.extend(data)
+            aligned = len(self.__cipher_rest) - (
+                len(self.__cipher_rest) % self.__block_size
+            )
+            if aligned == 0:
+                return
+            # CBC keeps its IV inside the encryption object, so decrypting the
+            # stream block aligned piece by piece gives the same plaintext
+            plaintext = self.__encryption.decrypt(bytes(self.__cipher_rest[:aligned]))
+            del self.__cipher_rest[:aligned]
+            self.__plain.extend(plaintext)
+
+        self.__extract_frames()
+
+    def __skip_padding(self) -> None:
+        "Skips the zero padding between the end of a frame and the next block boundary."
+        stream_position = self.__offset + self.__position
+        boundary = -(-stream_position // self.__block_size) * self.__block_size
+        end = min(boundary - self.__offset, len(self.__plain))
+        while self.__position < end and self.__plain[self.__position] == 0:
+            self.__position += 1
+
+    def __extract_frames(self) -> None:
+        view = memoryview(self.__plain)
+        try:
+            while True:
+                self.__skip_padding()
+                available = len(self.__plain) - self.__position
+                if available < FRAME_HEADER_SIZE:
+                    break
+
+                magic, ctrl, _, _, data_length = struct.unpack_from(
+                    RscpFrame.frame_header_fmt, self.__plain, self.__position
+                )
+                if magic != FRAME_MAGIC:
+                    raise ValueError(
+                        f"Invalid frame magic 0x{magic:04X}, stream out of sync!"
+                    )
+
+                frame_length = FRAME_HEADER_SIZE + data_length
+                if ctrl & FRAME_CTRL_CRC_FLAG:
+                    frame_length += FRAME_CRC_SIZE
+                if available < frame_length:
+                    _LOGGER.debug(
+                        "Incomplete frame, %d of %d bytes received",
+                        available,
+                        frame_length,
+                    )
+                    break
+
+                start = self.__position
+                self.__frames.append(bytes(view[start : start + frame_length]))
+                self.__position += frame_length
+        except ValueError:
+            view.release()
+            self.reset()
+            raise
+        view.release()
+
+        # drop consumed data, only the (small) incomplete rest is moved
+        if self.__position > 0:
+            del self.__plain[: self.__position]
+            self.__offset += self.__position
+            self.__position = 0
+
+
+class RscpRequestFrame:
+    """A request frame which is packed once and can be sent multiple times.
+
+    Packing a frame means serializing every RscpValue of the request. For the
+    periodic poll the request doesn't change, so only the timestamp of the
+    frame header gets updated before each transfer.
+    """
+
+    def __init__(
+        self, values: list[RscpValue], groups: frozenset[str] = frozenset()
+    ) -> None:
+        "Packs the values into the frame buffer, groups names the poll groups of the values."
+        self.__values = values
+        self.__groups = groups
+        self.__buffer = bytearray(RscpFrame().packFrame(values))
+
+    @property
+    def values(self) -> list[RscpValue]:
+        "Returns the RscpValues packed into this frame."
+        return self.__values
+
+    @property
+    def groups(self) -> frozenset[str]:
+        "Returns the poll groups requested by this frame."
+        return self.__groups
+
+    def __len__(self) -> int:
+        return len(self.__buffer)
+
+    def pack(self) -> bytes:
+        "Returns the frame with the current time as timestamp."
+        now = time.time_ns()
+        struct.pack_into(
+            FRAME_TIMESTAMP_FMT,
+            self.__buffer,
+            FRAME_TIMESTAMP_OFFSET,
+            now // 1_000_000_000,
+            now % 1_000_000_000,
+        )
+        return bytes(self.__buffer)
+
+
+class RscpRequest:
+    """A request which is packed into one or more RscpRequestFrames.
+
+    The values are split into frames of at most max_frame_size bytes. The
+    frames are sent back to back and the device answers each of them with
+    a frame of its own.
+    """
+
+    def __init__(
+        self,
+        values: list[RscpValue],
+        groups: frozenset[str] = frozenset(),
+        max_frame_size: int | None = DEFAULT_MAX_FRAME_SIZE,
+    ) -> None:
+        "Splits and packs the values, groups names the poll groups of the values."
+        self.__values = values
+        self.__groups = groups
+        self.__frames = [
+            RscpRequestFrame(chunk, groups)
+            for chunk in split_values(values, max_frame_size)
+        ]
+
+    @property
+    def values(self) -> list[RscpValue]:
+        "Returns all RscpValues of this request."
+        return self.__values
+
+    @property
+    def groups(self) -> frozenset[str]:
+        "Returns the poll groups requested by this request."
+        return self.__groups
+
+    @property
+    def frames(self) -> list[RscpRequestFrame]:
+        "Returns the frames of this request."
+        return self.__frames
+
+    def __len__(self) -> int:
+        return sum(len(frame) for frame in self.__frames)
+
+    def pack(self, extra_values: list[RscpValue] | None = None) -> list[bytes]:
+        """Returns all frames with the current time as timestamp.
+
+        extra_values are appended to the last frame, so they are sent without
+        an additional frame. Only this last frame needs to be packed again.
+        """
+        frames = [frame.pack() for frame in self.__frames]
+        if extra_values:
+            frames[-1] = RscpFrame().packFrame(self.__frames[-1].values + extra_values)
+        return frames
@@ -0,0 +1,46 @@
+"Persists the identified devices, so the entities can be set up before the device answers."
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+IDENTIFICATION_STORE_VERSION = 1
+
+
+class IdentificationCache:
+    """The identification of a config entry in the storage of Home Assistant.
+
+    The identification is the dict of RscpClient.identification, it is only
+    written if it changed.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        "Inits the cache of the config entry entry_id."
+        self.__store = Store(
+            hass, IDENTIFICATION_STORE_VERSION, f"{DOMAIN}.identification.{entry_id}"
+        )
+        self.__data: dict | None = None
+
+    @property
+    def data(self) -> dict | None:
+        "Returns the last loaded or saved identification."
+        return self.__data
+
+    async def async_load(self) -> dict | None:
+        "Returns the stored identification, None if nothing is stored."
+        self.__data = await self.__store.async_load()
+        return self.__data
+
+    async def async_save(self, identification: dict) -> bool:
+        "Stores identification, returns False if it didn't change."
+        if identification == self.__data:
+            return False
+        self.__data = identification
+        await self.__store.async_save(identification)
+        return True
+
+    async def async_remove(self) -> None:
+        "Removes the stored identification."
+        self.__data = None
+        await self.__store.async_remove()
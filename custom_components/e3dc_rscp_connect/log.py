@@ -0,0 +1,150 @@
+"""Logging helpers of the integration: lazy RSCP values, rate limiting and redaction.
+
+Modules get their logger with get_logger, it removes the registered secrets
+from all records before they are emitted, including tracebacks. The loggers of
+rscp_lib get the same filter.
+"""
+
+from collections.abc import Iterable
+import logging
+import time
+
+from rscp_lib.RscpValue import RscpValue
+
+# seconds in which a repeated message of a RateLimitedLogger is suppressed
+LOG_RATE_LIMIT_INTERVAL = 600
+
+REDACTED = "**REDACTED**"
+
+# loggers of rscp_lib, e.g. the connection logs its host and errors
+RSCP_LIB_LOGGERS = (
+    "rscp_lib.RscpConnection",
+    "rscp_lib.RscpEncryption",
+    "rscp_lib.RscpFrame",
+    "rscp_lib.RscpValue",
+)
+
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+class RedactionFilter(logging.Filter):
+    """Replaces the registered secrets in the messages of the records.
+
+    Filters only run for records of enabled levels, so disabled messages are
+    not formatted. A filter of a logger only sees the records created on that
+    logger, not the ones propagated from its children.
+    """
+
+    def __init__(self) -> None:
+        "Inits the filter without secrets."
+        super().__init__()
+        self.__secrets: set[str] = set()
+
+    def add_secrets(self, secrets: Iterable[str | None]) -> None:
+        "Registers secrets, empty values are ignored."
+        self.__secrets.update(x for x in secrets if x)
+
+    def redact(self, text: str) -> str:
+        "Returns text with all secrets replaced."
+        # longer secrets first, a secret may contain another one
+        for secret in sorted(self.__secrets, key=len, reverse=True):
+            text = text.replace(secret, REDACTED)
+        return text
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        "Formats the message with the secrets replaced, the record is always emitted."
+        if self.__secrets:
+            message = record.getMessage()
+            redacted = self.redact(message)
+            if redacted != message:
+                record.msg = redacted
+                record.args = ()
+            if record.exc_info and not record.exc_text:
+                # handlers use the cached text instead of formatting exc_info
+                record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            if record.exc_text:
+                record.exc_text = self.redact(record.exc_text)
+            if record.stack_info:
+                record.stack_info = self.redact(record.stack_info)
+        return True
+
+
+_REDACTION_FILTER = RedactionFilter()
+
+
+def get_logger(name: str) -> logging.Logger:
+    "Returns the logger of a module, with the secrets redacted."
+    logger = logging.getLogger(name)
+    if _REDACTION_FILTER not in logger.filters:
+        logger.addFilter(_REDACTION_FILTER)
+    return logger
+
+
+def add_secrets(*secrets: str | None) -> None:
+    "Registers secrets which must not appear in the log, e.g. passwords."
+    _REDACTION_FILTER.add_secrets(secrets)
+    for name in RSCP_LIB_LOGGERS:
+        get_logger(name)
+
+
+class LazyRscpValue:
+    """Serializes an RSCP value tree only when the log message is formatted.
+
+    Pass it as argument of a %s placeholder, toString() isn't called if the
+    level of the message is disabled.
+    """
+
+    __slots__ = ("__value",)
+
+    def __init__(self, value: RscpValue | None) -> None:
+        "Wraps value."
+        self.__value = value
+
+    def __str__(self) -> str:
+        "Returns the serialized value."
+        if self.__value is None:
+            return "None"
+        return self.__value.toString()
+
+
+class RateLimitedLogger:
+    """Logs repeated messages at most once per interval.
+
+    Messages are repeated if the format string and the arguments are equal.
+    The number of suppressed repetitions is appended to the next message
+    which is logged.
+    """
+
+    def __init__(
+        self, logger: logging.Logger, interval: float = LOG_RATE_LIMIT_INTERVAL
+    ) -> None:
+        "Inits the rate limit for logger."
+        self.__logger = logger
+        self.__interval = interval
+        # key -> [time.monotonic() of the last logged message, suppressed count]
+        self.__last: dict[tuple, list] = {}
+
+    def log(self, level: int, msg: str, *args) -> None:
+        "Logs the message, unless it was logged within the interval."
+        if not self.__logger.isEnabledFor(level):
+            return
+        key = (msg, *args)
+        now = time.monotonic()
+        last = self.__last.get(key)
+        if last is not None and now - last[0] < self.__interval:
+            last[1] += 1
+            return
+        self.__last[key] = [now, 0]
+        if last is not None and last[1]:
+            msg += " (%d similar messages suppressed)"
+            args = (*args, last[1])
+        # report the caller of log, warning, ... as origin
+        self.__logger.log(level, msg, *args, stacklevel=3)
+
+    def warning(self, msg: str, *args) -> None:
+        "Logs a rate limited warning."
+        self.log(logging.WARNING, msg, *args)
+
+    def info(self, msg: str, *args) -> None:
+        "Logs a rate limited info message."
+        self.log(logging.INFO, msg, *args)
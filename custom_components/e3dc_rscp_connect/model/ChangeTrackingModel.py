@@ -0,0 +1,78 @@
+"""Base class of the data models, which remembers the fields changed since the last poll."""
+
+from collections.abc import Iterable
+from dataclasses import fields
+
+_MISSING = object()
+
+
+class ChangeTrackingModel:
+    """Records the names of the fields which got a new value.
+
+    The changed fields are collected as dotted paths, including the fields of
+    nested models and of models stored in dicts, e.g. "powers.pv" or
+    "device_states.battery.0.working". Values changed in place, like items
+    of a dict, have to be marked with mark_changed.
+    """
+
+    def __setattr__(self, name: str, value) -> None:
+        "Sets the attribute and records it, if the value differs."
+        if getattr(self, name, _MISSING) != value:
+            self.__changed().add(name)
+        super().__setattr__(name, value)
+
+    def __changed(self) -> set[str]:
+        # not a dataclass field, so it isn't part of __eq__ and __repr__
+        return self.__dict__.setdefault("_changed_fields", set())
+
+    def mark_changed(self, path: str) -> None:
+        "Records a change which can't be detected by assignment."
+        self.__changed().add(path)
+
+    def pop_changed_fields(self, prefix: str = "") -> set[str]:
+        "Returns the paths of the fields changed since the last call and resets them."
+        changed = {prefix + x for x in self.__dict__.pop("_changed_fields", ())}
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, ChangeTrackingModel):
+                changed |= value.pop_changed_fields(f"{prefix}{field.name}.")
+            elif isinstance(value, dict):
+                for key, item in value.items():
+                    if isinstance(item, ChangeTrackingModel):
+                        changed |= item.pop_changed_fields(
+                            f"{prefix}{field.name}.{key}."
+                        )
+        return changed
+
+
+class ChangedFields:
+    """The paths changed since the last update of the entities.
+
+    An entity depends on a field if the field itself, a field below it or a
+    field above it changed, e.g. "inverters.0" for "inverters.0.power_mppt.1".
+    """
+
+    def __init__(self, paths: Iterable[str]) -> None:
+        "Inits the changed paths and all their parents."
+        self.paths = set(paths)
+        self.__parents = {
+            path[:index]
+            for path in self.paths
+            for index, char in enumerate(path)
+            if char == "."
+        }
+
+    def __bool__(self) -> bool:
+        "Returns True if any field changed."
+        return bool(self.paths)
+
+    def affects(self, data_fields: Iterable[str]) -> bool:
+        "Returns True if one of the data_fields changed."
+        for path in data_fields:
+            if path in self.paths or path in self.__parents:
+                return True
+            while "." in path:
+                path = path.rsplit(".", 1)[0]
+                if path in self.paths:
+                    return True
+        return False
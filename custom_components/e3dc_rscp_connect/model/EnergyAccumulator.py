@@ -0,0 +1,107 @@
+"""Integrates the EMS power values of all polls into energy counters."""
+
+from dataclasses import asdict
+
+from ..const import DEFAULT_UPDATE_INTERVAL  # noqa: TID252
+from ..log import get_logger  # noqa: TID252
+from .EnergyDataModel import EnergyDataModel
+from .StorageDataModel import EmsPowerModel
+
+logger = get_logger(__name__)
+
+# energy counters and the EmsPowerModel field they are integrated from. The
+# negative direction counts the power below 0, e.g. the grid production.
+ENERGY_CHANNELS = {
+    "home_consumption": ("home", False),
+    "grid_consumption": ("grid", False),
+    "grid_production": ("grid", True),
+    "battery_charge": ("battery", False),
+    "battery_discharge": ("battery", True),
+    "pv_production": ("pv", False),
+    "additional_production": ("additional", False),
+    "wallbox_charge": ("wallbox", False),
+    "wallbox_sun_charge": ("wallbox_pv", False),
+}
+
+# the power fields in the order they are integrated
+POWER_FIELDS = tuple(dict.fromkeys(x for x, _ in ENERGY_CHANNELS.values()))
+
+# the power between two polls further apart than this many update intervals is
+# unknown, e.g. after the device was unreachable, the last known power is held
+MAX_GAP_INTERVALS = 3
+
+_WS_PER_KWH = 3600 * 1000
+
+
+class EnergyAccumulator:
+    """Integrates the power values with the trapezoidal rule.
+
+    Each poll is timestamped with time.monotonic() when its response was
+    received, so neither wall clock jumps nor the time the entities need to
+    update distort the energy. All counters are updated in one pass per poll.
+    """
+
+    def __init__(self) -> None:
+        "Inits the counters with 0 kWh."
+        self.__model = EnergyDataModel()
+        self.__last_time: float | None = None
+        self.__last_powers: tuple[int | None, ...] = (None,) * len(POWER_FIELDS)
+        self.__max_gap = MAX_GAP_INTERVALS * DEFAULT_UPDATE_INTERVAL
+        self.__estimated_gaps = 0
+
+    def get_model(self) -> EnergyDataModel:
+        "Returns the energy counters."
+        return self.__model
+
+    def set_update_interval(self, update_interval: float) -> None:
+        "Sets the update interval in seconds the polls are expected in."
+        self.__max_gap = MAX_GAP_INTERVALS * update_interval
+
+    def integrate(self, powers: EmsPowerModel, received_at: float) -> None:
+        """Adds the energy since the previous poll.
+
+        received_at is the time.monotonic() the response with the powers was
+        received. A power value which is None isn't integrated up to and from
+        this poll. Over a gap of more than MAX_GAP_INTERVALS update intervals
+        the power of the previous poll is integrated.
+        """
+        current = tuple(getattr(powers, x) for x in POWER_FIELDS)
+        previous, last_time = self.__last_powers, self.__last_time
+        self.__last_powers, self.__last_time = current, received_at
+        if last_time is None:
+            return
+
+        duration = received_at - last_time
+        if duration <= 0:
+            return
+        end = current
+        if duration > self.__max_gap:
+            self.__estimated_gaps += 1
+            logger.info(
+                "No poll for %.0f s, its energy is integrated with the last known power",
+                duration,
+            )
+            end = previous
+
+        # energy per direction in kWh, for each power field
+        positive = {}
+        negative = {}
+        for field, power, last_power in zip(POWER_FIELDS, end, previous):
+            if power is None or last_power is None:
+                continue
+            positive[field] = (
+                (max(power, 0) + max(last_power, 0)) / 2 * duration / _WS_PER_KWH
+            )
+            negative[field] = (
+                (max(-power, 0) + max(-last_power, 0)) / 2 * duration / _WS_PER_KWH
+            )
+
+        model = self.__model
+        for channel, (field, negative_direction) in ENERGY_CHANNELS.items():
+            energy = (negative if negative_direction else positive).get(field)
+            if energy:
+                setattr(model, channel, getattr(model, channel) + energy)
+
+    def as_dict(self) -> dict:
+        "Returns the counters in kWh and the estimated gaps, e.g. for diagnostics."
+        return {**asdict(self.__model), "estimated_gaps": self.__estimated_gaps}
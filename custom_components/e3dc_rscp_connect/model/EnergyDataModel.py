@@ -0,0 +1,20 @@
+"""Data class holding the energy counters integrated from the power values."""
+
+from dataclasses import dataclass
+
+from .ChangeTrackingModel import ChangeTrackingModel
+
+
+@dataclass
+class EnergyDataModel(ChangeTrackingModel):
+    "Energy in kWh since the start of the integration, see EnergyAccumulator."
+
+    home_consumption: float = 0.0
+    grid_consumption: float = 0.0
+    grid_production: float = 0.0
+    battery_charge: float = 0.0
+    battery_discharge: float = 0.0
+    pv_production: float = 0.0
+    additional_production: float = 0.0
+    wallbox_charge: float = 0.0
+    wallbox_sun_charge: float = 0.0
@@ -1,42 +1,173 @@
 "This file contains the RscpHandlerPipeline."
 
-import logging  # noqa: I001
+import time  # noqa: I001
 from .RscpModelInterface import RscpModelInterface
+from ..const import POLL_GROUPS  # noqa: TID252
+from ..framing import DEFAULT_MAX_FRAME_SIZE, RscpRequest  # noqa: TID252
+from ..log import RateLimitedLogger, get_logger  # noqa: TID252
 from rscp_lib.RscpValue import RscpValue
 
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__)
+
+# containers which hold data of one of several devices, the value of the index
+# child selects the device
+INDEXED_CONTAINERS = {
+    "TAG_BAT_DATA": "TAG_BAT_INDEX",
+    "TAG_PVI_DATA": "TAG_PVI_INDEX",
+    "TAG_SGR_DATA": "TAG_SGR_INDEX",
+    "TAG_WB_DATA": "TAG_WB_INDEX",
+}
+
+# a group is treated as due slightly before its interval elapsed, so jitter of the
+# update timer doesn't shift it by a whole update interval
+POLL_INTERVAL_TOLERANCE = 0.5
 
 
 class RscpHandlerPipeline:
-    def __init__(self):
+    def __init__(
+        self,
+        group_intervals: dict[str, float] | None = None,
+        max_frame_size: int | None = DEFAULT_MAX_FRAME_SIZE,
+    ):
         self._handlers = []
+        # the same tags stay unhandled in every poll
+        self.__log = RateLimitedLogger(_LOGGER)
+        self.__max_frame_size = max_frame_size
+        # tag name -> handlers, and (tag name, index) -> handlers for indexed containers
+        self.__tag_index: dict[str, list[RscpModelInterface]] = {}
+        self.__container_index: dict[tuple[str, int], list[RscpModelInterface]] = {}
+        # handlers without declared tags, they get all values not found in the index
+        self.__unindexed_handlers: list[RscpModelInterface] = []
+        # poll groups without interval are polled on every update
+        self.__group_intervals: dict[str, float] = dict(group_intervals or {})
+        self.__last_polled: dict[str, float] = {}
+        # cached requests per combination of due groups: (revisions, request)
+        self.__requests: dict[frozenset[str], tuple[tuple[int, ...], RscpRequest]] = {}
 
     def add_handler(self, handler: RscpModelInterface):
         self._handlers.append(handler)
+        self.__requests.clear()
+
+        handled_tags = handler.get_handled_tags()
+        if not handled_tags:
+            self.__unindexed_handlers.append(handler)
+        for tag_name, index in handled_tags:
+            if index is None:
+                self.__tag_index.setdefault(tag_name, []).append(handler)
+            else:
+                self.__container_index.setdefault((tag_name, index), []).append(handler)
+
+    def __find_handlers(self, value: RscpValue) -> list[RscpModelInterface]:
+        tag_name = value.getTagName()
+        handlers = self.__tag_index.get(tag_name)
+        if handlers is not None:
+            return handlers
 
-    async def process(self, values):
-        """Process a list of RSCP values."""
+        index_tag = INDEXED_CONTAINERS.get(tag_name)
+        if index_tag is not None:
+            index = value.get_child(index_tag)
+            if index is not None:
+                handlers = self.__container_index.get((tag_name, index.getValue()))
+                if handlers is not None:
+                    return handlers
+
+        return self.__unindexed_handlers
+
+    async def process(self, values) -> int:
+        """Process a list of RSCP values.
+
+        Returns the number of values no handler processed.
+        """
         if values is None:
             _LOGGER.warning("Values is None, no data to process!")
-            return
+            return 0
 
+        unhandled = 0
         for value in values:
             handled = False
 
-            for handler in self._handlers:
+            for handler in self.__find_handlers(value):
                 if handler.handle_rscp_data(value):
                     handled = True
                     break
 
             if not handled:
-                _LOGGER.warning("Unhandled RSCP tag: %s", value.getTagName())
+                unhandled += 1
+                self.__log.warning("Unhandled RSCP tag: %s", value.getTagName())
+        return unhandled
+
+    def set_group_intervals(self, group_intervals: dict[str, float]) -> None:
+        """Sets the poll interval in seconds per poll group."""
+        self.__group_intervals = dict(group_intervals)
 
-    async def collect_tags(self) -> list[RscpValue]:
-        """Collect rscp tags from all registered handlers."""
+    def request_group(self, group: str) -> None:
+        """Polls the group with the next request, e.g. after a value was changed."""
+        self.__last_polled.pop(group, None)
+
+    def get_due_groups(self, now: float | None = None) -> frozenset[str]:
+        """Returns the poll groups which need to be requested at time now (monotonic)."""
+        if now is None:
+            now = time.monotonic()
+
+        due = set()
+        for group in POLL_GROUPS:
+            interval = self.__group_intervals.get(group)
+            last_polled = self.__last_polled.get(group)
+            if (
+                not interval
+                or last_polled is None
+                or now - last_polled >= interval - POLL_INTERVAL_TOLERANCE
+            ):
+                due.add(group)
+        return frozenset(due)
+
+    def mark_polled(self, groups: frozenset[str], now: float | None = None) -> None:
+        """Remembers that the groups have been polled successfully at time now."""
+        if now is None:
+            now = time.monotonic()
+        for group in groups:
+            self.__last_polled[group] = now
+
+    async def collect_tags(self, groups=None) -> list[RscpValue]:
+        """Collect rscp tags from all registered handlers.
+
+        If groups is given only the tags of these poll groups are collected.
+        """
 
         all_tags = []
         for handler in self._handlers:
-            tags = handler.get_rscp_tags()
-            all_tags.extend(tags)
+            tag_groups = handler.get_rscp_tag_groups()
+            for group in POLL_GROUPS:
+                if groups is None or group in groups:
+                    all_tags.extend(tag_groups.get(group, []))
 
         return all_tags
+
+    async def collect_request(self, now: float | None = None) -> RscpRequest:
+        """Returns the packed request with the tags of all due poll groups.
+
+        The request of each combination of due groups is only rebuilt if a handler
+        was added or the tag revision of a handler changed since the last call.
+        """
+        groups = self.get_due_groups(now)
+        # read the revisions before collecting, a handler may change its tags
+        # while collecting them (e.g. after sending the identification tags once)
+        revisions = tuple(
+            handler.get_rscp_tags_revision() for handler in self._handlers
+        )
+        cached = self.__requests.get(groups)
+        if cached is not None and cached[0] == revisions:
+            return cached[1]
+
+        request = RscpRequest(
+            await self.collect_tags(groups), groups, self.__max_frame_size
+        )
+        self.__requests[groups] = (revisions, request)
+        _LOGGER.debug(
+            "Rebuilt request for %s: %d tags, %d bytes in %d frames",
+            sorted(groups),
+            len(request.values),
+            len(request),
+            len(request.frames),
+        )
+        return request
@@ -6,6 +6,8 @@ from abc import ABC, abstractmethod
 
 from rscp_lib.RscpValue import RscpValue
 
+from ..const import POLL_GROUP_POWER, POLL_GROUP_SLOW  # noqa: TID252
+
 
 class RscpModelInterface(ABC):
     """This interface needs to be implemented by all classes which want to handle RSCP tags from the client."""
@@ -24,6 +26,17 @@ class RscpModelInterface(ABC):
         of the implementing class. If not None is returned.
         """
 
+    def get_handled_tags(self) -> list[tuple[str, int | None]]:
+        """Returns the top level tags which are processed by handle_rscp_data.
+
+        Each entry is a tuple of the tag name and an index. For indexed containers
+        (e.g. TAG_WB_DATA) the index restricts the entry to containers with the
+        matching index child, None means all indexes. The pipeline uses this to
+        dispatch received values directly to their handler. Handlers returning an
+        empty list are offered every value which is not found in the index.
+        """
+        return []
+
     @abstractmethod
     def get_rscp_tags(self) -> list[RscpValue]:
         """Returns all tags used to get informations from device!
@@ -32,6 +45,27 @@ class RscpModelInterface(ABC):
         answer into handle_rscp_data where it is extracted.
         """
 
+    def get_rscp_tag_groups(self) -> dict[str, list[RscpValue]]:
+        """Returns the tags used to get informations from device, split into poll groups.
+
+        Each poll group (see POLL_GROUP_* in const.py) is polled with its own interval,
+        the pipeline merges the tags of all due groups into one request. By default
+        the tags of get_rscp_tags are polled on every update and the tags of
+        get_rscp_tags_slow with the slow interval.
+        """
+        return {
+            POLL_GROUP_POWER: self.get_rscp_tags(),
+            POLL_GROUP_SLOW: self.get_rscp_tags_slow() or [],
+        }
+
+    def get_rscp_tags_revision(self) -> int:
+        """Returns a number which changes whenever the requested tags change.
+
+        The pipeline packs the request only once and reuses it until the revision of
+        a handler changes. Handlers with a static tag list don't need to override this.
+        """
+        return 0
+
     @abstractmethod
     def get_rscp_tags_slow(self) -> list[RscpValue]:
         """This function is equivalent to the get_rscp_tags.
@@ -1,8 +1,10 @@
 """Data class to hold all data about a storage system."""
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+
+from .ChangeTrackingModel import ChangeTrackingModel
 
 
 @dataclass
-class SgReadyDataModel:
+class SgReadyDataModel(ChangeTrackingModel):
     state: int | None = None
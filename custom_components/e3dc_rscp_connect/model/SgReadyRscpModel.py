@@ -3,6 +3,7 @@
 import logging
 
 from rscp_lib.RscpValue import RscpValue
+from ..const import POLL_GROUP_STATE  # noqa: TID252
 from .RscpModelInterface import RscpModelInterface
 from .SgReadyDataModel import SgReadyDataModel
 
@@ -64,6 +65,14 @@ class SgReadyRscpModel(RscpModelInterface):
         """
         return []
 
+    def get_rscp_tag_groups(self) -> dict[str, list[RscpValue]]:
+        """The SG Ready state changes rarely, so it is polled with the state group."""
+        return {POLL_GROUP_STATE: self.get_rscp_tags()}
+
+    def get_handled_tags(self) -> list[tuple[str, int | None]]:
+        """Returns the top level tags which are processed by handle_rscp_data."""
+        return [("TAG_SGR_DATA", 0xFF)]
+
     def handle_rscp_data(self, container: RscpValue) -> bool:
         """This function is used to retrieve data from a rscp tag!"""
         if container.getTagName() != "TAG_SGR_DATA":
@@ -2,9 +2,11 @@
 
 from dataclasses import dataclass, field
 
+from .ChangeTrackingModel import ChangeTrackingModel
+
 
 @dataclass
-class EmsPowerModel:
+class EmsPowerModel(ChangeTrackingModel):
     "Holding power values delivered by EMS tags."
 
     home: int | None = None
@@ -17,16 +19,17 @@ class EmsPowerModel:
 
 
 @dataclass
-class DeviceState:
+class DeviceState(ChangeTrackingModel):
     "Data class to hold states of the storage devices."
 
-    connected: bool = False
-    working: bool = False
+    # None while unknown, e.g. after the device was dropped from the polls
+    connected: bool | None = False
+    working: bool | None = False
     in_service: bool = False
 
 
 @dataclass
-class DeviceStates:
+class DeviceStates(ChangeTrackingModel):
     "Class to hold informations about all device states of the storage!"
 
     battery: dict[int, DeviceState] = field(default_factory=dict)
@@ -35,14 +38,14 @@ class DeviceStates:
 
 
 @dataclass
-class PvInverterData:
+class PvInverterData(ChangeTrackingModel):
     "Class holds the power data of an inverter."
 
     power_mppt: dict[int, int | None] = field(default_factory=dict)
 
 
 @dataclass
-class StorageDataModel:
+class StorageDataModel(ChangeTrackingModel):
     "The dataclass holding the information."
 
     # identification data:
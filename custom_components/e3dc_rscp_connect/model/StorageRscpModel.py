@@ -1,12 +1,36 @@
 "This file contains StorageRscpModel. A class to communicate with a E3DC storage system."
 
-import logging
+import time
 
 from rscp_lib.RscpValue import RscpValue
+from ..const import POLL_GROUP_POWER, POLL_GROUP_STATE  # noqa: TID252
+from ..log import LazyRscpValue, RateLimitedLogger, get_logger  # noqa: TID252
 from .RscpModelInterface import RscpModelInterface
 from .StorageDataModel import PvInverterData, StorageDataModel, DeviceState
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+# indexes which are probed for inverters and batteries
+INVERTER_INDEXES = range(7)
+BATTERY_INDEXES = range(2)
+# seconds between two probes of the indexes which didn't answer
+DEVICE_PROBE_INTERVAL = 3600
+# consecutive error answers after which a polled index is dropped, a single
+# error may be a transient failure of the device
+DEVICE_DROP_ERRORS = 3
+
+# EMS power tags and the corresponding field in EmsPowerModel
+EMS_POWER_FIELDS = {
+    "TAG_EMS_POWER_HOME": "home",
+    "TAG_EMS_POWER_BAT": "battery",
+    "TAG_EMS_POWER_GRID": "grid",
+    "TAG_EMS_POWER_PV": "pv",
+    "TAG_EMS_POWER_ADD": "additional",
+    "TAG_EMS_POWER_WB_ALL": "wallbox",
+    "TAG_EMS_POWER_WB_SOLAR": "wallbox_pv",
+}
 
 
 class StorageRscpModel(RscpModelInterface):
@@ -26,22 +50,56 @@ class StorageRscpModel(RscpModelInterface):
             mac_addr=mac_addr,
             sw_version=sw_version,
         )
-        self.__pvi_identified = False
+        # indexes of the inverters and batteries which answered, only they are
+        # requested by the polls
+        self.__inverter_indexes: set[int] = set()
+        self.__battery_indexes: set[int] = set()
+        # consecutive error answers of the polled indexes, e.g. ("inverter", 1)
+        self.__device_errors: dict[tuple[str, int], int] = {}
+        # time.monotonic() of the next probe of the other indexes, the first
+        # poll probes all indexes
+        self.__next_probe = 0.0
+        self.__tags_revision = 0
+        # errors of missing devices are answered in every poll
+        self.__log = RateLimitedLogger(logger)
 
     def __eq__(self, other):
         "Comparing two StorageRscpModel instances."
         if not isinstance(other, StorageRscpModel):
             return NotImplemented
-        return self.ident_serial == other.ident_serial
+        # ident_serial is a class variable, it is the same for all instances
+        return self.__model.serial == other.get_model().serial
 
     def __hash__(self):
         "Hashing the serial for comparisation."
-        return hash(self.serial)
+        return hash(self.__model.serial)
 
     def get_model(self):
         "Returns the model data."
         return self.__model
 
+    def restore_devices(self, inverters: list[int], batteries: list[int]) -> None:
+        """Restores the inverter and battery indexes of an earlier identification.
+
+        The restored indexes are requested right away, the other indexes are
+        probed after DEVICE_PROBE_INTERVAL.
+        """
+        for index in inverters:
+            self.__model.inverters.setdefault(index, PvInverterData())
+        for index in batteries:
+            self.__model.device_states.battery.setdefault(index, DeviceState())
+        self.__inverter_indexes.update(inverters)
+        self.__battery_indexes.update(batteries)
+        self.__next_probe = time.monotonic() + DEVICE_PROBE_INTERVAL
+        self.__tags_revision += 1
+
+    def update_identification(self, other: "StorageRscpModel") -> None:
+        "Takes the identification data of other, which identifies the same storage."
+        model = other.get_model()
+        self.__model.assembly_serial = model.assembly_serial
+        self.__model.mac_addr = model.mac_addr
+        self.__model.sw_version = model.sw_version
+
     # this are helper class variables for identification, because the identifcation is not done in a container,
     # but with independent tags.
     ident_serial: str | None = None
@@ -104,11 +162,25 @@ class StorageRscpModel(RscpModelInterface):
             )
         return None
 
-    def __get_ident_tags_for_pvi(self):
-        _list = []
-        for index in range(7):
-            _list.extend(self.__create_rscp_tags_for_inverter(index))
-        return _list
+    def __take_probe(self) -> bool:
+        "Returns True if the indexes which didn't answer are requested now."
+        now = time.monotonic()
+        if now < self.__next_probe:
+            return False
+        self.__next_probe = now + DEVICE_PROBE_INTERVAL
+        # next time only the answering indexes are requested
+        self.__tags_revision += 1
+        return True
+
+    def __get_probe_tags(self) -> list[RscpValue]:
+        tags = []
+        for index in INVERTER_INDEXES:
+            if index not in self.__inverter_indexes:
+                tags.extend(self.__create_rscp_tags_for_inverter(index))
+        for index in BATTERY_INDEXES:
+            if index not in self.__battery_indexes:
+                tags.append(self.__create_rscp_tag_for_battery(index))
+        return tags
 
     def get_rscp_tags(self) -> list[RscpValue]:
         """Returns all tags used to get informations from device!
@@ -117,17 +189,49 @@ class StorageRscpModel(RscpModelInterface):
         answer into handle_rscp_data where it is extracted.
         """
         tags = []
-
-        tags.extend(self.__create_rscp_tags_for_ems())
-        if not self.__pvi_identified:
-            tags.extend(self.__get_ident_tags_for_pvi())
-            self.__pvi_identified = True
-        else:
-            for x in self.__model.inverters:
-                tags.extend(self.__create_rscp_tags_for_inverter(x))
-        tags.extend(self.__get_rscp_tags_for_battery())
+        for group_tags in self.get_rscp_tag_groups().values():
+            tags.extend(group_tags)
         return tags
 
+    def get_rscp_tag_groups(self) -> dict[str, list[RscpValue]]:
+        """Returns the tags used to get informations from device, split into poll groups."""
+        power_tags = self.__create_rscp_tags_for_ems()
+        for index in sorted(self.__inverter_indexes):
+            power_tags.extend(self.__create_rscp_tags_for_inverter(index))
+        if self.__take_probe():
+            # the power group is part of every poll
+            power_tags.extend(self.__get_probe_tags())
+
+        state_tags = [
+            RscpValue().withTagName("TAG_EMS_REQ_EMERGENCY_POWER_STATUS", None),
+            *[
+                self.__create_rscp_tag_for_battery(index)
+                for index in sorted(self.__battery_indexes)
+            ],
+        ]
+
+        return {POLL_GROUP_POWER: power_tags, POLL_GROUP_STATE: state_tags}
+
+    def get_handled_tags(self) -> list[tuple[str, int | None]]:
+        """Returns the top level tags which are processed by handle_rscp_data."""
+        return [
+            *[(tag, None) for tag in EMS_POWER_FIELDS],
+            ("TAG_EMS_BAT_SOC", None),
+            ("TAG_EMS_EMERGENCY_POWER_STATUS", None),
+            ("TAG_EMS_SET_POWER", None),
+            ("TAG_PVI_DATA", None),
+            ("TAG_BAT_DATA", None),
+        ]
+
+    def get_rscp_tags_revision(self) -> int:
+        """Returns a number which changes whenever the requested tags change.
+
+        Reading it doesn't change the tags, a due probe only changes the number
+        until the probe is taken in get_rscp_tag_groups.
+        """
+        probe_due = time.monotonic() >= self.__next_probe
+        return 2 * self.__tags_revision + int(probe_due)
+
     def get_rscp_tags_slow(self) -> list[RscpValue]:
         """This function is equivalent to the get_rscp_tags.
 
@@ -162,39 +266,25 @@ class StorageRscpModel(RscpModelInterface):
         requests.append(RscpValue().withTagName("TAG_EMS_REQ_POWER_WB_ALL", None))
         requests.append(RscpValue().withTagName("TAG_EMS_REQ_POWER_WB_SOLAR", None))
         requests.append(RscpValue().withTagName("TAG_EMS_REQ_BAT_SOC", None))
-        requests.append(
-            RscpValue().withTagName("TAG_EMS_REQ_EMERGENCY_POWER_STATUS", None)
-        )
         return requests
 
     def __handle_rcsp_tags_for_ems(self, value: RscpValue):
-        if value.getTagName() == "TAG_EMS_BAT_SOC":
-            self.__model.bat_soc = value.getValue()
-            return True
-        if value.getTagName() == "TAG_EMS_POWER_HOME":
-            self.__model.powers.home = value.getValue()
-            return True
-        if value.getTagName() == "TAG_EMS_POWER_BAT":
-            self.__model.powers.battery = value.getValue()
-            return True
-        if value.getTagName() == "TAG_EMS_POWER_GRID":
-            self.__model.powers.grid = value.getValue()
-            return True
-        if value.getTagName() == "TAG_EMS_POWER_PV":
-            self.__model.powers.pv = value.getValue()
-            return True
-        if value.getTagName() == "TAG_EMS_POWER_ADD":
-            self.__model.powers.additional = value.getValue()
-            return True
-        if value.getTagName() == "TAG_EMS_POWER_WB_ALL":
-            self.__model.powers.wallbox = value.getValue()
+        tag_name = value.getTagName()
+
+        power_field = EMS_POWER_FIELDS.get(tag_name)
+        if power_field is not None:
+            setattr(self.__model.powers, power_field, value.getValue())
             return True
-        if value.getTagName() == "TAG_EMS_POWER_WB_SOLAR":
-            self.__model.powers.wallbox_pv = value.getValue()
+        if tag_name == "TAG_EMS_BAT_SOC":
+            self.__model.bat_soc = value.getValue()
             return True
-        if value.getTagName() == "TAG_EMS_EMERGENCY_POWER_STATUS":
+        if tag_name == "TAG_EMS_EMERGENCY_POWER_STATUS":
             self.__model.emergency_power_state = value.getValue()
             return True
+        if tag_name == "TAG_EMS_SET_POWER":
+            # answer of a remote control setpoint sent along with the poll
+            logger.debug("Remote control setpoint answered: %s", LazyRscpValue(value))
+            return True
 
         return False
         # else:
@@ -235,21 +325,44 @@ class StorageRscpModel(RscpModelInterface):
 
         error = container.get_child("TAG_PVI_REQ_DATA")
         if error is not None:
-            logger.warning(
-                "No data for inverter: %d, errorcode: %d",
-                pvi_index,
-                error.getValue(),
-            )
+            if pvi_index in self.__inverter_indexes:
+                if self.__count_error("inverter", pvi_index):
+                    self.__inverter_indexes.discard(pvi_index)
+                    self.__tags_revision += 1
+                    self.__clear_inverter(pvi_index)
+                    logger.info(
+                        "No data for inverter: %d, errorcode: %d, only probing it from now on",
+                        pvi_index,
+                        error.getValue(),
+                    )
+                else:
+                    logger.debug(
+                        "No data for inverter: %d, errorcode: %d",
+                        pvi_index,
+                        error.getValue(),
+                    )
+            else:
+                logger.debug(
+                    "No inverter on index %d, errorcode: %d",
+                    pvi_index,
+                    error.getValue(),
+                )
             # even if we detected an error, means we handled this tag ;)
             return True
 
+        self.__device_errors.pop(("inverter", pvi_index), None)
+        if pvi_index not in self.__inverter_indexes:
+            self.__inverter_indexes.add(pvi_index)
+            self.__tags_revision += 1
+
         # get corresponding inverter model
         inverter = self.__model.inverters.get(pvi_index, None)
 
         if inverter is None:
             inverter = PvInverterData()
             self.__model.inverters[pvi_index] = inverter
-            logger.warning("Added inverter on index %d to storage", pvi_index)
+            self.__model.mark_changed(f"inverters.{pvi_index}")
+            logger.info("Added inverter on index %d to storage", pvi_index)
 
         dc_power_tags = container.get_childs("TAG_PVI_DC_POWER")
         for tag in dc_power_tags:
@@ -257,30 +370,48 @@ class StorageRscpModel(RscpModelInterface):
             if mppt_index is not None:
                 mppt_index = mppt_index.getValue()
                 power_value = tag.get_child("TAG_PVI_VALUE")
-                inverter.power_mppt[mppt_index] = (
-                    power_value.getValue() if power_value is not None else None
-                )
+                power = power_value.getValue() if power_value is not None else None
+                if inverter.power_mppt.get(mppt_index, _MISSING) != power:
+                    inverter.power_mppt[mppt_index] = power
+                    inverter.mark_changed(f"power_mppt.{mppt_index}")
+
+        return True
 
+    def __count_error(self, device: str, index: int) -> bool:
+        "Counts an error answer of a polled index, returns True if it is dropped."
+        key = (device, index)
+        errors = self.__device_errors.get(key, 0) + 1
+        if errors < DEVICE_DROP_ERRORS:
+            self.__device_errors[key] = errors
+            return False
+        del self.__device_errors[key]
         return True
 
-    def __get_rscp_tags_for_battery(self) -> list[RscpValue]:
-        value = RscpValue.construct_rscp_value(
+    def __clear_inverter(self, index: int) -> None:
+        "Sets the values of a dropped inverter to unknown."
+        inverter = self.__model.inverters.get(index)
+        if inverter is None:
+            return
+        for mppt_index, power in inverter.power_mppt.items():
+            if power is not None:
+                inverter.power_mppt[mppt_index] = None
+                inverter.mark_changed(f"power_mppt.{mppt_index}")
+
+    def __clear_battery(self, index: int) -> None:
+        "Sets the state of a dropped battery to unknown."
+        bat_state = self.__model.device_states.battery.get(index)
+        if bat_state is not None:
+            bat_state.connected = None
+            bat_state.working = None
+
+    def __create_rscp_tag_for_battery(self, index: int) -> RscpValue:
+        return RscpValue.construct_rscp_value(
             "TAG_BAT_REQ_DATA",
             [
-                ("TAG_BAT_INDEX", 0),
+                ("TAG_BAT_INDEX", index),
                 ("TAG_BAT_REQ_DEVICE_STATE", None),
             ],
         )
-        return [
-            value,
-            RscpValue.construct_rscp_value(
-                "TAG_BAT_REQ_DATA",
-                [
-                    ("TAG_BAT_INDEX", 1),
-                    ("TAG_BAT_REQ_DEVICE_STATE", None),
-                ],
-            ),
-        ]
 
     def __handle_rscp_tags_for_battery(self, container: RscpValue) -> bool:
         """hanlde all the rscp tags for the battery."""
@@ -293,30 +424,57 @@ class StorageRscpModel(RscpModelInterface):
 
             index = index.getValue()
             if not isinstance(index, int):
-                logger.warning("no index found in TAG_BAT_DATA, can't handle data")
+                self.__log.warning("no index found in TAG_BAT_DATA, can't handle data")
                 return False
 
             states = container.get_child("TAG_BAT_DEVICE_STATE")
             if states is None:
-                logger.warning(
+                self.__log.warning(
                     "no TAG_BAT_DEVICE_STATE found for bat %d",
                     index,
                 )
                 return False
+            if not states.is_container():
+                # the device answers an index without battery with an error
+                if index in self.__battery_indexes:
+                    if self.__count_error("battery", index):
+                        self.__battery_indexes.discard(index)
+                        self.__tags_revision += 1
+                        self.__clear_battery(index)
+                        logger.info(
+                            "No device state for bat %d, errorcode: %d, only probing it from now on",
+                            index,
+                            states.getValue(),
+                        )
+                    else:
+                        logger.debug(
+                            "No device state for bat %d, errorcode: %d",
+                            index,
+                            states.getValue(),
+                        )
+                else:
+                    logger.debug("No battery on index %d", index)
+                return True
             connected = states.get_child("TAG_BAT_DEVICE_CONNECTED")
             working = states.get_child("TAG_BAT_DEVICE_WORKING")
 
             if connected is None or working is None:
-                logger.warning(
+                self.__log.warning(
                     "CONNECTED or WORKING was not received in BAT_DEVICE_STATE for bat %d",
                     index,
                 )
                 return False
 
+            self.__device_errors.pop(("battery", index), None)
+            if index not in self.__battery_indexes:
+                self.__battery_indexes.add(index)
+                self.__tags_revision += 1
+
             bat_state = self.__model.device_states.battery.get(index)
             if bat_state is None:
                 bat_state = DeviceState()
                 self.__model.device_states.battery[index] = bat_state
+                self.__model.device_states.mark_changed(f"battery.{index}")
 
             connected = connected.getValue()
 
@@ -329,12 +487,12 @@ class StorageRscpModel(RscpModelInterface):
 
         return False
 
-    async def send_battery_remote_control(self, power_w: int, send_and_receive):
-        """Sends a battery remote control power setpoint via TAG_EMS_REQ_SET_POWER.
+    @staticmethod
+    def create_remote_control_request(power_w: int) -> RscpValue:
+        """Creates a battery remote control power setpoint request.
 
         Positive values charge the battery, negative values discharge it.
         0 values stop the battery charging and discharging!
-
         """
         if power_w >= 0:  # charge the battery
             power_mode = 3
@@ -342,14 +500,22 @@ class StorageRscpModel(RscpModelInterface):
             power_mode = 2
             power_w *= -1
 
-        request = RscpValue.construct_rscp_value(
+        return RscpValue.construct_rscp_value(
             "TAG_EMS_REQ_SET_POWER",
             [
                 ("TAG_EMS_REQ_SET_POWER_MODE", power_mode),
                 ("TAG_EMS_REQ_SET_POWER_VALUE", power_w),
             ],
         )
-        await send_and_receive([request])
+
+    async def send_battery_remote_control(self, power_w: int, send_and_receive):
+        """Sends a battery remote control power setpoint via TAG_EMS_REQ_SET_POWER.
+
+        Positive values charge the battery, negative values discharge it.
+        0 values stop the battery charging and discharging!
+
+        """
+        await send_and_receive([self.create_remote_control_request(power_w)])
 
     async def disable_remote_control(self, send_and_receive):
         """Sends a remote control mode AUTO command to the storage.
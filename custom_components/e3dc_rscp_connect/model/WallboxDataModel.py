@@ -2,17 +2,20 @@
 
 from dataclasses import dataclass, field
 
+from .ChangeTrackingModel import ChangeTrackingModel
+
 
 @dataclass
-class WallboxCurrentModel:
-    upper_limit: int = 0
-    lower_limit: int = 0
-    max: int = 0
-    min: int = 0
+class WallboxCurrentModel(ChangeTrackingModel):
+    # None while unknown, e.g. after an error answer of the device
+    upper_limit: int | None = 0
+    lower_limit: int | None = 0
+    max: int | None = 0
+    min: int | None = 0
 
 
 @dataclass
-class WallboxDataModel:
+class WallboxDataModel(ChangeTrackingModel):
     "WallboxDataModel represents a wallbox."
 
     index: int
@@ -27,11 +30,3 @@ class WallboxDataModel:
     serial: str | None = None
     device_name: str | None = None
     firmware_version: str | None = None
-
-    def reset_state_data(self):
-        "Resets only the state data, the device identification data stays."
-        self.cp_state = None
-        self.assigned_power = None
-        self.power = None
-        self.available_solar_power = None
-        self.sun_mode = None
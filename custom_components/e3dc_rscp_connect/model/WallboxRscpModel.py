@@ -1,12 +1,32 @@
 "This file contains WallboxRscpModel. A class to communicate with the wallboxes through RSCP over an storage system."
 
-import logging
+from collections.abc import Iterable
 
 from rscp_lib.RscpValue import RscpValue
+from ..const import POLL_GROUP_POWER, POLL_GROUP_SLOW, POLL_GROUP_STATE  # noqa: TID252
+from ..log import LazyRscpValue, get_logger  # noqa: TID252
 from .RscpModelInterface import RscpModelInterface
 from .WallboxDataModel import WallboxDataModel
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# indexes a wallbox can be connected to
+WALLBOX_INDEXES = range(7)
+
+# the model field of each polled value, reset to unknown if its request is
+# answered with an error
+ERROR_VALUE_FIELDS = {
+    "TAG_WB_REQ_CP_STATE": "cp_state",
+    "TAG_WB_REQ_ASSIGNED_POWER": "assigned_power",
+    "TAG_WB_REQ_PM_POWER_L1": "power",
+    "TAG_WB_REQ_PM_POWER_L2": "power",
+    "TAG_WB_REQ_PM_POWER_L3": "power",
+    "TAG_WB_REQ_SUN_MODE_ACTIVE": "sun_mode",
+    "TAG_WB_REQ_MAX_CHARGE_CURRENT": "currents.max",
+    "TAG_WB_REQ_MIN_CHARGE_CURRENT": "currents.min",
+    "TAG_WB_REQ_UPPER_CURRENT_LIMIT": "currents.upper_limit",
+    "TAG_WB_REQ_LOWER_CURRENT_LIMIT": "currents.lower_limit",
+}
 
 
 class WallboxRscpModel(RscpModelInterface):
@@ -40,6 +60,12 @@ class WallboxRscpModel(RscpModelInterface):
         "Returns the data model."
         return self.__model
 
+    def update_identification(self, other: "WallboxRscpModel") -> None:
+        "Takes the identification data of other, which identifies the same wallbox."
+        model = other.get_model()
+        self.__model.device_name = model.device_name
+        self.__model.firmware_version = model.firmware_version
+
     @property
     def index(self) -> int:
         return self.__index
@@ -51,8 +77,10 @@ class WallboxRscpModel(RscpModelInterface):
         return self.__model.serial
 
     @staticmethod
-    def get_identification_tags() -> list[RscpValue]:
-        """Returns a list of RscpTags to identify wallboxes!"""
+    def get_identification_tags(
+        indexes: Iterable[int] = WALLBOX_INDEXES,
+    ) -> list[RscpValue]:
+        """Returns a list of RscpTags to identify the wallboxes on indexes!"""
         return [
             RscpValue.construct_rscp_value(
                 "TAG_WB_REQ_DATA",
@@ -63,7 +91,7 @@ class WallboxRscpModel(RscpModelInterface):
                     ("TAG_WB_REQ_FIRMWARE_VERSION", None),
                 ],
             )
-            for index in range(7)
+            for index in indexes
         ]
 
     @staticmethod
@@ -89,32 +117,63 @@ class WallboxRscpModel(RscpModelInterface):
 
     def get_rscp_tags(self) -> list[RscpValue]:
         "Returns all tags used to get informations from device!"
-        return [
-            RscpValue.construct_rscp_value(
-                "TAG_WB_REQ_DATA",
-                [
-                    ("TAG_WB_INDEX", self.__index),
-                    ("TAG_WB_REQ_CP_STATE", None),
-                    ("TAG_WB_REQ_PARAMETER_LIST", 0),
-                    ("TAG_WB_REQ_PARAMETER_LIST", 1),
-                    ("TAG_WB_REQ_ACTIVE_CHARGE_STRATEGY", None),
-                    ("TAG_WB_REQ_ASSIGNED_POWER", None),
-                    ("TAG_WB_REQ_PM_POWER_L1", None),
-                    ("TAG_WB_REQ_PM_POWER_L2", None),
-                    ("TAG_WB_REQ_PM_POWER_L3", None),
-                    ("TAG_WB_REQ_DEVICE_STATE", None),
-                    ("TAG_WB_REQ_SUN_MODE_ACTIVE", None),
-                    ("TAG_WB_REQ_UPPER_CURRENT_LIMIT", None),
-                    ("TAG_WB_REQ_LOWER_CURRENT_LIMIT", None),
-                    ("TAG_WB_REQ_MAX_CHARGE_CURRENT", None),
-                    ("TAG_WB_REQ_MIN_CHARGE_CURRENT", None),
-                ],
-            )
-        ]
+        tags = []
+        for group_tags in self.get_rscp_tag_groups().values():
+            tags.extend(group_tags)
+        return tags
+
+    def __create_request(self, requests: list[tuple]) -> RscpValue:
+        return RscpValue.construct_rscp_value(
+            "TAG_WB_REQ_DATA", [("TAG_WB_INDEX", self.__index), *requests]
+        )
+
+    def get_rscp_tag_groups(self) -> dict[str, list[RscpValue]]:
+        """Returns the tags used to get informations from device, split into poll groups.
+
+        Each group is requested in its own TAG_WB_REQ_DATA container.
+        """
+        return {
+            POLL_GROUP_POWER: [
+                self.__create_request(
+                    [
+                        ("TAG_WB_REQ_CP_STATE", None),
+                        ("TAG_WB_REQ_ASSIGNED_POWER", None),
+                        ("TAG_WB_REQ_PM_POWER_L1", None),
+                        ("TAG_WB_REQ_PM_POWER_L2", None),
+                        ("TAG_WB_REQ_PM_POWER_L3", None),
+                    ]
+                )
+            ],
+            POLL_GROUP_STATE: [
+                self.__create_request(
+                    [
+                        ("TAG_WB_REQ_DEVICE_STATE", None),
+                        ("TAG_WB_REQ_SUN_MODE_ACTIVE", None),
+                        ("TAG_WB_REQ_MAX_CHARGE_CURRENT", None),
+                        ("TAG_WB_REQ_MIN_CHARGE_CURRENT", None),
+                    ]
+                )
+            ],
+            POLL_GROUP_SLOW: [
+                self.__create_request(
+                    [
+                        ("TAG_WB_REQ_PARAMETER_LIST", 0),
+                        ("TAG_WB_REQ_PARAMETER_LIST", 1),
+                        ("TAG_WB_REQ_ACTIVE_CHARGE_STRATEGY", None),
+                        ("TAG_WB_REQ_UPPER_CURRENT_LIMIT", None),
+                        ("TAG_WB_REQ_LOWER_CURRENT_LIMIT", None),
+                    ]
+                )
+            ],
+        }
 
     def get_rscp_tags_slow(self):
         pass
 
+    def get_handled_tags(self) -> list[tuple[str, int | None]]:
+        "Returns the top level tags which are processed by handle_rscp_data."
+        return [("TAG_WB_DATA", self.__index)]
+
     # def __extract_wallbox_data(self, container: RscpValue):
     def handle_rscp_data(self, container: RscpValue) -> bool:
         "This function is used to retrieve data from a rscp tag!"
@@ -135,14 +194,11 @@ class WallboxRscpModel(RscpModelInterface):
         if wb_index != self.__index:
             return False
 
-        self.__model.reset_state_data()
-
+        # the poll groups are requested in separate containers, so only the
+        # values contained in this container are updated
         value = container.get_child("TAG_WB_CP_STATE")
-        if value is None:
-            logger.warning("CP State value is None for wb_index: %d", wb_index)
-            self.__model.cp_state = None
-        else:
-            logger.debug("CP State: %s", value.toString())
+        if value is not None:
+            logger.debug("CP State: %s", LazyRscpValue(value))
             self.__model.cp_state = str(value.getValue())
 
         assigned_power_container = container.get_child("TAG_WB_ASSIGNED_POWER")
@@ -151,7 +207,8 @@ class WallboxRscpModel(RscpModelInterface):
                 x.getValue() for x in assigned_power_container.getValue()
             )
 
-        self.__model.power = self.__extract_power_from_wb_data(container)
+        if container.has_child_tag("TAG_WB_PM_POWER_L1"):
+            self.__model.power = self.__extract_power_from_wb_data(container)
 
         # power_container = container.get_child("TAG_WB_REQ_AVAILABLE_SOLAR_POWER")
         # if power_container:
@@ -161,37 +218,58 @@ class WallboxRscpModel(RscpModelInterface):
         #     )
 
         value = container.get_child("TAG_WB_SUN_MODE_ACTIVE")
-        self.__model.sun_mode = value.getValue() if value is not None else None
+        if value is not None:
+            self.__model.sun_mode = value.getValue()
 
         value = container.get_child("TAG_WB_UPPER_CURRENT_LIMIT")
-        self.__model.currents.upper_limit = value.getValue() if value is not None else 0
+        if value is not None:
+            self.__model.currents.upper_limit = value.getValue()
 
         value = container.get_child("TAG_WB_LOWER_CURRENT_LIMIT")
-        self.__model.currents.lower_limit = value.getValue() if value is not None else 0
+        if value is not None:
+            self.__model.currents.lower_limit = value.getValue()
 
         value = container.get_child("TAG_WB_MAX_CHARGE_CURRENT")
-        self.__model.currents.max = value.getValue() if value is not None else 0
+        if value is not None:
+            self.__model.currents.max = value.getValue()
 
         value = container.get_child("TAG_WB_MIN_CHARGE_CURRENT")
-        self.__model.currents.min = value.getValue() if value is not None else 0
+        if value is not None:
+            self.__model.currents.min = value.getValue()
+
+        self.__reset_error_values(container)
 
         return True
 
+    def __reset_error_values(self, container: RscpValue) -> None:
+        "Sets the values whose request was answered with an error to unknown."
+        # the device answers a failed request with an error value under the
+        # request tag instead of the response tag
+        for request_tag, field in ERROR_VALUE_FIELDS.items():
+            if not container.has_child_tag(request_tag):
+                continue
+            logger.debug("Error answer for %s of wallbox %d", request_tag, self.__index)
+            target = self.__model
+            *path, name = field.split(".")
+            for attribute in path:
+                target = getattr(target, attribute)
+            setattr(target, name, None)
+
     def __extract_power_from_wb_data(self, wb_data: RscpValue) -> int:
         power_total = 0
         power_l1 = wb_data.get_child("TAG_WB_PM_POWER_L1")
         if power_l1:
-            logger.debug("WB POWER L1: %s", power_l1.toString())
+            logger.debug("WB POWER L1: %s", LazyRscpValue(power_l1))
             power_total += power_l1.getValue()
 
         power_l2 = wb_data.get_child("TAG_WB_PM_POWER_L3")
         if power_l2:
-            logger.debug("WB POWER L2: %s", power_l2.toString())
+            logger.debug("WB POWER L2: %s", LazyRscpValue(power_l2))
             power_total += power_l2.getValue()
 
         power_l3 = wb_data.get_child("TAG_WB_PM_POWER_L3")
         if power_l3:
-            logger.debug("WB POWER: L3: %s", power_l3.toString())
+            logger.debug("WB POWER: L3: %s", LazyRscpValue(power_l3))
             power_total += power_l3.getValue()
 
         return power_total
@@ -203,22 +281,28 @@ class WallboxRscpModel(RscpModelInterface):
             "TAG_WB_REQ_DATA",
             [("TAG_WB_INDEX", self.__index), ("TAG_WB_REQ_SET_SUN_MODE_ACTIVE", value)],
         )
-        await send_and_receive(request)
+        await send_and_receive([request])
 
     async def set_max_charge_current_request(self, value: int, send_and_receive):
         """Sends a set max charge current request to the wallbox."""
 
         request = RscpValue.construct_rscp_value(
             "TAG_WB_REQ_DATA",
-            [("TAG_WB_INDEX", self.__index), ("TAG_WB_REQ_SET_MAX_CHARGE_CURRENT", value)],
+            [
+                ("TAG_WB_INDEX", self.__index),
+                ("TAG_WB_REQ_SET_MAX_CHARGE_CURRENT", value),
+            ],
         )
-        await send_and_receive(request)
+        await send_and_receive([request])
 
     async def set_min_charge_current_request(self, value: int, send_and_receive):
         """Sends a set min charge current request to the wallbox."""
 
         request = RscpValue.construct_rscp_value(
             "TAG_WB_REQ_DATA",
-            [("TAG_WB_INDEX", self.__index), ("TAG_WB_REQ_SET_MIN_CHARGE_CURRENT", value)],
+            [
+                ("TAG_WB_INDEX", self.__index),
+                ("TAG_WB_REQ_SET_MIN_CHARGE_CURRENT", value),
+            ],
         )
-        await send_and_receive(request)
+        await send_and_receive([request])
@@ -5,7 +5,12 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import const
 from .coordinator import E3dcRscpCoordinator
-from .entities import BatteryRemotePowerNumber, WallboxMaxCurrentNumber, WallboxMinCurrentNumber
+from .entities import (
+    BatteryRemotePowerNumber,
+    WallboxMaxCurrentNumber,
+    WallboxMinCurrentNumber,
+    with_entry_unique_ids,
+)
 
 DOMAIN = const.DOMAIN
 
@@ -33,4 +38,4 @@ async def async_setup_entry(
         ],
     ]
 
-    async_add_entities(numbers)
+    async_add_entities(with_entry_unique_ids(coordinator, numbers))
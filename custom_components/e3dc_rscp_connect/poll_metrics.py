@@ -0,0 +1,191 @@
+"Timing and size metrics of the polls, kept in rolling histograms."
+
+from collections import deque
+from dataclasses import asdict, dataclass
+import math
+import statistics
+
+# number of polls the rolling histograms are calculated from
+METRICS_WINDOW = 100
+
+# upper bounds of the histogram buckets, the last bucket holds everything above
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536)
+COUNT_BUCKETS = (0, 1, 10, 50, 100, 500)
+
+
+class RollingHistogram:
+    """Distribution of the last window samples of a metric.
+
+    The count of all samples is kept, the other statistics are calculated from
+    the samples in the window only.
+    """
+
+    def __init__(
+        self, buckets: tuple[float, ...], window: int = METRICS_WINDOW
+    ) -> None:
+        "Inits an empty histogram with the given bucket upper bounds."
+        self.__buckets = buckets
+        self.__samples: deque[float] = deque(maxlen=window)
+        self.__count = 0
+
+    @property
+    def count(self) -> int:
+        "Returns the number of all samples ever added."
+        return self.__count
+
+    @property
+    def last(self) -> float | None:
+        "Returns the latest sample."
+        return self.__samples[-1] if self.__samples else None
+
+    def add(self, value: float) -> None:
+        "Adds a sample, the oldest one drops out of the window."
+        self.__samples.append(value)
+        self.__count += 1
+
+    def percentile(self, percent: float) -> float | None:
+        "Returns the percentile of the samples in the window (nearest rank)."
+        if not self.__samples:
+            return None
+        ordered = sorted(self.__samples)
+        rank = max(1, math.ceil(percent / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def buckets(self) -> dict[str, int]:
+        "Returns the number of samples in the window per bucket."
+        counts = dict.fromkeys([f"le_{x:g}" for x in self.__buckets] + ["inf"], 0)
+        for value in self.__samples:
+            for bound in self.__buckets:
+                if value <= bound:
+                    counts[f"le_{bound:g}"] += 1
+                    break
+            else:
+                counts["inf"] += 1
+        return counts
+
+    def as_dict(self) -> dict:
+        "Returns the statistics as dict, e.g. for diagnostics."
+        samples = self.__samples
+        return {
+            "count": self.__count,
+            "last": self.last,
+            "min": min(samples, default=None),
+            "max": max(samples, default=None),
+            "mean": statistics.fmean(samples) if samples else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": self.buckets(),
+        }
+
+
+@dataclass
+class PollSample:
+    """Metrics of a single poll, times in seconds and sizes in bytes.
+
+    In pipelined mode data read by a request for an earlier request is counted
+    for the request which read it.
+    """
+
+    # waiting for the connection, see RscpRequestQueue
+    queue_wait: float = 0.0
+    # encrypting and writing the request frames
+    encrypt: float = 0.0
+    # waiting for data from the device, the round trip and the transfer
+    network: float = 0.0
+    # decrypting and splitting the received data into frames
+    decrypt: float = 0.0
+    # unpacking the values of the response frames
+    decode: float = 0.0
+    # handing the values to the device models
+    dispatch: float = 0.0
+    total: float = 0.0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    request_tags: int = 0
+    response_tags: int = 0
+    unhandled_tags: int = 0
+    frames: int = 0
+
+
+DURATION_METRICS = (
+    "queue_wait",
+    "encrypt",
+    "network",
+    "decrypt",
+    "decode",
+    "dispatch",
+    "fan_out",
+    "lateness",
+    "total",
+)
+SIZE_METRICS = ("request_bytes", "response_bytes")
+COUNT_METRICS = (
+    "request_tags",
+    "response_tags",
+    "unhandled_tags",
+    "frames",
+    "entity_updates",
+)
+
+
+class PollMetrics:
+    """Rolling histograms of the metrics of the successful polls.
+
+    fan_out is the time the entities need to write their states after a poll,
+    entity_updates the number of entities notified and lateness the delay of
+    a scheduled poll, they are added by the coordinator.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        "Inits empty histograms."
+        self.__histograms = {
+            **{
+                name: RollingHistogram(DURATION_BUCKETS, window)
+                for name in DURATION_METRICS
+            },
+            **{name: RollingHistogram(SIZE_BUCKETS, window) for name in SIZE_METRICS},
+            **{name: RollingHistogram(COUNT_BUCKETS, window) for name in COUNT_METRICS},
+        }
+        self.__failed = 0
+
+    @property
+    def polls(self) -> int:
+        "Returns the number of successful polls."
+        return self.__histograms["total"].count
+
+    @property
+    def failed(self) -> int:
+        "Returns the number of failed polls."
+        return self.__failed
+
+    def __getitem__(self, name: str) -> RollingHistogram:
+        "Returns the histogram of a metric."
+        return self.__histograms[name]
+
+    def record(self, sample: PollSample) -> None:
+        "Adds the metrics of a successful poll."
+        for name, value in asdict(sample).items():
+            self.__histograms[name].add(value)
+
+    def record_failure(self) -> None:
+        "Counts a failed poll."
+        self.__failed += 1
+
+    def record_fan_out(self, duration: float, entity_updates: int) -> None:
+        "Adds the time the entities needed to write their states."
+        self.__histograms["fan_out"].add(duration)
+        self.__histograms["entity_updates"].add(entity_updates)
+
+    def record_lateness(self, lateness: float) -> None:
+        "Adds the seconds a scheduled poll started after its due time."
+        self.__histograms["lateness"].add(lateness)
+
+    def as_dict(self) -> dict:
+        "Returns all metrics as dict, e.g. for diagnostics."
+        return {
+            "polls": self.polls,
+            "failed": self.failed,
+            **{name: x.as_dict() for name, x in self.__histograms.items()},
+        }
@@ -0,0 +1,180 @@
+"Priority queue which decides which request may use the connection next."
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+import heapq
+import itertools
+import time
+from .log import get_logger
+
+_LOGGER = get_logger(__name__)
+
+
+class RequestPriority(IntEnum):
+    "Priority classes of requests, lower values are served first."
+
+    CONTROL = 0
+    POLL = 1
+    IDENTIFICATION = 2
+
+
+class RscpRequestExpiredException(TimeoutError):
+    "Raised if a request couldn't be sent before its deadline."
+
+
+class RscpRequestSupersededException(Exception):
+    "Raised if a queued request was replaced by a newer request with the same key."
+
+
+@dataclass
+class QueueDelayStats:
+    "Time requests of one priority class waited for the connection, in seconds."
+
+    count: int = 0
+    last: float = 0.0
+    max: float = 0.0
+    total: float = 0.0
+    expired: int = 0
+    superseded: int = 0
+
+    @property
+    def mean(self) -> float:
+        "Returns the mean queueing delay."
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, delay: float) -> None:
+        "Adds the queueing delay of a request which got the connection."
+        self.count += 1
+        self.last = delay
+        self.max = max(self.max, delay)
+        self.total += delay
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    future: asyncio.Future = field(compare=False)
+    enqueued: float = field(compare=False)
+    key: str | None = field(compare=False, default=None)
+
+
+class RscpRequestQueue:
+    """Grants the connection to one request at a time.
+
+    Waiting requests are served by priority and in FIFO order within a
+    priority class. A request may have a deadline, it fails if it didn't get
+    the connection in time. A request with a key replaces a waiting request
+    with the same key, e.g. a newer poll replaces a stale one.
+    """
+
+    def __init__(self) -> None:
+        "Inits an idle queue."
+        self.__busy = False
+        self.__waiters: list[_Waiter] = []
+        self.__sequence = itertools.count()
+        self.__stats = {priority: QueueDelayStats() for priority in RequestPriority}
+
+    @property
+    def stats(self) -> dict[RequestPriority, QueueDelayStats]:
+        "Returns the queueing delay statistics per priority class."
+        return self.__stats
+
+    @property
+    def waiting(self) -> int:
+        "Returns the number of requests waiting for the connection."
+        return sum(1 for waiter in self.__waiters if not waiter.future.done())
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: RequestPriority,
+        deadline: float | None = None,
+        key: str | None = None,
+    ) -> AsyncIterator[None]:
+        "Holds the connection while the context is active, see acquire()."
+        await self.acquire(priority, deadline, key)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(
+        self,
+        priority: RequestPriority,
+        deadline: float | None = None,
+        key: str | None = None,
+    ) -> None:
+        """Waits until the request may use the connection.
+
+        deadline is a time.monotonic() timestamp. Raises
+        RscpRequestExpiredException if the deadline passed before, or
+        RscpRequestSupersededException if a newer request with the same key
+        has been queued meanwhile.
+        """
+        if not self.__busy and self.waiting == 0:
+            self.__busy = True
+            self.__stats[priority].add(0.0)
+            return
+
+        if key is not None:
+            self.__supersede(key)
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            priority, next(self.__sequence), loop.create_future(), time.monotonic(), key
+        )
+        heapq.heappush(self.__waiters, waiter)
+
+        timer = None
+        if deadline is not None:
+            timer = loop.call_later(
+                max(0.0, deadline - time.monotonic()), self.__expire, waiter
+            )
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # the connection was granted right before the cancellation
+                self.release()
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def release(self) -> None:
+        "Hands the connection to the next waiting request."
+        while self.__waiters:
+            waiter = heapq.heappop(self.__waiters)
+            if waiter.future.done():
+                continue
+            self.__stats[waiter.priority].add(time.monotonic() - waiter.enqueued)
+            waiter.future.set_result(None)
+            return
+        self.__busy = False
+
+    def __expire(self, waiter: _Waiter) -> None:
+        if waiter.future.done():
+            return
+        self.__stats[waiter.priority].expired += 1
+        _LOGGER.debug(
+            "%s request expired after %.3f seconds in queue",
+            waiter.priority.name,
+            time.monotonic() - waiter.enqueued,
+        )
+        waiter.future.set_exception(
+            RscpRequestExpiredException("Request not sent before its deadline!")
+        )
+
+    def __supersede(self, key: str) -> None:
+        for waiter in self.__waiters:
+            if waiter.key == key and not waiter.future.done():
+                self.__stats[waiter.priority].superseded += 1
+                waiter.future.set_exception(
+                    RscpRequestSupersededException(
+                        f"Replaced by a newer {key} request!"
+                    )
+                )
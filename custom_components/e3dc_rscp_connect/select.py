@@ -2,7 +2,7 @@ from homeassistant.core import HomeAssistant
 
 from . import const
 from .coordinator import E3dcRscpCoordinator
-from .entities import SunModeSensor
+from .entities import SunModeSensor, with_entry_unique_ids
 
 DOMAIN = const.DOMAIN
 
@@ -24,4 +24,4 @@ async def async_setup_entry(
         ],
     ]
 
-    async_add_entities(selects)
+    async_add_entities(with_entry_unique_ids(coordinator, selects))
@@ -1,7 +1,7 @@
 "Sensors of the E3DC rscp connect integration."
 
-import logging
-
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import UnitOfInformation, UnitOfTime
 from homeassistant.core import HomeAssistant
 
 # from homeassistant.helpers
@@ -13,15 +13,18 @@ from .entities import (
     DeviceUpdateStateSensor,
     EmergencyPowerSensor,
     EnergySensor,
+    PollMetricSensor,
     PowerSensor,
     SGReadySensor,
     StateOfChargeSensor,
     WallboxPowerSensor,
+    with_entry_unique_ids,
 )
+from .log import get_logger
 from .model.StorageDataModel import DeviceState
 
 DOMAIN = const.DOMAIN
-_LOGGER = logging.getLogger(__name__)
+_LOGGER = get_logger(__name__)
 
 
 def get_inverter_mppt_power(
@@ -49,13 +52,10 @@ async def async_setup_entry(
             config_entry,
             "Home Power",
             data_getter=lambda: coordinator.storage.powers.home,
+            data_field="storage.powers.home",
+            write_filter=coordinator.create_power_write_filter("Home Power"),
         ),
-        EnergySensor(
-            coordinator,
-            config_entry,
-            "Home Consumption",
-            data_getter=lambda: coordinator.storage.powers.home,
-        ),
+        EnergySensor(coordinator, config_entry, "Home Consumption", "home_consumption"),
         #
         # grid sensors
         PowerSensor(
@@ -63,19 +63,14 @@ async def async_setup_entry(
             config_entry,
             "Grid Power",
             data_getter=lambda: coordinator.storage.powers.grid,
+            data_field="storage.powers.grid",
+            write_filter=coordinator.create_power_write_filter("Grid Power"),
         ),
         EnergySensor(
-            coordinator,
-            config_entry,
-            "Grid Consumption Energy",
-            data_getter=lambda: coordinator.storage.powers.grid,
+            coordinator, config_entry, "Grid Consumption Energy", "grid_consumption"
         ),
         EnergySensor(
-            coordinator,
-            config_entry,
-            "Grid Production Energy",
-            data_getter=lambda: coordinator.storage.powers.grid,
-            negative_direction=True,
+            coordinator, config_entry, "Grid Production Energy", "grid_production"
         ),
         #
         # battery sensors
@@ -84,19 +79,14 @@ async def async_setup_entry(
             config_entry,
             "Battery Power",
             data_getter=lambda: coordinator.storage.powers.battery,
+            data_field="storage.powers.battery",
+            write_filter=coordinator.create_power_write_filter("Battery Power"),
         ),
         EnergySensor(
-            coordinator,
-            config_entry,
-            "Battery Charge Energy",
-            data_getter=lambda: coordinator.storage.powers.battery,
+            coordinator, config_entry, "Battery Charge Energy", "battery_charge"
         ),
         EnergySensor(
-            coordinator,
-            config_entry,
-            "Battery Discharge Energy",
-            data_getter=lambda: coordinator.storage.powers.battery,
-            negative_direction=True,
+            coordinator, config_entry, "Battery Discharge Energy", "battery_discharge"
         ),
         #
         # PV sensors
@@ -105,12 +95,11 @@ async def async_setup_entry(
             config_entry,
             "PV Power",
             data_getter=lambda: coordinator.storage.powers.pv,
+            data_field="storage.powers.pv",
+            write_filter=coordinator.create_power_write_filter("PV Power"),
         ),
         EnergySensor(
-            coordinator,
-            config_entry,
-            "PV Production Energy",
-            data_getter=lambda: coordinator.storage.powers.pv,
+            coordinator, config_entry, "PV Production Energy", "pv_production"
         ),
         #
         # Additional generators
@@ -119,12 +108,14 @@ async def async_setup_entry(
             config_entry,
             "Additional Power",
             data_getter=lambda: coordinator.storage.powers.additional,
+            data_field="storage.powers.additional",
+            write_filter=coordinator.create_power_write_filter("Additional Power"),
         ),
         EnergySensor(
             coordinator,
             config_entry,
             "Additional Production Energy",
-            data_getter=lambda: coordinator.storage.powers.additional,
+            "additional_production",
         ),
         #
         # Wallbox sensors (EMS)
@@ -133,30 +124,30 @@ async def async_setup_entry(
             config_entry,
             "Wallbox Power",
             data_getter=lambda: coordinator.storage.powers.wallbox,
+            data_field="storage.powers.wallbox",
+            write_filter=coordinator.create_power_write_filter("Wallbox Power"),
         ),
         EnergySensor(
-            coordinator,
-            config_entry,
-            "Wallbox Charge Energy",
-            data_getter=lambda: coordinator.storage.powers.wallbox,
+            coordinator, config_entry, "Wallbox Charge Energy", "wallbox_charge"
         ),
         PowerSensor(
             coordinator,
             config_entry,
             "Wallbox PV Power",
             data_getter=lambda: coordinator.storage.powers.wallbox_pv,
+            data_field="storage.powers.wallbox_pv",
+            write_filter=coordinator.create_power_write_filter("Wallbox PV Power"),
         ),
         EnergySensor(
-            coordinator,
-            config_entry,
-            "Wallbox Sun Charge Energy",
-            data_getter=lambda: coordinator.storage.powers.wallbox_pv,
+            coordinator, config_entry, "Wallbox Sun Charge Energy", "wallbox_sun_charge"
         ),
         PowerSensor(
             coordinator,
             config_entry,
             "PV String 1",
             data_getter=lambda: get_inverter_mppt_power(coordinator, 0, 0),
+            data_field="storage.inverters.0.power_mppt.0",
+            write_filter=coordinator.create_power_write_filter("PV String 1"),
             # sensor_value_id="pvi_0_mppt_0_power",
         ),
         PowerSensor(
@@ -164,6 +155,8 @@ async def async_setup_entry(
             config_entry,
             "PV String 2",
             data_getter=lambda: get_inverter_mppt_power(coordinator, 0, 1),
+            data_field="storage.inverters.0.power_mppt.1",
+            write_filter=coordinator.create_power_write_filter("PV String 2"),
             # sensor_value_id="pvi_0_mppt_1_power",
         ),
         PowerSensor(
@@ -171,6 +164,8 @@ async def async_setup_entry(
             config_entry,
             "PV String 3",
             data_getter=lambda: get_inverter_mppt_power(coordinator, 0, 2),
+            data_field="storage.inverters.0.power_mppt.2",
+            write_filter=coordinator.create_power_write_filter("PV String 3"),
             # sensor_value_id="pvi_0_mppt_2_power",
         ),
         EmergencyPowerSensor(coordinator, config_entry),
@@ -215,6 +210,7 @@ async def async_setup_entry(
                 "Assigned power",
                 wallbox.index,
                 lambda wallbox=wallbox: wallbox.assigned_power,
+                f"wallboxes.{wallbox.index}.assigned_power",
             )
             for wallbox in coordinator.wallboxes
         ],
@@ -225,9 +221,78 @@ async def async_setup_entry(
                 "Current power",
                 wallbox.index,
                 lambda wallbox=wallbox: wallbox.power,
+                f"wallboxes.{wallbox.index}.power",
             )
             for wallbox in coordinator.wallboxes
         ],
+        #
+        # diagnostic sensors of the polls
+        PollMetricSensor(
+            coordinator,
+            config_entry,
+            "Poll Duration",
+            "total",
+            UnitOfTime.MILLISECONDS,
+            SensorDeviceClass.DURATION,
+            scale=1000,
+            enabled_default=True,
+        ),
+        PollMetricSensor(
+            coordinator,
+            config_entry,
+            "Poll Network Time",
+            "network",
+            UnitOfTime.MILLISECONDS,
+            SensorDeviceClass.DURATION,
+            scale=1000,
+        ),
+        PollMetricSensor(
+            coordinator,
+            config_entry,
+            "Poll Decryption Time",
+            "decrypt",
+            UnitOfTime.MILLISECONDS,
+            SensorDeviceClass.DURATION,
+            scale=1000,
+        ),
+        PollMetricSensor(
+            coordinator,
+            config_entry,
+            "Poll Queue Wait",
+            "queue_wait",
+            UnitOfTime.MILLISECONDS,
+            SensorDeviceClass.DURATION,
+            scale=1000,
+        ),
+        PollMetricSensor(
+            coordinator,
+            config_entry,
+            "Poll Lateness",
+            "lateness",
+            UnitOfTime.MILLISECONDS,
+            SensorDeviceClass.DURATION,
+            scale=1000,
+        ),
+        PollMetricSensor(
+            coordinator,
+            config_entry,
+            "Entity Update Time",
+            "fan_out",
+            UnitOfTime.MILLISECONDS,
+            SensorDeviceClass.DURATION,
+            scale=1000,
+        ),
+        PollMetricSensor(
+            coordinator,
+            config_entry,
+            "Poll Response Size",
+            "response_bytes",
+            UnitOfInformation.BYTES,
+            SensorDeviceClass.DATA_SIZE,
+        ),
+        PollMetricSensor(
+            coordinator, config_entry, "Poll Unhandled Tags", "unhandled_tags"
+        ),
     ]
 
-    async_add_entities(sensors)
+    async_add_entities(with_entry_unique_ids(coordinator, sensors))
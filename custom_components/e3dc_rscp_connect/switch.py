@@ -5,7 +5,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import const
 from .coordinator import E3dcRscpCoordinator
-from .entities import BatteryRemoteSwitch
+from .entities import BatteryRemoteSwitch, with_entry_unique_ids
 
 DOMAIN = const.DOMAIN
 
@@ -21,4 +21,8 @@ async def async_setup_entry(
         "coordinator"
     ]
 
-    async_add_entities([BatteryRemoteSwitch(coordinator, config_entry)])
+    async_add_entities(
+        with_entry_unique_ids(
+            coordinator, [BatteryRemoteSwitch(coordinator, config_entry)]
+        )
+    )
@@ -0,0 +1,82 @@
+"Deadband and rate limit of the states written by the power sensors."
+
+from dataclasses import dataclass
+
+
+@dataclass
+class WriteFilterStats:
+    "Counts the written and suppressed states of a sensor."
+
+    written: int = 0
+    # the value was within the deadband of the last written state
+    suppressed_deadband: int = 0
+    # the value changed, but the last state was written too recently
+    suppressed_rate: int = 0
+
+
+class PowerWriteFilter:
+    """Decides if a new power value is written as state.
+
+    A value is written if it differs from the last written value by at least
+    deadband watts and by at least deadband_percent of the last written
+    value, and at most once per min_interval seconds. Changes to and from
+    None (unknown) are always written, a value held back by the rate limit
+    is written when the interval expired.
+    """
+
+    def __init__(
+        self,
+        deadband: float = 0,
+        deadband_percent: float = 0,
+        min_interval: float = 0,
+    ) -> None:
+        "Inits the filter, 0 disables the corresponding limit."
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        self.min_interval = min_interval
+        self.stats = WriteFilterStats()
+        self.__written = False
+        self.__value: float | None = None
+        self.__written_at: float | None = None
+
+    @property
+    def value(self) -> float | None:
+        "Returns the last written value."
+        return self.__value
+
+    @property
+    def enabled(self) -> bool:
+        "Returns True if any limit is set."
+        return bool(self.deadband or self.deadband_percent or self.min_interval)
+
+    def within_deadband(self, value: float | None) -> bool:
+        "Returns True if value doesn't differ enough from the last written value."
+        if not self.__written:
+            return False
+        if value is None or self.__value is None:
+            return value is None and self.__value is None
+        threshold = max(self.deadband, abs(self.__value) * self.deadband_percent / 100)
+        return value == self.__value or abs(value - self.__value) < threshold
+
+    def delay(self, value: float | None, now: float) -> float | None:
+        """Returns the seconds until value may be written, 0 if it may be written now.
+
+        None is returned if the value is within the deadband. now is a
+        time.monotonic() timestamp. Suppressed values are counted.
+        """
+        if self.within_deadband(value):
+            self.stats.suppressed_deadband += 1
+            return None
+        if self.__written_at is not None and self.min_interval:
+            remaining = self.__written_at + self.min_interval - now
+            if remaining > 0:
+                self.stats.suppressed_rate += 1
+                return remaining
+        return 0
+
+    def record_write(self, value: float | None, now: float) -> None:
+        "Records value as the last written state."
+        self.__written = True
+        self.__value = value
+        self.__written_at = now
+        self.stats.written += 1
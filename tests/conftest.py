@@ -0,0 +1,33 @@
+"""Fixtures of the tests which run against the fake device."""
+
+from unittest.mock import Mock
+
+from homeassistant.core import HomeAssistant
+import pytest
+import pytest_asyncio
+
+from .fake_plant import FakePlant
+from .fake_rscp_server import FakeRscpServer
+from .helpers import KEY
+
+
+@pytest.fixture
+def plant() -> FakePlant:
+    "The plant of the server fixture, overridden by tests which need other devices."
+    return FakePlant.create(wallboxes=1, inverters=1, batteries=1)
+
+
+@pytest_asyncio.fixture
+async def server(plant):
+    server = FakeRscpServer(KEY, plant=plant)
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path):
+    hass = HomeAssistant(str(tmp_path))
+    hass.config_entries = Mock()
+    yield hass
+    await hass.async_stop(force=True)
@@ -0,0 +1,317 @@
+"""A simulated E3DC plant which answers the requests of the integration."""
+
+from dataclasses import dataclass, field
+import random
+
+from rscp_lib.RscpTags import rscpTags
+from rscp_lib.RscpValue import RscpValue
+
+from e3dc_rscp_connect.framing import RESPONSE_TAG_FLAG
+
+TAG_NAMES = {tag["tagvalue"]: name for name, tag in rscpTags.items()}
+
+# error code of the device for a device index which doesn't exist
+ERR_NOT_AVAILABLE = 6
+
+
+def typed_value(tag_name: str, type_name: str, value) -> RscpValue:
+    """Returns a value packed with type_name instead of the type of the tag.
+
+    The device answers some tags with a type of its choice, e.g. TAG_PVI_VALUE,
+    or with an error value instead of the requested data.
+    """
+    rscp_value = RscpValue().withTagName(tag_name, value)
+    description = {**rscpTags[tag_name], "type": type_name}
+    rscp_value._RscpValue__tag_description = description  # noqa: SLF001
+    rscp_value._RscpValue__type = type_name  # noqa: SLF001
+    return rscp_value
+
+
+def error_value(tag_name: str, code: int = ERR_NOT_AVAILABLE) -> RscpValue:
+    "Returns the error answer of the device for tag_name."
+    return typed_value(tag_name, "Error32", code)
+
+
+@dataclass
+class FakeWallbox:
+    "State of a simulated wallbox."
+
+    serial: str
+    device_name: str = "Wallbox"
+    firmware_version: str = "1.0.0"
+    cp_state: str = "C2"
+    power: list[float] = field(default_factory=lambda: [3680.0, 3680.0, 3680.0])
+    sun_mode: bool = True
+    max_charge_current: int = 16
+    min_charge_current: int = 6
+    upper_current_limit: int = 32
+    lower_current_limit: int = 6
+    charge_strategy: int = 0
+
+
+@dataclass
+class FakeInverter:
+    "State of a simulated PV inverter, the DC power of each MPP tracker."
+
+    dc_power: list[float] = field(default_factory=lambda: [1500.0, 1200.0])
+
+
+@dataclass
+class FakeBattery:
+    "State of a simulated battery module."
+
+    connected: bool = True
+    working: bool = True
+
+
+@dataclass
+class FakePlant:
+    """A storage system with wallboxes, inverters and batteries.
+
+    Answers EMS, INFO, PVI, BAT, WB and SGR requests like the device does.
+    Devices are addressed by their position in the lists, requests for a
+    missing index are answered with an error, a missing wallbox only with its
+    index. Set requests change the state of the plant.
+    """
+
+    wallboxes: list[FakeWallbox] = field(default_factory=list)
+    inverters: list[FakeInverter] = field(default_factory=list)
+    batteries: list[FakeBattery] = field(default_factory=list)
+    # None if the plant doesn't support SG Ready
+    sg_ready_state: int | None = 1
+    serial: str = "S10-123456789"
+    assembly_serial: str = "A-123456789"
+    mac_address: str = "00:11:22:33:44:55"
+    sw_release: str = "S10_2024_04"
+    ems_power: dict[str, int] = field(
+        default_factory=lambda: {
+            "TAG_EMS_POWER_PV": 2700,
+            "TAG_EMS_POWER_BAT": 500,
+            "TAG_EMS_POWER_HOME": 800,
+            "TAG_EMS_POWER_GRID": -100,
+            "TAG_EMS_POWER_ADD": 0,
+            "TAG_EMS_POWER_WB_ALL": 0,
+            "TAG_EMS_POWER_WB_SOLAR": 0,
+        }
+    )
+    bat_soc: int = 50
+    emergency_power_status: int = 1
+    # last remote control setpoint, positive values charge the battery
+    setpoint: int | None = None
+
+    @classmethod
+    def create(
+        cls,
+        wallboxes: int = 1,
+        inverters: int = 1,
+        batteries: int = 2,
+        trackers: int = 2,
+    ) -> "FakePlant":
+        "Returns a plant with the given number of devices."
+        return cls(
+            wallboxes=[
+                FakeWallbox(serial=f"WB-{index:06d}", device_name=f"Wallbox {index}")
+                for index in range(wallboxes)
+            ],
+            inverters=[
+                FakeInverter(dc_power=[1000.0 + 100 * x for x in range(trackers)])
+                for _ in range(inverters)
+            ],
+            batteries=[FakeBattery() for _ in range(batteries)],
+        )
+
+    def advance(self, rng: random.Random, fluctuation: float = 0.1) -> None:
+        "Changes all power values by up to fluctuation, like a plant in operation."
+
+        def vary(value):
+            return value * (1 + rng.uniform(-fluctuation, fluctuation))
+
+        for inverter in self.inverters:
+            inverter.dc_power = [vary(x) for x in inverter.dc_power]
+        for wallbox in self.wallboxes:
+            wallbox.power = [vary(x) for x in wallbox.power]
+
+        pv = round(sum(sum(x.dc_power) for x in self.inverters))
+        wallbox = round(sum(sum(x.power) for x in self.wallboxes))
+        home = round(vary(self.ems_power["TAG_EMS_POWER_HOME"]))
+        battery = self.ems_power["TAG_EMS_POWER_BAT"]
+        self.ems_power.update(
+            {
+                "TAG_EMS_POWER_PV": pv,
+                "TAG_EMS_POWER_HOME": home,
+                "TAG_EMS_POWER_WB_ALL": wallbox,
+                "TAG_EMS_POWER_WB_SOLAR": min(pv, wallbox),
+                "TAG_EMS_POWER_GRID": home + wallbox + battery - pv,
+            }
+        )
+
+    def answer(self, request: RscpValue) -> RscpValue | None:
+        "Returns the answer for a top level request, None for unknown requests."
+        name = request.getTagName()
+        response_name = response_tag_name(name)
+
+        if response_name in self.ems_power:
+            return RscpValue().withTagName(response_name, self.ems_power[response_name])
+
+        simple_values = {
+            "TAG_EMS_BAT_SOC": self.bat_soc,
+            "TAG_EMS_EMERGENCY_POWER_STATUS": self.emergency_power_status,
+            "TAG_INFO_SERIAL_NUMBER": self.serial,
+            "TAG_INFO_ASSEMBLY_SERIAL_NUMBER": self.assembly_serial,
+            "TAG_INFO_MAC_ADDRESS": self.mac_address,
+            "TAG_INFO_SW_RELEASE": self.sw_release,
+        }
+        if response_name in simple_values:
+            return RscpValue().withTagName(response_name, simple_values[response_name])
+
+        handlers = {
+            "TAG_EMS_REQ_SET_POWER": self.__answer_set_power,
+            "TAG_PVI_REQ_DATA": self.__answer_inverter,
+            "TAG_BAT_REQ_DATA": self.__answer_battery,
+            "TAG_WB_REQ_DATA": self.__answer_wallbox,
+            "TAG_SGR_REQ_DATA": self.__answer_sg_ready,
+        }
+        handler = handlers.get(name)
+        return handler(request) if handler is not None else None
+
+    def __answer_set_power(self, request: RscpValue) -> RscpValue:
+        mode = request.get_child("TAG_EMS_REQ_SET_POWER_MODE").getValue()
+        power = request.get_child("TAG_EMS_REQ_SET_POWER_VALUE").getValue()
+        # mode 2 discharges, mode 3 charges, mode 0 returns to normal operation
+        self.setpoint = {0: None, 2: -power, 3: power}.get(mode, self.setpoint)
+        return RscpValue().withTagName("TAG_EMS_SET_POWER", self.setpoint or 0)
+
+    def __answer_inverter(self, request: RscpValue) -> RscpValue:
+        index = request.get_child("TAG_PVI_INDEX").getValue()
+        children = [RscpValue().withTagName("TAG_PVI_INDEX", index)]
+        if index >= len(self.inverters):
+            children.append(error_value("TAG_PVI_REQ_DATA"))
+            return RscpValue().withTagName("TAG_PVI_DATA", children)
+
+        inverter = self.inverters[index]
+        for tracker in request.get_childs("TAG_PVI_REQ_DC_POWER"):
+            tracker = tracker.getValue()
+            if tracker < len(inverter.dc_power):
+                value = typed_value(
+                    "TAG_PVI_VALUE", "Float32", inverter.dc_power[tracker]
+                )
+            else:
+                value = error_value("TAG_PVI_VALUE")
+            children.append(
+                RscpValue().withTagName(
+                    "TAG_PVI_DC_POWER",
+                    [RscpValue().withTagName("TAG_PVI_INDEX", tracker), value],
+                )
+            )
+        return RscpValue().withTagName("TAG_PVI_DATA", children)
+
+    def __answer_battery(self, request: RscpValue) -> RscpValue:
+        index = request.get_child("TAG_BAT_INDEX").getValue()
+        children = [RscpValue().withTagName("TAG_BAT_INDEX", index)]
+        if index >= len(self.batteries):
+            children.append(error_value("TAG_BAT_DEVICE_STATE"))
+        elif request.has_child_tag("TAG_BAT_REQ_DEVICE_STATE"):
+            battery = self.batteries[index]
+            children.append(
+                RscpValue.construct_rscp_value(
+                    "TAG_BAT_DEVICE_STATE",
+                    [
+                        ("TAG_BAT_DEVICE_CONNECTED", battery.connected),
+                        ("TAG_BAT_DEVICE_WORKING", battery.working),
+                    ],
+                )
+            )
+        return RscpValue().withTagName("TAG_BAT_DATA", children)
+
+    def __answer_wallbox(self, request: RscpValue) -> RscpValue:
+        index = request.get_child("TAG_WB_INDEX").getValue()
+        children = [RscpValue().withTagName("TAG_WB_INDEX", index)]
+        if index < len(self.wallboxes):
+            wallbox = self.wallboxes[index]
+            children.extend(
+                self.__answer_wallbox_value(wallbox, x)
+                for x in request.getValue()
+                if x.getTagName() != "TAG_WB_INDEX"
+            )
+        return RscpValue().withTagName("TAG_WB_DATA", children)
+
+    def __answer_wallbox_value(
+        self, wallbox: FakeWallbox, request: RscpValue
+    ) -> RscpValue:
+        name = request.getTagName()
+        response_name = response_tag_name(name)
+        if name == "TAG_WB_REQ_SET_SUN_MODE_ACTIVE":
+            wallbox.sun_mode = request.getValue()
+        elif name == "TAG_WB_REQ_SET_MAX_CHARGE_CURRENT":
+            wallbox.max_charge_current = request.getValue()
+        elif name == "TAG_WB_REQ_SET_MIN_CHARGE_CURRENT":
+            wallbox.min_charge_current = request.getValue()
+
+        if name == "TAG_WB_REQ_ASSIGNED_POWER":
+            return RscpValue.construct_rscp_value(
+                response_name,
+                [
+                    (f"TAG_WB_ASSIGNED_POWER_L{phase + 1}", round(power))
+                    for phase, power in enumerate(wallbox.power)
+                ],
+            )
+        if name == "TAG_WB_REQ_DEVICE_STATE":
+            return RscpValue.construct_rscp_value(
+                response_name,
+                [
+                    ("TAG_WB_DEVICE_CONNECTED", True),
+                    ("TAG_WB_DEVICE_WORKING", True),
+                    ("TAG_WB_DEVICE_IN_SERVICE", False),
+                ],
+            )
+        if name == "TAG_WB_REQ_PARAMETER_LIST":
+            return RscpValue().withTagName(response_name, [])
+        if name.startswith("TAG_WB_REQ_PM_POWER_L"):
+            return RscpValue().withTagName(
+                response_name, float(wallbox.power[int(name[-1]) - 1])
+            )
+
+        values = {
+            "TAG_WB_SERIAL": wallbox.serial,
+            "TAG_WB_DEVICE_NAME": wallbox.device_name,
+            "TAG_WB_FIRMWARE_VERSION": wallbox.firmware_version,
+            "TAG_WB_CP_STATE": wallbox.cp_state,
+            "TAG_WB_SUN_MODE_ACTIVE": wallbox.sun_mode,
+            "TAG_WB_SET_SUN_MODE_ACTIVE": wallbox.sun_mode,
+            "TAG_WB_MAX_CHARGE_CURRENT": wallbox.max_charge_current,
+            "TAG_WB_SET_MAX_CHARGE_CURRENT": wallbox.max_charge_current,
+            "TAG_WB_MIN_CHARGE_CURRENT": wallbox.min_charge_current,
+            "TAG_WB_SET_MIN_CHARGE_CURRENT": wallbox.min_charge_current,
+            "TAG_WB_UPPER_CURRENT_LIMIT": wallbox.upper_current_limit,
+            "TAG_WB_LOWER_CURRENT_LIMIT": wallbox.lower_current_limit,
+            "TAG_WB_ACTIVE_CHARGE_STRATEGY": wallbox.charge_strategy,
+        }
+        if response_name in values:
+            return RscpValue().withTagName(response_name, values[response_name])
+        return error_value(name)
+
+    def __answer_sg_ready(self, request: RscpValue) -> RscpValue:
+        index = request.get_child("TAG_SGR_INDEX").getValue()
+        children = [RscpValue().withTagName("TAG_SGR_INDEX", index)]
+        if self.sg_ready_state is None:
+            children.append(error_value("TAG_SGR_STATE"))
+        elif request.has_child_tag("TAG_SGR_REQ_STATE"):
+            children.append(
+                RscpValue().withTagName("TAG_SGR_STATE", self.sg_ready_state)
+            )
+        return RscpValue().withTagName("TAG_SGR_DATA", children)
+
+
+def response_tag_name(request_name: str) -> str:
+    """Returns the name of the tag the device answers a request tag with.
+
+    The response tag usually has the request tag value with the response flag
+    set, but the tag table has exceptions like TAG_WB_REQ_SERIAL, so the name
+    is tried first.
+    """
+    response_name = request_name.replace("_REQ_", "_", 1)
+    if response_name in rscpTags:
+        return response_name
+    return TAG_NAMES.get(
+        rscpTags[request_name]["tagvalue"] | RESPONSE_TAG_FLAG, request_name
+    )
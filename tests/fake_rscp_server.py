@@ -0,0 +1,215 @@
+"""A fake E3DC device which answers RSCP requests on localhost."""
+
+import asyncio
+import contextlib
+import random
+import struct
+
+from rscp_lib.RscpEncryption import RscpEncryption
+from rscp_lib.RscpFrame import RscpFrame
+from rscp_lib.RscpTags import rscpTags
+from rscp_lib.RscpValue import RscpValue
+
+from .fake_plant import FakePlant, response_tag_name
+
+# the frame header is followed by a CRC32 checksum if this ctrl flag is set
+_CRC_FLAG = 0x10
+_CRC_SIZE = 4
+
+
+class _RequestReader:
+    """Splits the received requests into frames, independent of the client code.
+
+    The client encrypts each frame on its own and pads it to the block size,
+    so a frame is complete once its padded length is decrypted.
+    """
+
+    def __init__(self, encryption: RscpEncryption) -> None:
+        self.__encryption = encryption
+        self.__cipher = bytearray()
+        self.__plain = bytearray()
+
+    def feed(self, data: bytes) -> list[bytes]:
+        "Adds received data and returns the complete frames."
+        self.__cipher.extend(data)
+        aligned = len(self.__cipher) - len(self.__cipher) % RscpEncryption.BLOCK_SIZE
+        if aligned:
+            self.__plain.extend(
+                self.__encryption.decrypt(bytes(self.__cipher[:aligned]))
+            )
+            del self.__cipher[:aligned]
+
+        frames = []
+        header_size = struct.calcsize(RscpFrame.frame_header_fmt)
+        while len(self.__plain) >= header_size:
+            _, ctrl, _, _, data_length = struct.unpack_from(
+                RscpFrame.frame_header_fmt, self.__plain
+            )
+            length = header_size + data_length
+            if ctrl & _CRC_FLAG:
+                length += _CRC_SIZE
+            padded = -(-length // RscpEncryption.BLOCK_SIZE) * RscpEncryption.BLOCK_SIZE
+            if len(self.__plain) < padded:
+                break
+            frames.append(bytes(self.__plain[:length]))
+            del self.__plain[:padded]
+        return frames
+
+
+def _default_value(tag_name: str):
+    data_type = rscpTags[tag_name]["type"]
+    if data_type == "Bool":
+        return False
+    if data_type == "CString":
+        return ""
+    if data_type == "Container":
+        return []
+    if data_type in ("Float32", "Double64"):
+        return 0.0
+    return 0
+
+
+class FakeRscpServer:
+    """Answers each request frame with one response frame.
+
+    The response of a requested tag is taken from values, keyed by the name of
+    the response tag, else from the simulated plant. Each response is written
+    latency seconds after its request arrived, independent of other requests
+    still in flight.
+
+    Faults of a real network can be injected: responses are written in TCP
+    segments of segment_size bytes, segment_delay seconds apart, and a
+    connection is dropped when a request arrives after disconnect_after
+    answered requests, not counting the authentication.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        username: str = "user",
+        password: str = "password",
+        latency: float = 0.0,
+        values: dict | None = None,
+        reorder: bool = False,
+        plant: FakePlant | None = None,
+        fluctuation: float = 0.0,
+        segment_size: int | None = None,
+        segment_delay: float = 0.0,
+        disconnect_after: int | None = None,
+    ) -> None:
+        self.key = key
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.values = dict(values or {})
+        # answer frames which arrived in one chunk in reversed order
+        self.reorder = reorder
+        self.plant = plant
+        # the plant changes its power values by up to fluctuation whenever
+        # requests arrive, the frames of a poll usually arrive together
+        self.fluctuation = fluctuation
+        self.segment_size = segment_size
+        self.segment_delay = segment_delay
+        self.disconnect_after = disconnect_after
+        self.requests: list[list[str]] = []
+        self.connections = 0
+        self.__random = random.Random(0)
+        self.__server: asyncio.Server | None = None
+        self.__tasks: set[asyncio.Task] = set()
+        self.__writers: set[asyncio.StreamWriter] = set()
+
+    @property
+    def port(self) -> int:
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def start(self) -> int:
+        self.__server = await asyncio.start_server(self.__handle, "127.0.0.1", 0)
+        return self.port
+
+    async def stop(self) -> None:
+        self.__server.close()
+        self.disconnect()
+        for task in list(self.__tasks):
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await self.__server.wait_closed()
+
+    def disconnect(self) -> None:
+        "Drops all client connections, like a device which restarts."
+        for writer in list(self.__writers):
+            writer.close()
+
+    def _response(self, value: RscpValue) -> RscpValue:
+        name = value.getTagName()
+        if name == "TAG_RSCP_REQ_AUTHENTICATION":
+            user = value.get_child("TAG_RSCP_AUTHENTICATION_USER").getValue()
+            password = value.get_child("TAG_RSCP_AUTHENTICATION_PASSWORD").getValue()
+            level = 10 if (user, password) == (self.username, self.password) else 0
+            return RscpValue().withTagName("TAG_RSCP_AUTHENTICATION", level)
+
+        response_name = response_tag_name(name)
+        if response_name in self.values:
+            return RscpValue().withTagName(response_name, self.values[response_name])
+        if self.plant is not None:
+            response = self.plant.answer(value)
+            if response is not None:
+                return response
+        return RscpValue().withTagName(response_name, _default_value(response_name))
+
+    async def __write(self, writer: asyncio.StreamWriter, data: bytes) -> None:
+        size = self.segment_size or len(data)
+        for start in range(0, len(data), size):
+            if start > 0 and self.segment_delay:
+                await asyncio.sleep(self.segment_delay)
+            writer.write(data[start : start + size])
+            # each segment is sent on its own
+            await writer.drain()
+
+    async def __handle(self, reader, writer) -> None:
+        encryption = RscpEncryption(self.key)
+        request_reader = _RequestReader(encryption)
+        responses: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        async def write_responses():
+            while True:
+                due, frame = await responses.get()
+                await asyncio.sleep(max(0.0, due - loop.time()))
+                await self.__write(writer, encryption.encrypt(frame))
+
+        writer_task = loop.create_task(write_responses())
+        self.__tasks.add(writer_task)
+        self.__writers.add(writer)
+        self.connections += 1
+        answered = 0
+        try:
+            while data := await reader.read(4096):
+                buffers = request_reader.feed(data)
+                if self.reorder:
+                    buffers.reverse()
+                if buffers and self.plant is not None and self.fluctuation:
+                    self.plant.advance(self.__random, self.fluctuation)
+                for buffer in buffers:
+                    frame = RscpFrame()
+                    frame.unpack(buffer)
+                    values = frame.getRscpValues()
+                    if not values[0].isTag("TAG_RSCP_REQ_AUTHENTICATION"):
+                        if (
+                            self.disconnect_after is not None
+                            and answered >= self.disconnect_after
+                        ):
+                            return
+                        answered += 1
+                    self.requests.append([x.getTagName() for x in values])
+                    responses.put_nowait(
+                        (
+                            loop.time() + self.latency,
+                            RscpFrame().packFrame([self._response(x) for x in values]),
+                        )
+                    )
+        finally:
+            writer_task.cancel()
+            self.__tasks.discard(writer_task)
+            self.__writers.discard(writer)
+            writer.close()
@@ -0,0 +1,57 @@
+"""Helpers of the tests which run coordinators and clients against the fake device."""
+
+import asyncio
+from unittest.mock import Mock
+
+from homeassistant.core import HomeAssistant
+
+from e3dc_rscp_connect.const import DOMAIN
+from e3dc_rscp_connect.coordinator import E3dcRscpCoordinator
+
+from .fake_rscp_server import FakeRscpServer
+
+KEY = "test_key"
+
+
+class FakeClock:
+    "A monotonic clock which only moves when now is set."
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def create_entry(server: FakeRscpServer, entry_id: str = "entry", **options) -> Mock:
+    "Returns a config entry of the fake device, options override the defaults."
+    return Mock(
+        entry_id=entry_id,
+        data={},
+        options={
+            "host": "127.0.0.1",
+            "port": server.port,
+            "username": "user",
+            "password": "password",
+            "key": KEY,
+            **options,
+        },
+    )
+
+
+def create_coordinator(
+    hass: HomeAssistant, server: FakeRscpServer, entry_id: str = "entry", **options
+) -> E3dcRscpCoordinator:
+    "Returns the coordinator of a new entry, stored in hass.data like by the setup."
+    coordinator = E3dcRscpCoordinator(hass, create_entry(server, entry_id, **options))
+    hass.data.setdefault(DOMAIN, {})[entry_id] = {"coordinator": coordinator}
+    return coordinator
+
+
+async def wait_for(condition, timeout: float = 1.0) -> None:
+    "Waits until condition() returns True, raises an AssertionError after timeout."
+    for _ in range(round(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
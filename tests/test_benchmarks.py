@@ -0,0 +1,34 @@
+"""Smoke tests of the benchmark scripts (benchmarks/)."""
+
+from pathlib import Path
+import subprocess
+import sys
+
+BENCHMARKS_PATH = Path(__file__).parent.parent / "benchmarks"
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Poll hot path
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestPollHotPath:
+    def test_script_runs_outside_of_the_repository_root(self, tmp_path):
+        result = subprocess.run(
+            [
+                sys.executable,
+                str(BENCHMARKS_PATH / "poll_hot_path.py"),
+                "--sizes",
+                "1x1",
+                "--iterations",
+                "1",
+            ],
+            cwd=tmp_path,
+            capture_output=True,
+            text=True,
+            timeout=120,
+            check=False,
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert "1x1   entity_writes" in result.stdout
+        assert "1x1   poll total" in result.stdout
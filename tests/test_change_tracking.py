@@ -0,0 +1,103 @@
+"""Tests for the change tracking of the data models (model/ChangeTrackingModel.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+from e3dc_rscp_connect.model.ChangeTrackingModel import ChangedFields
+from e3dc_rscp_connect.model.StorageDataModel import (
+    DeviceState,
+    PvInverterData,
+    StorageDataModel,
+)
+from e3dc_rscp_connect.model.WallboxDataModel import WallboxDataModel
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ChangeTrackingModel
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestChangeTrackingModel:
+    def test_new_values_are_recorded(self):
+        storage = StorageDataModel(serial="S10-1")
+        storage.pop_changed_fields()
+
+        storage.bat_soc = 50
+        storage.powers.pv = 1200
+
+        assert storage.pop_changed_fields() == {"bat_soc", "powers.pv"}
+
+    def test_equal_values_are_not_recorded(self):
+        wallbox = WallboxDataModel(index=0, power=1000)
+        wallbox.currents.max = 16
+        wallbox.pop_changed_fields()
+
+        wallbox.power = 1000
+        wallbox.currents.max = 16
+
+        assert wallbox.pop_changed_fields() == set()
+
+    def test_pop_resets_the_changed_fields(self):
+        wallbox = WallboxDataModel(index=0)
+        # the fields set by __init__ are new as well
+        assert "index" in wallbox.pop_changed_fields()
+
+        wallbox.cp_state = "C2"
+
+        assert wallbox.pop_changed_fields("wallboxes.0.") == {"wallboxes.0.cp_state"}
+        assert wallbox.pop_changed_fields() == set()
+
+    def test_models_in_dicts_and_marked_changes(self):
+        storage = StorageDataModel()
+        storage.device_states.battery[1] = DeviceState()
+        storage.inverters[0] = PvInverterData()
+        storage.pop_changed_fields()
+
+        storage.device_states.battery[1].working = True
+        storage.inverters[0].power_mppt[2] = 300
+        storage.inverters[0].mark_changed("power_mppt.2")
+
+        assert storage.pop_changed_fields("storage.") == {
+            "storage.device_states.battery.1.working",
+            "storage.inverters.0.power_mppt.2",
+        }
+
+    def test_tracking_is_not_part_of_equality(self):
+        changed = WallboxDataModel(index=0)
+        changed.power = 10
+        unchanged = WallboxDataModel(index=0, power=10)
+        unchanged.pop_changed_fields()
+
+        assert changed == unchanged
+        assert "_changed_fields" not in repr(changed)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ChangedFields
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestChangedFields:
+    def test_affects_the_changed_field(self):
+        changed = ChangedFields({"storage.powers.pv"})
+
+        assert changed.affects(("storage.powers.pv",))
+        assert not changed.affects(("storage.powers.grid",))
+        assert not changed.affects(())
+
+    def test_affects_fields_below_and_above(self):
+        changed = ChangedFields({"storage.inverters.0", "wallboxes.1.currents.max"})
+
+        # a new inverter changes all its values
+        assert changed.affects(("storage.inverters.0.power_mppt.1",))
+        assert changed.affects(("wallboxes.1.currents",))
+        assert not changed.affects(("storage.inverters.1.power_mppt.0",))
+        assert not changed.affects(("wallboxes.1.current",))
+
+    def test_empty(self):
+        assert not ChangedFields(set())
+        assert ChangedFields({"sg_ready.state"})
@@ -8,12 +8,27 @@ custom_components_path = (
 )
 sys.path.insert(0, str(custom_components_path))
 
-from unittest.mock import AsyncMock, Mock, call, patch
+import time
+from unittest.mock import ANY, AsyncMock, MagicMock, Mock, call, patch
 import pytest
 
+from rscp_lib.RscpConnection import RscpConnectionException
+from rscp_lib.RscpFrame import RscpFrame
+from rscp_lib.RscpValue import RscpValue
+
 from e3dc_rscp_connect.client import RscpClient
+from e3dc_rscp_connect.connection_supervisor import (
+    RscpAuthorizationException,
+    RscpRequestTimeoutException,
+)
+from e3dc_rscp_connect.framing import RscpFrameDecoder
+from e3dc_rscp_connect.request_queue import (
+    RequestPriority,
+    RscpRequestSupersededException,
+)
 from e3dc_rscp_connect.model.WallboxDataModel import WallboxDataModel
 from e3dc_rscp_connect.model.WallboxRscpModel import WallboxRscpModel
+from e3dc_rscp_connect.model.StorageDataModel import StorageDataModel
 from e3dc_rscp_connect.model.StorageRscpModel import StorageRscpModel
 from e3dc_rscp_connect.model.SgReadyRscpModel import SgReadyRscpModel
 
@@ -30,6 +45,7 @@ def _make_mock_conn():
     conn.connect = AsyncMock()
     conn.authorize = AsyncMock(return_value=True)
     conn.send = AsyncMock()
+    conn._send = AsyncMock()
     conn.receive = AsyncMock(return_value=None)
     return conn
 
@@ -239,12 +255,14 @@ class TestConnectAndLogin:
         mock_conn.authorize.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_raises_connection_error_when_authorize_fails(self, client, mock_conn):
+    async def test_raises_authorization_error_when_authorize_fails(
+        self, client, mock_conn
+    ):
         mock_conn.is_connected.side_effect = [False, True]
         mock_conn.is_authorized.return_value = False
         mock_conn.authorize.return_value = False
 
-        with pytest.raises(ConnectionError, match="Couldn't authorize"):
+        with pytest.raises(RscpAuthorizationException, match="Couldn't authorize"):
             await client._connect_and_login()
 
 
@@ -403,85 +421,131 @@ class TestAddIdentifiedWallbox:
 
 
 class TestSendAndReceive:
-    @pytest.mark.asyncio
-    async def test_returns_empty_list_when_recv_buffer_is_none(self, client, mock_conn):
-        mock_conn.receive.return_value = None
-        with patch("e3dc_rscp_connect.client.RscpFrame"):
-            result = await client.send_and_receive([])
-        assert result == []
+    @pytest.fixture(autouse=True)
+    def plain_stream(self, client):
+        """Let the decoder read the received chunks as plaintext."""
+        client._RscpClient__decoder = RscpFrameDecoder(None)
+
+    @staticmethod
+    def _frame(power: int) -> bytes:
+        return RscpFrame().packFrame(
+            [RscpValue().withTagName("TAG_EMS_POWER_HOME", power)]
+        )
 
     @pytest.mark.asyncio
     async def test_calls_send_with_packed_frame(self, client, mock_conn):
-        mock_conn.receive.return_value = None
+        mock_conn._receive = AsyncMock(return_value=self._frame(1))
         with patch("e3dc_rscp_connect.client.RscpFrame") as MockFrame:
             MockFrame.return_value.packFrame.return_value = b"packed_data"
-            await client.send_and_receive([Mock()])
-        mock_conn.send.assert_called_once_with(b"packed_data")
+            await client.send_and_receive(
+                [RscpValue().withTagName("TAG_EMS_REQ_POWER_HOME", None)]
+            )
+        encrypt = client._RscpClient__encryption.encrypt
+        encrypt.assert_called_once_with(b"packed_data")
+        mock_conn._send.assert_called_once_with(encrypt.return_value)
 
     @pytest.mark.asyncio
-    async def test_unpacks_when_buffer_longer_than_frame(self, client, mock_conn):
-        fake_buffer = bytes(20)
-        mock_conn.receive.return_value = fake_buffer
+    async def test_returns_values_of_received_frame(self, client, mock_conn):
+        mock_conn._receive = AsyncMock(return_value=self._frame(1234))
 
-        pack_frame = Mock()
-        pack_frame.packFrame.return_value = b"packed"
-        unpack_frame = Mock()
-        unpack_frame.getRscpValues.return_value = ["val1", "val2"]
+        result = await client.send_and_receive([])
 
-        with patch("e3dc_rscp_connect.client.RscpFrame") as MockFrame:
-            MockFrame.side_effect = [pack_frame, unpack_frame]
-            MockFrame.getFrameLength.return_value = 10  # < 20 → unpack is called
+        assert [x.getValue() for x in result] == [1234]
 
-            result = await client.send_and_receive([])
+    @pytest.mark.asyncio
+    async def test_reads_until_frame_is_complete(self, client, mock_conn):
+        data = self._frame(1234)
+        mock_conn._receive = AsyncMock(side_effect=[data[:5], data[5:20], data[20:]])
+
+        result = await client.send_and_receive([])
 
-        unpack_frame.unpack.assert_called_once_with(fake_buffer[:10])
-        assert result == ["val1", "val2"]
+        assert [x.getValue() for x in result] == [1234]
+        assert mock_conn._receive.call_count == 3
 
     @pytest.mark.asyncio
-    async def test_skips_unpack_when_buffer_not_longer_than_frame(self, client, mock_conn):
-        fake_buffer = bytes(10)
-        mock_conn.receive.return_value = fake_buffer
+    async def test_leftover_bytes_are_used_for_next_response(self, client, mock_conn):
+        first = self._frame(1)
+        second = self._frame(2)
+        mock_conn._receive = AsyncMock(side_effect=[first + second[:4], second[4:]])
 
-        pack_frame = Mock()
-        pack_frame.packFrame.return_value = b"packed"
-        unpack_frame = Mock()
-        unpack_frame.getRscpValues.return_value = []
+        result_1 = await client.send_and_receive([])
+        result_2 = await client.send_and_receive([])
 
-        with patch("e3dc_rscp_connect.client.RscpFrame") as MockFrame:
-            MockFrame.side_effect = [pack_frame, unpack_frame]
-            MockFrame.getFrameLength.return_value = 10  # == 10, not greater
+        assert [x.getValue() for x in result_1] == [1]
+        assert [x.getValue() for x in result_2] == [2]
 
+    @pytest.mark.asyncio
+    async def test_raises_and_disconnects_when_peer_closed(self, client, mock_conn):
+        mock_conn._receive = AsyncMock(return_value=b"")
+
+        with pytest.raises(RscpConnectionException):
             await client.send_and_receive([])
 
-        unpack_frame.unpack.assert_not_called()
+        mock_conn.disconnect.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_decoder_is_reset_on_reconnect(self, client, mock_conn):
+        client._RscpClient__decoder.feed(self._frame(1)[:10])
+        mock_conn.is_connected.side_effect = [False, True]
+        mock_conn.is_authorized.return_value = True
+
+        await client._connect_and_login()
+
+        assert client._RscpClient__decoder.buffered_bytes == 0
 
     @pytest.mark.asyncio
     async def test_serialized_via_lock(self, client, mock_conn):
         """Two concurrent calls should not interleave (lock serializes them)."""
-        mock_conn.receive.return_value = None
         call_order = []
 
-        original_send = mock_conn.send
-
         async def tracking_send(data):
             call_order.append("send")
 
-        async def tracking_receive():
+        async def tracking_receive(timeout):
             call_order.append("receive")
-            return None
+            return self._frame(1)
 
-        mock_conn.send = tracking_send
-        mock_conn.receive = tracking_receive
+        mock_conn._send = tracking_send
+        mock_conn._receive = tracking_receive
 
-        with patch("e3dc_rscp_connect.client.RscpFrame"):
-            import asyncio
-            await asyncio.gather(
-                client.send_and_receive([]),
-                client.send_and_receive([]),
-            )
+        import asyncio
+
+        await asyncio.gather(
+            client.send_and_receive([]),
+            client.send_and_receive([]),
+        )
 
         assert call_order == ["send", "receive", "send", "receive"]
 
+    @pytest.mark.asyncio
+    async def test_large_request_is_split_into_frames(self, mock_conn):
+        with (
+            patch("e3dc_rscp_connect.client.RscpConnection", return_value=mock_conn),
+            patch("e3dc_rscp_connect.client.RscpEncryption") as encryption,
+        ):
+            encryption.return_value.encrypt.side_effect = lambda frame: frame
+            client = RscpClient(
+                "localhost", 5033, "user", "password", "key", max_frame_size=50
+            )
+        client._RscpClient__decoder = RscpFrameDecoder(None)
+        mock_conn._receive = AsyncMock(
+            side_effect=[self._frame(1), self._frame(2) + self._frame(3)]
+        )
+        # 18 byte frame header + 7 byte per value, so 4 values fit into a frame
+        values = [
+            RscpValue().withTagName("TAG_EMS_REQ_POWER_HOME", None) for _ in range(10)
+        ]
+
+        result = await client.send_and_receive(values)
+
+        assert mock_conn._send.call_count == 3
+        assert [len(sent.args[0]) for sent in mock_conn._send.call_args_list] == [
+            46,
+            46,
+            32,
+        ]
+        assert [x.getValue() for x in result] == [1, 2, 3]
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # send_set_* commands
@@ -514,7 +578,9 @@ class TestSendSetRequests:
 
         await client.send_set_max_charge_current(1, 16)
 
-        wb.set_max_charge_current_request.assert_called_once_with(16, client.send_and_receive)
+        wb.set_max_charge_current_request.assert_called_once_with(
+            16, client.send_and_receive
+        )
 
     @pytest.mark.asyncio
     async def test_max_charge_current_does_nothing_when_not_found(self, client):
@@ -529,12 +595,145 @@ class TestSendSetRequests:
 
         await client.send_set_min_charge_current(1, 6)
 
-        wb.set_min_charge_current_request.assert_called_once_with(6, client.send_and_receive)
+        wb.set_min_charge_current_request.assert_called_once_with(
+            6, client.send_and_receive
+        )
 
     @pytest.mark.asyncio
     async def test_min_charge_current_does_nothing_when_not_found(self, client):
         await client.send_set_min_charge_current(99, 6)
 
+    @pytest.mark.asyncio
+    async def test_changed_value_requests_state_group(self, client):
+        wb = Mock()
+        wb.get_model.return_value = WallboxDataModel(1)
+        wb.set_max_charge_current_request = AsyncMock()
+        client._RscpClient__wallboxes = [wb]
+        pipeline = Mock()
+        client._RscpClient__handlerPipeline = pipeline
+
+        await client.send_set_max_charge_current(1, 16)
+
+        pipeline.request_group.assert_called_once_with("state")
+
+    @pytest.mark.asyncio
+    async def test_remote_power_is_sent_with_deadline(self, client, mock_conn):
+        storage = Mock()
+        storage.send_battery_remote_control = AsyncMock()
+        client._RscpClient__storage = storage
+
+        await client.send_battery_remote_power(500)
+
+        send_and_receive = storage.send_battery_remote_control.call_args.args[1]
+        assert send_and_receive.keywords["deadline"] > 0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# remote control setpoint along with the poll
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestPiggybackSetpoint:
+    @pytest.fixture
+    def storage(self, client):
+        storage = Mock()
+        storage.send_battery_remote_control = AsyncMock()
+        client._RscpClient__storage = storage
+        return storage
+
+    @pytest.fixture
+    def pipeline(self, client):
+        pipeline = Mock()
+        request = MagicMock()
+        request.frames = [Mock()]
+        request.groups = frozenset({"power"})
+        request.pack.return_value = [b"packed_request"]
+        pipeline.collect_request = AsyncMock(return_value=request)
+        pipeline.process = AsyncMock()
+        client._RscpClient__handlerPipeline = pipeline
+        return pipeline
+
+    @pytest.mark.asyncio
+    async def test_setpoint_is_sent_with_poll_due_soon(
+        self, client, mock_conn, storage, pipeline
+    ):
+        mock_conn.is_connected.return_value = True
+
+        held = await client.send_battery_remote_power(
+            -500, next_poll=time.monotonic() + 0.5
+        )
+        assert held is False
+        storage.send_battery_remote_control.assert_not_called()
+
+        with patch.object(
+            client, "send_and_receive_frames", new=AsyncMock(return_value=[])
+        ):
+            await client._fetch_data()
+
+        request = pipeline.collect_request.return_value
+        (extra_values,) = request.pack.call_args.args
+        assert extra_values[0].getTagName() == "TAG_EMS_REQ_SET_POWER"
+        assert extra_values[0].get_child("TAG_EMS_REQ_SET_POWER_MODE").getValue() == 2
+        assert client.piggybacked_setpoints == 1
+        assert client.standalone_setpoints == 0
+
+    @pytest.mark.asyncio
+    async def test_setpoint_is_sent_alone_without_poll_due(self, client, storage):
+        sent = await client.send_battery_remote_power(
+            500, next_poll=time.monotonic() + 5
+        )
+
+        assert sent is True
+        storage.send_battery_remote_control.assert_called_once()
+        assert client.standalone_setpoints == 1
+
+    @pytest.mark.asyncio
+    async def test_setpoint_not_taken_by_poll_is_sent_alone(self, client, storage):
+        await client.send_battery_remote_power(100, next_poll=time.monotonic())
+        # the poll didn't happen within the period
+        await client.send_battery_remote_power(200, next_poll=time.monotonic())
+
+        assert storage.send_battery_remote_control.call_args.args[0] == 200
+        assert client.standalone_setpoints == 1
+
+    @pytest.mark.asyncio
+    async def test_setpoint_of_a_failed_poll_is_kept(
+        self, client, mock_conn, storage, pipeline
+    ):
+        mock_conn.is_connected.return_value = True
+        await client.send_battery_remote_power(-500, next_poll=time.monotonic())
+
+        with patch.object(
+            client,
+            "send_and_receive_frames",
+            new=AsyncMock(side_effect=RscpRequestTimeoutException("timeout")),
+        ):
+            with pytest.raises(RscpRequestTimeoutException):
+                await client._fetch_data()
+        with patch.object(
+            client, "send_and_receive_frames", new=AsyncMock(return_value=[])
+        ):
+            await client._fetch_data()
+
+        request = pipeline.collect_request.return_value
+        (extra_values,) = request.pack.call_args.args
+        assert extra_values[0].getTagName() == "TAG_EMS_REQ_SET_POWER"
+        assert client.piggybacked_setpoints == 1
+
+    @pytest.mark.asyncio
+    async def test_poll_without_setpoint_packs_cached_frames(
+        self, client, mock_conn, pipeline
+    ):
+        mock_conn.is_connected.return_value = True
+
+        with patch.object(
+            client, "send_and_receive_frames", new=AsyncMock(return_value=[])
+        ):
+            await client._fetch_data()
+
+        pipeline.collect_request.return_value.pack.assert_called_once_with(None)
+        assert client.piggybacked_setpoints == 0
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # identify_device
@@ -555,7 +754,9 @@ class TestIdentifyDevice:
         mock_conn.connect.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_skips_connect_when_already_connected_and_authorized(self, client, mock_conn):
+    async def test_skips_connect_when_already_connected_and_authorized(
+        self, client, mock_conn
+    ):
         mock_conn.is_connected.return_value = True
         mock_conn.is_authorized.return_value = True
 
@@ -573,13 +774,19 @@ class TestIdentifyDevice:
         mock_value.toString.return_value = "tag"
         mock_storage = Mock(spec=StorageRscpModel)
         mock_storage.ident_serial = "S10-001"
+        mock_storage.get_model.return_value = StorageDataModel(serial="S10-001")
 
         pipeline = Mock()
         client._RscpClient__handlerPipeline = pipeline
 
         with (
-            patch.object(client, "send_and_receive", new=AsyncMock(return_value=[mock_value])),
-            patch("e3dc_rscp_connect.client.StorageRscpModel.identify", return_value=mock_storage),
+            patch.object(
+                client, "send_and_receive", new=AsyncMock(return_value=[mock_value])
+            ),
+            patch(
+                "e3dc_rscp_connect.client.StorageRscpModel.identify",
+                return_value=mock_storage,
+            ),
         ):
             await client.identify_device()
 
@@ -600,9 +807,16 @@ class TestIdentifyDevice:
         client._RscpClient__handlerPipeline = pipeline
 
         with (
-            patch.object(client, "send_and_receive", new=AsyncMock(return_value=[mock_value])),
-            patch("e3dc_rscp_connect.client.StorageRscpModel.identify", return_value=None),
-            patch("e3dc_rscp_connect.client.WallboxRscpModel.identify", return_value=mock_wb),
+            patch.object(
+                client, "send_and_receive", new=AsyncMock(return_value=[mock_value])
+            ),
+            patch(
+                "e3dc_rscp_connect.client.StorageRscpModel.identify", return_value=None
+            ),
+            patch(
+                "e3dc_rscp_connect.client.WallboxRscpModel.identify",
+                return_value=mock_wb,
+            ),
         ):
             await client.identify_device()
 
@@ -622,10 +836,19 @@ class TestIdentifyDevice:
         client._RscpClient__handlerPipeline = pipeline
 
         with (
-            patch.object(client, "send_and_receive", new=AsyncMock(return_value=[mock_value])),
-            patch("e3dc_rscp_connect.client.StorageRscpModel.identify", return_value=None),
-            patch("e3dc_rscp_connect.client.WallboxRscpModel.identify", return_value=None),
-            patch("e3dc_rscp_connect.client.SgReadyRscpModel.identify", return_value=mock_sg),
+            patch.object(
+                client, "send_and_receive", new=AsyncMock(return_value=[mock_value])
+            ),
+            patch(
+                "e3dc_rscp_connect.client.StorageRscpModel.identify", return_value=None
+            ),
+            patch(
+                "e3dc_rscp_connect.client.WallboxRscpModel.identify", return_value=None
+            ),
+            patch(
+                "e3dc_rscp_connect.client.SgReadyRscpModel.identify",
+                return_value=mock_sg,
+            ),
         ):
             await client.identify_device()
 
@@ -682,7 +905,13 @@ class TestIdentifyDevice:
 class TestFetchDataPrivate:
     def _make_pipeline(self, tags=None, values=None):
         pipeline = Mock()
-        pipeline.collect_tags = AsyncMock(return_value=tags or [])
+        request = MagicMock()
+        request.__len__.return_value = 42
+        request.values = tags or []
+        request.groups = frozenset({"power", "state"})
+        request.frames = [Mock()]
+        request.pack.return_value = [b"packed_request"]
+        pipeline.collect_request = AsyncMock(return_value=request)
         pipeline.process = AsyncMock()
         return pipeline
 
@@ -696,7 +925,9 @@ class TestFetchDataPrivate:
         pipeline = self._make_pipeline()
         client._RscpClient__handlerPipeline = pipeline
 
-        with patch.object(client, "send_and_receive", new=AsyncMock(return_value=[])):
+        with patch.object(
+            client, "send_and_receive_frames", new=AsyncMock(return_value=[])
+        ):
             await client._fetch_data()
 
         mock_conn.connect.assert_called_once()
@@ -710,10 +941,13 @@ class TestFetchDataPrivate:
         pipeline = self._make_pipeline()
         client._RscpClient__handlerPipeline = pipeline
 
-        with patch.object(client, "send_and_receive", new=AsyncMock(return_value=received)):
+        with patch.object(
+            client, "send_and_receive_frames", new=AsyncMock(return_value=received)
+        ):
             await client._fetch_data()
 
         pipeline.process.assert_called_once_with(received)
+        pipeline.mark_polled.assert_called_once_with(frozenset({"power", "state"}))
 
     @pytest.mark.asyncio
     async def test_skips_process_when_received_is_none(self, client, mock_conn):
@@ -723,24 +957,47 @@ class TestFetchDataPrivate:
         pipeline = self._make_pipeline()
         client._RscpClient__handlerPipeline = pipeline
 
-        with patch.object(client, "send_and_receive", new=AsyncMock(return_value=None)):
+        with patch.object(
+            client, "send_and_receive_frames", new=AsyncMock(return_value=None)
+        ):
             await client._fetch_data()
 
         pipeline.process.assert_not_called()
+        pipeline.mark_polled.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_collects_tags_from_pipeline(self, client, mock_conn):
+    async def test_sends_packed_request_from_pipeline(self, client, mock_conn):
         mock_conn.is_connected.return_value = True
         mock_conn.is_authorized.return_value = True
 
-        tags = [Mock(), Mock()]
-        pipeline = self._make_pipeline(tags=tags)
+        pipeline = self._make_pipeline(tags=[Mock(), Mock()])
+        client._RscpClient__handlerPipeline = pipeline
+
+        with patch.object(
+            client, "send_and_receive_frames", new=AsyncMock(return_value=[])
+        ) as mock_s_r:
+            await client._fetch_data()
+
+        mock_s_r.assert_called_once_with(
+            [b"packed_request"], RequestPriority.POLL, key="poll", sample=ANY
+        )
+        assert client.last_poll_frame_count == 1
+
+    @pytest.mark.asyncio
+    async def test_superseded_poll_keeps_connection(self, client, mock_conn):
+        mock_conn.is_connected.return_value = True
+        pipeline = self._make_pipeline()
         client._RscpClient__handlerPipeline = pipeline
 
-        with patch.object(client, "send_and_receive", new=AsyncMock(return_value=[])) as mock_s_r:
+        with patch.object(
+            client,
+            "send_and_receive_frames",
+            new=AsyncMock(side_effect=RscpRequestSupersededException("newer poll")),
+        ):
             await client._fetch_data()
 
-        mock_s_r.assert_called_once_with(tags)
+        mock_conn.disconnect.assert_not_called()
+        pipeline.process.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_raises_exception_on_error(self, client, mock_conn):
@@ -748,7 +1005,7 @@ class TestFetchDataPrivate:
         mock_conn.is_authorized.return_value = True
 
         pipeline = Mock()
-        pipeline.collect_tags = AsyncMock(side_effect=RuntimeError("crash"))
+        pipeline.collect_request = AsyncMock(side_effect=RuntimeError("crash"))
         client._RscpClient__handlerPipeline = pipeline
 
         with pytest.raises(Exception, match="Error during data fetch"):
@@ -0,0 +1,195 @@
+"""Tests for the pipelined mode of RscpClient against a fake device."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+import pytest_asyncio
+from rscp_lib.RscpConnection import RscpConnectionException
+from rscp_lib.RscpValue import RscpValue
+
+from e3dc_rscp_connect.client import RscpClient
+
+from .fake_rscp_server import FakeRscpServer
+from .helpers import KEY
+
+POWER_TAGS = {
+    "TAG_EMS_REQ_POWER_PV": ("TAG_EMS_POWER_PV", 1000),
+    "TAG_EMS_REQ_POWER_BAT": ("TAG_EMS_POWER_BAT", 2000),
+    "TAG_EMS_REQ_POWER_HOME": ("TAG_EMS_POWER_HOME", 3000),
+    "TAG_EMS_REQ_POWER_GRID": ("TAG_EMS_POWER_GRID", 4000),
+    "TAG_EMS_REQ_POWER_ADD": ("TAG_EMS_POWER_ADD", 5000),
+}
+
+
+@pytest_asyncio.fixture
+async def server():
+    server = FakeRscpServer(KEY, values=dict(POWER_TAGS.values()))
+    await server.start()
+    yield server
+    await server.stop()
+
+
+async def _connected_client(server, pipelined: bool) -> RscpClient:
+    client = RscpClient(
+        "127.0.0.1", server.port, "user", "password", KEY, pipelined=pipelined
+    )
+    await client._connect_and_login()
+    return client
+
+
+async def _request_all(client) -> list:
+    return await asyncio.gather(
+        *[
+            client.send_and_receive([RscpValue().withTagName(tag, None)])
+            for tag in POWER_TAGS
+        ]
+    )
+
+
+def _names_and_values(results) -> list:
+    return [[(x.getTagName(), x.getValue()) for x in values] for values in results]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Pipelined mode
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestPipelinedMode:
+    @pytest.mark.asyncio
+    async def test_responses_are_matched_in_order(self, server):
+        client = await _connected_client(server, pipelined=True)
+
+        results = await _request_all(client)
+
+        assert _names_and_values(results) == [[x] for x in POWER_TAGS.values()]
+        assert client.pipelined
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_requests_are_written_before_responses_arrive(self, server):
+        server.latency = 0.05
+
+        lock_step = await _connected_client(server, pipelined=False)
+        start = time.monotonic()
+        lock_step_results = await _request_all(lock_step)
+        lock_step_duration = time.monotonic() - start
+        lock_step.client.disconnect()
+
+        pipelined = await _connected_client(server, pipelined=True)
+        start = time.monotonic()
+        pipelined_results = await _request_all(pipelined)
+        pipelined_duration = time.monotonic() - start
+        pipelined.client.disconnect()
+
+        assert _names_and_values(pipelined_results) == _names_and_values(
+            lock_step_results
+        )
+        # lock-step waits the latency for each request, pipelining only once
+        assert lock_step_duration >= 5 * server.latency
+        assert pipelined_duration < lock_step_duration / 2
+
+    @pytest.mark.asyncio
+    async def test_frames_of_split_request_are_merged(self, server):
+        client = RscpClient(
+            "127.0.0.1",
+            server.port,
+            "user",
+            "password",
+            KEY,
+            max_frame_size=40,
+            pipelined=True,
+        )
+        await client._connect_and_login()
+
+        values = await client.send_and_receive(
+            [RscpValue().withTagName(tag, None) for tag in POWER_TAGS]
+        )
+
+        assert [(x.getTagName(), x.getValue()) for x in values] == list(
+            POWER_TAGS.values()
+        )
+        assert len(server.requests) == 3
+        client.client.disconnect()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fallback to lock-step
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestLockStepFallback:
+    @pytest.mark.asyncio
+    async def test_mismatching_response_falls_back_to_lock_step(self, server):
+        server.reorder = True
+        server.latency = 0.02
+        client = await _connected_client(server, pipelined=True)
+
+        with pytest.raises(RscpConnectionException):
+            await _request_all(client)
+
+        assert not client.pipelined
+        assert not client.client.is_connected()
+
+        # lock-step never has more than one frame in flight, so reordering can't happen
+        await client._connect_and_login()
+        results = await _request_all(client)
+        assert _names_and_values(results) == [[x] for x in POWER_TAGS.values()]
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_pending_requests_fail_when_connection_closes(self, server):
+        server.latency = 0.05
+        client = await _connected_client(server, pipelined=True)
+
+        tasks = [
+            asyncio.ensure_future(
+                client.send_and_receive([RscpValue().withTagName(tag, None)])
+            )
+            for tag in POWER_TAGS
+        ]
+        await asyncio.sleep(0.01)
+        await server.stop()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(x, RscpConnectionException) for x in results)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Crypto executor
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestCryptoExecutor:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pipelined", [False, True])
+    async def test_iv_chain_is_kept_across_requests(self, server, pipelined):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            client = RscpClient(
+                "127.0.0.1",
+                server.port,
+                "user",
+                "password",
+                KEY,
+                max_frame_size=40,
+                pipelined=pipelined,
+                crypto_executor=executor,
+            )
+            await client._connect_and_login()
+
+            # several frames per request and several requests in a row, each
+            # of them continues the CBC chain of the previous one
+            for _ in range(3):
+                results = await _request_all(client)
+                assert _names_and_values(results) == [[x] for x in POWER_TAGS.values()]
+            client.client.disconnect()
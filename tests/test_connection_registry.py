@@ -0,0 +1,284 @@
+"""Tests for the connection shared by the config entries of a device (connection_registry.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from homeassistant.exceptions import ConfigEntryNotReady
+import pytest
+
+from e3dc_rscp_connect.connection_registry import (
+    RscpConnectionRegistry,
+    async_get_registry,
+)
+from e3dc_rscp_connect.const import POLL_GROUP_SLOW, POLL_GROUP_STATE
+from e3dc_rscp_connect import async_setup_entry
+from e3dc_rscp_connect.coordinator import E3dcRscpCoordinator
+from e3dc_rscp_connect.entities import with_entry_unique_ids
+from e3dc_rscp_connect.fleet_scheduler import async_get_fleet_scheduler
+
+from .helpers import create_coordinator, create_entry
+
+
+def _listener(coordinator: E3dcRscpCoordinator, data_fields):
+    update = Mock()
+    coordinator.async_add_listener(update, data_fields)
+    return update
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Registry
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestRegistry:
+    def test_entries_of_a_device_share_the_client(self):
+        registry = RscpConnectionRegistry()
+        create = Mock(side_effect=lambda: Mock())
+
+        first = registry.acquire(("host", 5033, "user"), "a", {}, {}, create)
+        second = registry.acquire(("host", 5033, "user"), "b", {}, {}, create)
+        other = registry.acquire(("other", 5033, "user"), "c", {}, {}, create)
+
+        assert first is second
+        assert other is not first
+        assert create.call_count == 2
+        assert registry.entry_count(("host", 5033, "user")) == 2
+
+    def test_last_entry_closes_the_client(self):
+        registry = RscpConnectionRegistry()
+        client = registry.acquire(("host", 5033, "user"), "a", {}, {}, Mock)
+        registry.acquire(("host", 5033, "user"), "b", {}, {}, Mock)
+
+        registry.release(("host", 5033, "user"), "a")
+        client.close.assert_not_called()
+        registry.release(("host", 5033, "user"), "b")
+        client.close.assert_called_once()
+
+        # releasing again does nothing
+        registry.release(("host", 5033, "user"), "b")
+        assert registry.entry_count(("host", 5033, "user")) == 0
+
+    def test_groups_are_polled_with_the_shortest_interval(self):
+        registry = RscpConnectionRegistry()
+        key = ("host", 5033, "user")
+        client = registry.acquire(key, "a", {"state": 30, "slow": 600}, {}, Mock)
+        registry.acquire(key, "b", {"state": 60, "slow": 60}, {}, Mock)
+
+        client.set_poll_intervals.assert_called_with({"state": 30, "slow": 60})
+
+        registry.release(key, "b")
+        client.set_poll_intervals.assert_called_with({"state": 30, "slow": 600})
+
+    def test_polls_are_expected_in_the_shortest_update_interval(self):
+        registry = RscpConnectionRegistry()
+        key = ("host", 5033, "user")
+        client = registry.acquire(key, "a", {}, {}, Mock, update_interval=60)
+        registry.acquire(key, "b", {}, {}, Mock, update_interval=10)
+
+        client.set_update_interval.assert_called_with(10)
+
+        registry.release(key, "b")
+        client.set_update_interval.assert_called_with(60)
+
+    def test_differing_options_are_logged(self, caplog):
+        registry = RscpConnectionRegistry()
+        key = ("host", 5033, "user")
+        registry.acquire(key, "a", {}, {"pipelined": True, "read_timeout": 10}, Mock)
+
+        registry.acquire(key, "b", {}, {"pipelined": False, "read_timeout": 10}, Mock)
+
+        assert "Connection options pipelined of entry b differ" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_registry_is_kept_in_hass_data(self, hass):
+        registry = async_get_registry(hass)
+
+        assert async_get_registry(hass) is registry
+        assert hass.data["e3dc_rscp_connect"]["connections"] is registry
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Shared client
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestSharedClient:
+    @pytest.mark.asyncio
+    async def test_entries_of_a_device_use_one_connection(self, hass, server):
+        monitor = create_coordinator(hass, server, "monitor", slow_interval=60)
+        control = create_coordinator(hass, server, "control")
+
+        assert monitor.client is control.client
+        assert monitor.client.poll_intervals == {
+            POLL_GROUP_STATE: 30,
+            POLL_GROUP_SLOW: 60,
+        }
+        await asyncio.gather(monitor._async_update_data(), control._async_update_data())
+
+        assert server.connections == 1
+        assert monitor.connection_entries == 2
+        await monitor.async_shutdown()
+        await control.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_entries_with_other_credentials_use_their_own_client(
+        self, hass, server
+    ):
+        monitor = create_coordinator(hass, server, "monitor")
+        other = create_coordinator(hass, server, "other", password="other")
+
+        assert monitor.client is not other.client
+        assert monitor.connection_entries == 1
+        await monitor.async_shutdown()
+        await other.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_polls_are_merged(self, hass, server):
+        monitor = create_coordinator(hass, server, "monitor")
+        control = create_coordinator(hass, server, "control")
+        await monitor._async_update_data()
+        polls = len(server.requests)
+
+        await asyncio.gather(monitor.client.fetch_data(), control.client.fetch_data())
+
+        assert monitor.client.merged_polls == 1
+        # the poll was split into frames, but sent once
+        assert len(server.requests) - polls == monitor.client.last_poll_frame_count
+        await monitor.async_shutdown()
+        await control.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_each_entry_updates_its_entities(self, hass, server):
+        monitor = create_coordinator(hass, server, "monitor")
+        control = create_coordinator(hass, server, "control")
+        monitor_pv = _listener(monitor, ("storage.powers.pv",))
+        control_pv = _listener(control, ("storage.powers.pv",))
+        monitor.async_update_listeners()
+        control.async_update_listeners()
+
+        await monitor._async_update_data()
+        monitor.async_update_listeners()
+        control.async_update_listeners()
+
+        # the poll of one entry updates the entities of both
+        assert monitor_pv.call_count == 2
+        assert control_pv.call_count == 2
+        control.async_update_listeners()
+        assert control_pv.call_count == 2
+        await monitor.async_shutdown()
+        await control.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_connection_is_closed_with_the_last_entry(self, hass, server):
+        monitor = create_coordinator(hass, server, "monitor")
+        control = create_coordinator(hass, server, "control")
+        await monitor._async_update_data()
+
+        await monitor.async_shutdown()
+        await control._async_update_data()
+        assert control.client.client.is_connected()
+
+        await control.async_shutdown()
+        assert not control.client.client.is_connected()
+        assert server.connections == 1
+
+    @pytest.mark.asyncio
+    async def test_entities_of_other_entries_get_their_own_unique_ids(
+        self, hass, server
+    ):
+        monitor_entry = create_entry(server, "monitor")
+        control_entry = create_entry(server, "control")
+        hass.config_entries.async_entries = Mock(
+            return_value=[monitor_entry, control_entry]
+        )
+        # created in another order than the entries
+        control = E3dcRscpCoordinator(hass, control_entry)
+        monitor = E3dcRscpCoordinator(hass, monitor_entry)
+        entities = [Mock(_attr_unique_id="s10_123_soc")]
+
+        assert monitor.unique_id_suffix == ""
+        assert control.unique_id_suffix == "_control"
+        with_entry_unique_ids(control, entities)
+        assert entities[0]._attr_unique_id == "s10_123_soc_control"
+        await monitor.async_shutdown()
+        await control.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_entries_with_other_credentials_get_their_own_unique_ids(
+        self, hass, server
+    ):
+        monitor_entry = create_entry(server, "monitor")
+        control_entry = create_entry(server, "control", username="admin")
+        hass.config_entries.async_entries = Mock(
+            return_value=[monitor_entry, control_entry]
+        )
+        monitor = E3dcRscpCoordinator(hass, monitor_entry)
+        control = E3dcRscpCoordinator(hass, control_entry)
+
+        # separate connections to the same storage
+        assert monitor.client is not control.client
+        assert control.connection_entries == 1
+        assert monitor.unique_id_suffix == ""
+        assert control.unique_id_suffix == "_control"
+        await monitor.async_shutdown()
+        await control.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_remote_control_is_stopped_by_its_entry_only(self, hass, server):
+        monitor = create_coordinator(hass, server, "monitor")
+        control = create_coordinator(hass, server, "control")
+        control.client.disable_remote_control = AsyncMock()
+        control.client.send_battery_remote_power = AsyncMock(return_value=True)
+        await control.start_remote_control()
+
+        await monitor.stop_remote_control()
+        control.client.disable_remote_control.assert_not_called()
+        assert control.remote_control_active
+
+        await control.stop_remote_control()
+        control.client.disable_remote_control.assert_called_once()
+        await monitor.async_shutdown()
+        await control.async_shutdown()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Setup
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestSetup:
+    @pytest.mark.asyncio
+    async def test_setup_connects_through_the_client(self, hass, server):
+        hass.config_entries.async_forward_entry_setups = AsyncMock()
+        entry = create_entry(server, "entry1")
+
+        assert await async_setup_entry(hass, entry)
+
+        coordinator = hass.data["e3dc_rscp_connect"]["entry1"]["coordinator"]
+        assert coordinator.client.supervisor.stats.connects == 1
+        assert server.connections == 1
+        await coordinator.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_failed_setup_releases_the_client_and_the_poll_slot(
+        self, hass, server
+    ):
+        entry = create_entry(server, "entry1")
+        other_entry = create_entry(server, "entry2")
+        await server.stop()
+
+        with pytest.raises(ConfigEntryNotReady):
+            await async_setup_entry(hass, entry)
+
+        coordinator = E3dcRscpCoordinator(hass, other_entry)
+        assert coordinator.connection_entries == 1
+        assert async_get_fleet_scheduler(hass).entries == 1
+        await coordinator.async_shutdown()
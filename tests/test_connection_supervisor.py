@@ -0,0 +1,405 @@
+"""Tests for the backoff and circuit breaker of the connection (connection_supervisor.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+import pytest
+
+from e3dc_rscp_connect.client import RscpClient
+from e3dc_rscp_connect.connection_supervisor import (
+    CircuitState,
+    ConnectionSupervisor,
+    RscpAuthorizationException,
+    RscpCircuitOpenException,
+    RscpCommunicationException,
+    RscpConnectFailedException,
+    RscpRequestTimeoutException,
+)
+from e3dc_rscp_connect.diagnostics import async_get_config_entry_diagnostics
+from e3dc_rscp_connect.request_queue import RequestPriority
+from rscp_lib.RscpConnection import RscpConnectionException
+
+from .fake_rscp_server import FakeRscpServer
+from .helpers import KEY, FakeClock, create_coordinator, wait_for
+
+
+def _supervisor(clock: FakeClock, random_value: float = 0.5, **kwargs):
+    "Returns a supervisor, the jitter is 0 with the default random_value."
+    return ConnectionSupervisor(
+        backoff_initial=10,
+        backoff_max=60,
+        clock=clock,
+        random_source=lambda: random_value,
+        **kwargs,
+    )
+
+
+def _fail(supervisor: ConnectionSupervisor, times: int = 1) -> None:
+    for _ in range(times):
+        supervisor.before_request()
+        supervisor.record_failure(RscpConnectionException("refused"))
+
+
+def _client(server: FakeRscpServer, clock: FakeClock, **kwargs) -> RscpClient:
+    return RscpClient(
+        "127.0.0.1",
+        server.port,
+        "user",
+        kwargs.pop("password", "password"),
+        KEY,
+        read_timeout=kwargs.pop("read_timeout", 10),
+        supervisor=_supervisor(clock, **kwargs),
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Circuit breaker
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestCircuitBreaker:
+    def test_failures_below_the_threshold_keep_the_circuit_closed(self):
+        supervisor = _supervisor(FakeClock())
+
+        _fail(supervisor, 2)
+
+        assert supervisor.state is CircuitState.CLOSED
+        supervisor.before_request()
+
+    def test_circuit_opens_at_the_threshold(self):
+        clock = FakeClock()
+        supervisor = _supervisor(clock)
+
+        _fail(supervisor, 3)
+
+        assert supervisor.state is CircuitState.OPEN
+        assert supervisor.retry_in == 10
+        with pytest.raises(RscpCircuitOpenException, match="paused for 10 s"):
+            supervisor.before_request()
+        assert supervisor.stats.rejected == 1
+        assert supervisor.stats.circuit_opened == 1
+
+    def test_half_open_circuit_allows_a_single_probe(self):
+        clock = FakeClock()
+        supervisor = _supervisor(clock)
+        _fail(supervisor, 3)
+        clock.now += 10
+
+        assert supervisor.state is CircuitState.HALF_OPEN
+        supervisor.before_request()
+        with pytest.raises(RscpCircuitOpenException, match="being probed"):
+            supervisor.before_request()
+
+        supervisor.record_success()
+
+        assert supervisor.state is CircuitState.CLOSED
+        supervisor.before_request()
+
+    def test_failed_probes_double_the_backoff_up_to_the_maximum(self):
+        clock = FakeClock()
+        supervisor = _supervisor(clock)
+        _fail(supervisor, 3)
+
+        backoffs = []
+        for _ in range(4):
+            backoffs.append(supervisor.retry_in)
+            clock.now += supervisor.retry_in
+            _fail(supervisor)
+
+        assert backoffs == [10, 20, 40, 60]
+
+    def test_backoff_varies_by_the_jitter(self):
+        low = _supervisor(FakeClock(), random_value=0.0, jitter=0.2)
+        high = _supervisor(FakeClock(), random_value=1.0, jitter=0.2)
+
+        _fail(low, 3)
+        _fail(high, 3)
+
+        assert low.retry_in == pytest.approx(8)
+        assert high.retry_in == pytest.approx(12)
+
+    def test_cancelled_probe_allows_the_next_probe(self):
+        clock = FakeClock()
+        supervisor = _supervisor(clock)
+        _fail(supervisor, 3)
+        clock.now += 10
+        supervisor.before_request()
+
+        supervisor.record_cancelled()
+
+        supervisor.before_request()
+
+    def test_downtime_is_measured_from_the_first_failure(self):
+        clock = FakeClock()
+        supervisor = _supervisor(clock)
+        _fail(supervisor, 3)
+        clock.now += 15
+
+        assert supervisor.as_dict()["current_downtime"] == 15
+        supervisor.before_request()
+        supervisor.record_success()
+
+        assert supervisor.as_dict()["current_downtime"] == 0
+        assert supervisor.stats.downtime == 15
+        assert supervisor.stats.consecutive_failures == 0
+        assert supervisor.stats.last_error == "RscpConnectionException: refused"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Client
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestSupervisedClient:
+    @pytest.mark.asyncio
+    async def test_open_circuit_pauses_the_polls(self, server):
+        clock = FakeClock()
+        client = _client(server, clock)
+        await client.identify_device()
+        server.disconnect_after = 0
+
+        for _ in range(3):
+            with pytest.raises(RscpCommunicationException):
+                await client.fetch_data()
+        connections = server.connections
+
+        with pytest.raises(RscpCircuitOpenException):
+            await client.fetch_data()
+
+        # the paused poll doesn't connect
+        assert server.connections == connections
+        assert client.poll_metrics.failed == 3
+
+    @pytest.mark.asyncio
+    async def test_probe_closes_the_circuit(self, server):
+        clock = FakeClock()
+        client = _client(server, clock)
+        await client.identify_device()
+        server.disconnect_after = 0
+        for _ in range(3):
+            with pytest.raises(RscpCommunicationException):
+                await client.fetch_data()
+
+        server.disconnect_after = None
+        clock.now += client.supervisor.retry_in
+        await client.fetch_data()
+
+        assert client.supervisor.state is CircuitState.CLOSED
+        assert client.storage.bat_soc == server.plant.bat_soc
+        stats = client.supervisor.stats
+        assert stats.connects == server.connections
+        assert stats.reconnects == server.connections - 1
+        assert stats.downtime == 10
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_control_commands_are_paused_with_the_polls(self, server):
+        client = _client(server, FakeClock())
+        await client.identify_device()
+        server.disconnect_after = 0
+        for _ in range(3):
+            with pytest.raises(RscpCommunicationException):
+                await client.fetch_data()
+        server.disconnect_after = None
+        connections = server.connections
+
+        with pytest.raises(RscpCircuitOpenException):
+            await client.send_set_max_charge_current(0, 16)
+        with pytest.raises(RscpCircuitOpenException):
+            await client.send_battery_remote_power(500)
+
+        assert server.connections == connections
+        assert client.supervisor.stats.rejected == 2
+
+    @pytest.mark.asyncio
+    async def test_control_command_reconnects(self, server):
+        client = _client(server, FakeClock())
+        await client.identify_device()
+        client.client.disconnect()
+
+        await client.send_set_max_charge_current(0, 16)
+
+        assert server.connections == 2
+        assert client.supervisor.stats.reconnects == 1
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_request_timeouts_keep_the_circuit_closed(self, server):
+        # the connection stays usable, a broken one is closed by the read timeout
+        client = _client(server, FakeClock())
+        await client.identify_device()
+        server.latency = 0.2
+
+        with patch.dict(
+            "e3dc_rscp_connect.client.REQUEST_TIMEOUTS",
+            {RequestPriority.POLL: 0.05},
+        ):
+            for _ in range(4):
+                with pytest.raises(RscpRequestTimeoutException):
+                    await client.fetch_data()
+        server.latency = 0.0
+
+        assert client.supervisor.state is CircuitState.CLOSED
+        assert client.supervisor.stats.failures == 0
+        await client.fetch_data()
+        assert client.storage.bat_soc == server.plant.bat_soc
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_refused_connection_is_a_connect_error(self, server):
+        client = _client(server, FakeClock())
+        await server.stop()
+
+        with pytest.raises(RscpConnectFailedException):
+            await client.identify_device()
+
+        assert client.supervisor.stats.connects == 0
+
+    @pytest.mark.asyncio
+    async def test_wrong_password_is_an_authorization_error(self, server):
+        client = _client(server, FakeClock(), password="wrong")
+
+        with pytest.raises(RscpAuthorizationException):
+            await client.identify_device()
+
+        assert not client.client.is_connected()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Coordinator
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestCoordinator:
+    @pytest.mark.asyncio
+    async def test_paused_polls_fail_the_update_and_show_in_diagnostics(
+        self, hass, server, caplog
+    ):
+        coordinator = create_coordinator(hass, server)
+        await coordinator._async_update_data()
+        server.disconnect_after = 0
+
+        for _ in range(4):
+            with pytest.raises(UpdateFailed):
+                await coordinator._async_update_data()
+
+        # connection errors are expected, they are logged without traceback
+        assert "Exception in update_data" not in caplog.text
+        diagnostics = await async_get_config_entry_diagnostics(
+            hass, Mock(entry_id="entry", data={}, options={})
+        )
+        connection = diagnostics["connection"]
+        assert connection["state"] == "open"
+        assert connection["failures"] == 3
+        assert connection["rejected"] == 1
+        assert connection["last_error"].startswith("RscpConnectionException")
+        await coordinator.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_lost_connection_is_established_ahead_of_the_update(
+        self, hass, server
+    ):
+        coordinator = create_coordinator(hass, server)
+        # the keep-alive connects CONNECT_AHEAD (2 s) before the update, which
+        # is due at the phase of the entry, 1.025 to 3.075 s after the last one
+        coordinator.poll_interval = timedelta(seconds=2.05)
+        await coordinator._async_update_data()
+        server.disconnect_after = 0
+        with pytest.raises(UpdateFailed):
+            await coordinator._async_update_data()
+        server.disconnect_after = None
+
+        await wait_for(coordinator.client.client.is_authorized, timeout=2.0)
+
+        assert server.connections == 2
+        await coordinator.async_shutdown()
+        coordinator.client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_idle_connection_gets_keep_alives(self, hass, server):
+        coordinator = create_coordinator(hass, server)
+        with patch("e3dc_rscp_connect.coordinator.KEEP_ALIVE_INTERVAL", 0.02):
+            await coordinator._async_update_data()
+
+            await wait_for(lambda: coordinator.client.keep_alives >= 2)
+
+        assert server.requests[-1] == ["TAG_RSCP_REQ_USER_LEVEL"]
+        assert server.connections == 1
+        await coordinator.async_shutdown()
+        coordinator.client.client.disconnect()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Keep-alive and read timeout
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestKeepAlive:
+    @pytest.mark.asyncio
+    async def test_idle_connection_gets_a_keep_alive_request(self, server):
+        client = _client(server, FakeClock())
+        await client.identify_device()
+        requests = len(server.requests)
+
+        await client.keep_alive()
+
+        assert server.requests[requests:] == [["TAG_RSCP_REQ_USER_LEVEL"]]
+        assert client.keep_alives == 1
+        assert client.idle_time < 1
+
+        # recently used connections don't need one
+        await client.keep_alive(max_idle=60)
+        assert client.keep_alives == 1
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_lost_connection_is_established_without_request(self, server):
+        client = _client(server, FakeClock())
+        await client.identify_device()
+        client.client.disconnect()
+        requests = len(server.requests)
+
+        await client.keep_alive()
+
+        assert server.connections == 2
+        assert client.client.is_authorized()
+        # only the authentication
+        assert server.requests[requests:] == [["TAG_RSCP_REQ_AUTHENTICATION"]]
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_failed_keep_alive_reconnects(self, server):
+        client = _client(server, FakeClock())
+        await client.identify_device()
+        server.disconnect()
+
+        await client.keep_alive()
+
+        assert server.connections == 2
+        assert client.client.is_authorized()
+        assert client.supervisor.stats.failures == 1
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_read_timeout_detects_a_half_open_connection(self, server):
+        client = _client(server, FakeClock(), read_timeout=0.05)
+        await client.identify_device()
+        server.latency = 1.0
+
+        with pytest.raises(RscpCommunicationException, match="No data received"):
+            await client.fetch_data()
+        assert not client.client.is_connected()
+
+        server.latency = 0.0
+        await client.fetch_data()
+        assert client.storage.bat_soc == server.plant.bat_soc
+        client.client.disconnect()
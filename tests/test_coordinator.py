@@ -0,0 +1,136 @@
+"""Tests for the entity updates of the coordinator (coordinator.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+from unittest.mock import Mock
+
+from homeassistant.core import HomeAssistant
+import pytest
+import pytest_asyncio
+
+from e3dc_rscp_connect.coordinator import E3dcRscpCoordinator
+
+
+OPTIONS = {
+    "host": "127.0.0.1",
+    "port": 5033,
+    "username": "user",
+    "password": "password",
+    "key": "key",
+}
+
+
+@pytest_asyncio.fixture
+async def coordinator(tmp_path):
+    coordinator = E3dcRscpCoordinator(
+        HomeAssistant(str(tmp_path)), Mock(options=OPTIONS)
+    )
+    coordinator.client.pop_changed_fields = Mock(return_value=set())
+    yield coordinator
+    await coordinator.async_shutdown()
+
+
+def _listener(coordinator, data_fields):
+    update = Mock()
+    coordinator.async_add_listener(update, data_fields)
+    return update
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Change-aware entity updates
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestEntityUpdates:
+    @pytest.mark.asyncio
+    async def test_only_entities_of_changed_fields_are_updated(self, coordinator):
+        pv = _listener(coordinator, ("storage.powers.pv",))
+        grid = _listener(coordinator, ("storage.powers.grid",))
+        always = _listener(coordinator, None)
+        coordinator.async_update_listeners()
+        coordinator.client.pop_changed_fields.return_value = {"storage.powers.pv"}
+
+        coordinator.async_update_listeners()
+
+        assert pv.call_count == 2
+        assert grid.call_count == 1
+        assert always.call_count == 2
+        assert coordinator.poll_metrics["entity_updates"].last == 2
+
+    @pytest.mark.asyncio
+    async def test_availability_change_updates_all_entities(self, coordinator):
+        soc = _listener(coordinator, ("storage.bat_soc",))
+        remote = _listener(coordinator, ())
+        coordinator.async_update_listeners()
+
+        coordinator.last_update_success = False
+        coordinator.async_update_listeners()
+        coordinator.async_update_listeners()
+
+        assert soc.call_count == 2
+        assert remote.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_marked_fields_are_updated_once(self, coordinator):
+        currents = _listener(coordinator, ("wallboxes.1.currents",))
+        coordinator.async_update_listeners()
+
+        coordinator.async_mark_changed("wallboxes.1.currents")
+        coordinator.async_update_listeners()
+        coordinator.async_update_listeners()
+
+        assert currents.call_count == 2
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Power write filters
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestPowerWriteFilters:
+    @pytest.mark.asyncio
+    async def test_no_filter_without_limits(self, coordinator):
+        assert coordinator.create_power_write_filter("Grid Power") is None
+        assert coordinator.write_filters == {}
+
+    @pytest.mark.asyncio
+    async def test_filters_use_the_options(self, tmp_path):
+        options = {
+            **OPTIONS,
+            "power_deadband": 25,
+            "power_deadband_percent": 2.5,
+            "power_min_write_interval": 5,
+        }
+        coordinator = E3dcRscpCoordinator(
+            HomeAssistant(str(tmp_path)), Mock(options=options)
+        )
+
+        write_filter = coordinator.create_power_write_filter("Grid Power")
+
+        assert write_filter.deadband == 25
+        assert write_filter.deadband_percent == 2.5
+        assert write_filter.min_interval == 5
+        assert coordinator.write_filters == {"Grid Power": write_filter}
+        await coordinator.async_shutdown()
+
+
+class TestClientOptions:
+    @pytest.mark.asyncio
+    async def test_frame_size_uses_the_option(self, tmp_path):
+        coordinator = E3dcRscpCoordinator(
+            HomeAssistant(str(tmp_path)),
+            Mock(options={**OPTIONS, "max_frame_size": 256}),
+        )
+
+        assert coordinator.client.max_frame_size == 256
+        await coordinator.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_frame_size_defaults_to_the_byte_budget(self, coordinator):
+        assert coordinator.client.max_frame_size == 512
@@ -0,0 +1,110 @@
+"""Tests for DeadlineScheduler (deadline_scheduler.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import asyncio
+import contextlib
+import time
+
+import pytest
+
+from e3dc_rscp_connect.deadline_scheduler import DeadlineScheduler
+
+PERIOD = 0.02
+
+
+async def _run_for(scheduler: DeadlineScheduler, duration: float) -> None:
+    task = asyncio.ensure_future(scheduler.run())
+    await asyncio.sleep(duration)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Ticks
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestTicks:
+    @pytest.mark.asyncio
+    async def test_ticks_do_not_drift_with_callback_duration(self):
+        calls = []
+
+        async def callback():
+            calls.append(time.monotonic())
+            # half a period of work would add up with sleep(period)
+            await asyncio.sleep(PERIOD / 2)
+
+        scheduler = DeadlineScheduler(PERIOD, callback)
+        await _run_for(scheduler, 10.5 * PERIOD)
+
+        assert len(calls) == 11
+        # the ticks stay on the grid of the first tick
+        assert calls[-1] - calls[0] == pytest.approx(10 * PERIOD, abs=PERIOD / 2)
+        assert scheduler.stats.skipped == 0
+
+    @pytest.mark.asyncio
+    async def test_missed_ticks_are_skipped(self):
+        calls = []
+
+        async def callback():
+            calls.append(time.monotonic())
+            if len(calls) == 2:
+                await asyncio.sleep(3.5 * PERIOD)
+
+        scheduler = DeadlineScheduler(PERIOD, callback)
+        await _run_for(scheduler, 6.5 * PERIOD)
+
+        # the second call blocked ticks 2, 3 and 4, only tick 4 is run late
+        assert scheduler.stats.skipped == 2
+        assert calls[2] - calls[1] == pytest.approx(3.5 * PERIOD, abs=PERIOD / 2)
+        assert len(calls) == 5
+        assert scheduler.stats.max_lateness >= PERIOD / 2 - 0.005
+        # time between the first two completed callbacks
+        assert scheduler.stats.max_interval >= 4.5 * PERIOD - 0.005
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Stats
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestStats:
+    @pytest.mark.asyncio
+    async def test_lateness_and_jitter_are_measured(self):
+        async def callback():
+            pass
+
+        scheduler = DeadlineScheduler(PERIOD, callback)
+        await _run_for(scheduler, 5.5 * PERIOD)
+
+        stats = scheduler.stats
+        assert stats.ticks == 6
+        assert 0 <= stats.mean_lateness <= stats.max_lateness < PERIOD
+        assert stats.jitter >= 0
+        assert stats.last_interval == pytest.approx(PERIOD, abs=PERIOD / 2)
+        assert stats.mean_lateness == stats.total_lateness / 6
+
+    @pytest.mark.asyncio
+    async def test_ticks_without_delivery_are_no_interval(self):
+        calls = []
+
+        async def callback():
+            calls.append(time.monotonic())
+            # every second tick holds its setpoint for a poll
+            return len(calls) % 2 == 1
+
+        scheduler = DeadlineScheduler(PERIOD, callback)
+        await _run_for(scheduler, 5.5 * PERIOD)
+
+        stats = scheduler.stats
+        assert stats.ticks == 6
+        assert stats.last_interval == pytest.approx(2 * PERIOD, abs=PERIOD / 2)
+        assert stats.max_interval >= 2 * PERIOD - 0.005
@@ -0,0 +1,105 @@
+"""Tests for the energy integration (model/EnergyAccumulator.py)."""
+
+import logging
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import pytest
+
+from e3dc_rscp_connect.model.EnergyAccumulator import EnergyAccumulator
+from e3dc_rscp_connect.model.StorageDataModel import EmsPowerModel
+
+
+def _powers(**kwargs) -> EmsPowerModel:
+    values = dict.fromkeys(
+        ("home", "battery", "grid", "pv", "additional", "wallbox", "wallbox_pv"), 0
+    )
+    return EmsPowerModel(**{**values, **kwargs})
+
+
+class TestEnergyAccumulator:
+    def test_first_poll_only_sets_the_start(self):
+        accumulator = EnergyAccumulator()
+
+        accumulator.integrate(_powers(home=1000), 100.0)
+
+        assert accumulator.get_model().home_consumption == 0.0
+
+    def test_trapezoidal_integration(self):
+        accumulator = EnergyAccumulator()
+        accumulator.set_update_interval(180)
+
+        accumulator.integrate(_powers(home=1000, pv=4000), 0.0)
+        accumulator.integrate(_powers(home=2000, pv=4000), 180.0)
+        accumulator.integrate(_powers(home=2000, pv=0), 360.0)
+
+        energy = accumulator.get_model()
+        # 1.5 kW for 0.05 h and 2 kW for 0.05 h
+        assert energy.home_consumption == pytest.approx(0.175)
+        assert energy.pv_production == pytest.approx(0.3)
+
+    def test_directions_are_counted_separately(self):
+        accumulator = EnergyAccumulator()
+        accumulator.set_update_interval(180)
+
+        accumulator.integrate(_powers(grid=-2000, battery=1000), 0.0)
+        accumulator.integrate(_powers(grid=-1000, battery=1000), 180.0)
+        accumulator.integrate(_powers(grid=1000, battery=-1000), 190.0)
+
+        energy = accumulator.get_model()
+        # 1.5 kW for 0.05 h, then half of 1 kW for 10 s per direction
+        assert energy.grid_production == pytest.approx(0.075 + 5 / 3600)
+        assert energy.grid_consumption == pytest.approx(5 / 3600)
+        assert energy.battery_charge == pytest.approx(0.05 + 5 / 3600)
+        assert energy.battery_discharge == pytest.approx(5 / 3600)
+
+    def test_unknown_power_is_not_integrated(self):
+        accumulator = EnergyAccumulator()
+
+        accumulator.integrate(_powers(wallbox=3600), 0.0)
+        accumulator.integrate(_powers(wallbox=None), 10.0)
+        accumulator.integrate(_powers(wallbox=3600), 20.0)
+        accumulator.integrate(_powers(wallbox=3600), 30.0)
+
+        # only the last 10 s
+        assert accumulator.get_model().wallbox_charge == pytest.approx(0.01)
+
+    def test_long_gaps_are_integrated_with_the_last_power(self, caplog):
+        caplog.set_level(logging.INFO)
+        accumulator = EnergyAccumulator()
+        accumulator.set_update_interval(10)
+
+        accumulator.integrate(_powers(home=1000), 0.0)
+        accumulator.integrate(_powers(home=3000), 36.0)
+        accumulator.integrate(_powers(home=3000), 48.0)
+
+        # 36 s with 1000 W held, then 12 s with 3000 W
+        assert accumulator.get_model().home_consumption == pytest.approx(0.02)
+        assert accumulator.as_dict()["estimated_gaps"] == 1
+        assert "No poll for 36 s" in caplog.text
+
+    def test_maximum_gap_follows_the_update_interval(self):
+        accumulator = EnergyAccumulator()
+        accumulator.set_update_interval(600)
+
+        accumulator.integrate(_powers(home=1000), 0.0)
+        accumulator.integrate(_powers(home=3000), 720.0)
+
+        assert accumulator.get_model().home_consumption == pytest.approx(0.4)
+        assert accumulator.as_dict()["estimated_gaps"] == 0
+
+    def test_changed_counters_are_tracked(self):
+        accumulator = EnergyAccumulator()
+        accumulator.integrate(_powers(home=1000), 0.0)
+        accumulator.get_model().pop_changed_fields()
+
+        accumulator.integrate(_powers(home=1000), 10.0)
+
+        assert accumulator.get_model().pop_changed_fields("energy.") == {
+            "energy.home_consumption"
+        }
@@ -10,24 +10,15 @@ sys.path.insert(0, str(custom_components_path))
 
 from unittest.mock import Mock
 import pytest
-from datetime import datetime, timedelta, UTC
 from e3dc_rscp_connect.entities import EnergySensor
+from e3dc_rscp_connect.model.EnergyDataModel import EnergyDataModel
 
 
 class MockCoordinator:
-    def __init__(self, data=None):
-        self.data = data or {}
-        self._listeners = []
+    def __init__(self):
         self.storage = Mock()
         self.storage.serial = "S10-123456789012"
-
-    def async_add_listener(self, callback, context=None):
-        self._listeners.append(callback)
-
-    def update_value(self, key, value):
-        self.data[key] = value
-        for cb in self._listeners:
-            cb()
+        self.energy = EnergyDataModel()
 
 
 @pytest.fixture
@@ -40,13 +31,22 @@ def coordinator():
     return MockCoordinator()
 
 
+def _restore(sensor, state):
+    async def mock_get_last_state():
+        return type("State", (), {"state": state})
+
+    sensor.async_get_last_state = mock_get_last_state
+    sensor.hass = Mock()
+    sensor.coordinator.async_add_listener = Mock()
+
+
 def test_energy_sensor_attributes(coordinator, mock_entry):
     """Test basic attributes of the energy sensor."""
     sensor = EnergySensor(
         coordinator=coordinator,
         entry=mock_entry,
         name="Grid Import",
-        sensor_value_id="grid_power",
+        channel="grid_consumption",
     )
 
     assert sensor.name == "Grid Import"
@@ -54,116 +54,50 @@ def test_energy_sensor_attributes(coordinator, mock_entry):
     assert sensor.native_unit_of_measurement == "kWh"
     assert sensor.device_class == "energy"
     assert sensor.state_class == "total_increasing"
+    assert sensor.coordinator_context == ("energy.grid_consumption",)
     assert sensor.native_value == 0.0
 
 
-@pytest.mark.asyncio
-async def test_restore_last_state(coordinator, mock_entry):
-    """Test restore of last known state."""
-    sensor = EnergySensor(
-        coordinator=coordinator,
-        entry=mock_entry,
-        name="Grid Import",
-        sensor_value_id="grid_power",
-    )
-
-    async def mock_get_last_state():
-        return type("State", (), {"state": "12.345"})
+def test_energy_sensor_reads_the_counter(coordinator, mock_entry):
+    """The sensor shows the counter of its channel."""
+    sensor = EnergySensor(coordinator, mock_entry, "Grid Export", "grid_production")
 
-    sensor.async_get_last_state = mock_get_last_state
-    await sensor.async_added_to_hass()
+    coordinator.energy.grid_production = 1.23456
+    coordinator.energy.grid_consumption = 7.0
 
-    assert sensor.native_value == 12.345
+    assert sensor.native_value == 1.235
 
 
 @pytest.mark.asyncio
-async def test_energy_calculation_positive_flow(coordinator, mock_entry):
-    """Test energy accumulation in positive direction."""
-    sensor = EnergySensor(
-        coordinator=coordinator,
-        entry=mock_entry,
-        name="Grid Import",
-        sensor_value_id="grid_power",
-    )
-
-    sensor.hass = Mock()
-    sensor.async_write_ha_state = Mock()
-
-    now = datetime.now(UTC)
-    sensor._last_update = now - timedelta(seconds=3600)
-    sensor._last_power = 1000  # 1 kW
+async def test_restore_last_state(coordinator, mock_entry):
+    """Test restore of last known state."""
+    sensor = EnergySensor(coordinator, mock_entry, "Grid Import", "grid_consumption")
+    _restore(sensor, "12.345")
 
-    coordinator.data["grid_power"] = 2000  # 2 kW
-    sensor._handle_coordinator_update()
+    await sensor.async_added_to_hass()
 
-    # Durchschnittsleistung: (1000+2000)/2 = 1500 W = 1.5 kW
-    # Dauer: 1 h → Energie: 1.5 kWh
-    assert round(sensor.native_value, 3) == 1.5
+    assert sensor.native_value == 12.345
 
 
 @pytest.mark.asyncio
-async def test_energy_calculation_positive_flow_data_getter(coordinator, mock_entry):
-    """Test energy accumulation in positive direction."""
-    sensor = EnergySensor(
-        coordinator=coordinator,
-        entry=mock_entry,
-        name="Grid Import",
-        data_getter=lambda: coordinator.storage.powers.grid,
-    )
+async def test_counting_continues_from_the_restored_state(coordinator, mock_entry):
+    """Energy counted before the restore isn't added twice."""
+    coordinator.energy.pv_production = 0.5
+    sensor = EnergySensor(coordinator, mock_entry, "PV", "pv_production")
+    _restore(sensor, "10.0")
 
-    sensor.hass = Mock()
-    sensor.async_write_ha_state = Mock()
-
-    now = datetime.now(UTC)
-    sensor._last_update = now - timedelta(seconds=3600)
-    sensor._last_power = 1000  # 1 kW
-
-    coordinator.storage.powers.grid = 2000
-
-    sensor._handle_coordinator_update()
+    await sensor.async_added_to_hass()
+    coordinator.energy.pv_production = 2.0
 
-    # Durchschnittsleistung: (1000+2000)/2 = 1500 W = 1.5 kW
-    # Dauer: 1 h → Energie: 1.5 kWh
-    assert round(sensor.native_value, 3) == 1.5
+    assert sensor.native_value == 11.5
 
 
 @pytest.mark.asyncio
-async def test_energy_calculation_negative_flow(coordinator, mock_entry):
-    """Test energy accumulation in negative direction with reverse sign."""
-    sensor = EnergySensor(
-        coordinator=coordinator,
-        entry=mock_entry,
-        name="Grid Export",
-        sensor_value_id="grid_power",
-        negative_direction=True,
-    )
-    sensor.hass = Mock()
-    sensor.async_write_ha_state = Mock()
-
-    # initialize sensor!
-    coordinator.data["grid_power"] = -2000  # -2 kW (-> zählt als +2kW)
-    sensor._handle_coordinator_update()
-
-    now = datetime.now(UTC)
-    sensor._last_update = now - timedelta(seconds=1800)  # 0.5 h
-
-    coordinator.data["grid_power"] = -1000  # -1 kW (-> zählt als +1kW)
-    sensor._handle_coordinator_update()
-
-    # Durchschnitt: (2+1)/2 = 1.5 kW, Dauer: 0.5 h → Energie: 0.75 kWh
-    assert round(sensor.native_value, 3) == 0.75
+async def test_invalid_restored_state(coordinator, mock_entry):
+    """An unavailable state starts counting at 0."""
+    sensor = EnergySensor(coordinator, mock_entry, "PV", "pv_production")
+    _restore(sensor, "unavailable")
 
-
-def test_missing_power_value_handling(coordinator, mock_entry):
-    """Test no exception when power value is missing in coordinator data."""
-    sensor = EnergySensor(
-        coordinator=coordinator,
-        entry=mock_entry,
-        name="PV",
-        sensor_value_id="pv_power",
-    )
-
-    # No data yet
-    sensor._handle_coordinator_update()
+    await sensor.async_added_to_hass()
 
     assert sensor.native_value == 0.0
@@ -0,0 +1,432 @@
+"""End to end tests of RscpClient against the simulated plant of the fake device."""
+
+import asyncio
+import logging
+from pathlib import Path
+import sys
+import time
+from unittest.mock import patch
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import pytest
+
+from e3dc_rscp_connect.client import RscpClient
+from e3dc_rscp_connect.connection_supervisor import RscpRequestTimeoutException
+from e3dc_rscp_connect.request_queue import RequestPriority
+from e3dc_rscp_connect.model.StorageRscpModel import (
+    DEVICE_DROP_ERRORS,
+    DEVICE_PROBE_INTERVAL,
+)
+from rscp_lib.RscpValue import RscpValue
+
+from .fake_plant import FakeInverter, FakePlant
+from .fake_rscp_server import FakeRscpServer
+from .helpers import KEY
+
+
+async def _connect(server: FakeRscpServer, **kwargs) -> RscpClient:
+    client = RscpClient("127.0.0.1", server.port, "user", "password", KEY, **kwargs)
+    await client.identify_device()
+    return client
+
+
+def _without_energy(changed: set[str]) -> set[str]:
+    return {x for x in changed if not x.startswith("energy.")}
+
+
+def _record_device_requests(server: FakeRscpServer) -> list[str]:
+    "Returns the list the requested inverter and battery indexes are appended to."
+    requests = []
+    answer = server.plant.answer
+
+    def record(request):
+        for name, index_tag in (
+            ("TAG_PVI_REQ_DATA", "TAG_PVI_INDEX"),
+            ("TAG_BAT_REQ_DATA", "TAG_BAT_INDEX"),
+        ):
+            if request.getTagName() == name:
+                requests.append(f"{name}[{request.get_child(index_tag).getValue()}]")
+        return answer(request)
+
+    server.plant.answer = record
+    return requests
+
+
+@pytest.fixture
+def plant() -> FakePlant:
+    return FakePlant.create(wallboxes=3, inverters=2, batteries=1)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Simulated plant
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestPlant:
+    @pytest.mark.asyncio
+    async def test_identifies_all_devices(self, server):
+        client = await _connect(server)
+
+        assert client.storage.serial == server.plant.serial
+        assert client.storage.sw_version == server.plant.sw_release
+        assert [x.serial for x in client.wallboxes] == [
+            "WB-000000",
+            "WB-000001",
+            "WB-000002",
+        ]
+        assert client.sg_ready.state == 1
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_poll_reads_plant_data(self, server):
+        client = await _connect(server)
+
+        # the first poll probes all inverter indexes
+        await client.fetch_data()
+        await client.fetch_data()
+
+        storage = client.storage
+        assert storage.powers.pv == server.plant.ems_power["TAG_EMS_POWER_PV"]
+        assert storage.bat_soc == server.plant.bat_soc
+        assert sorted(storage.inverters) == [0, 1]
+        assert storage.inverters[1].power_mppt[0] == pytest.approx(1000.0)
+        assert storage.inverters[1].power_mppt[1] == pytest.approx(1100.0)
+        assert list(storage.device_states.battery) == [0]
+        assert storage.device_states.battery[0].connected
+        wallbox = client.get_wallbox(2)
+        assert wallbox.cp_state == "C2"
+        assert wallbox.assigned_power == 3 * 3680
+        assert wallbox.currents.max == 16
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_set_requests_change_the_plant(self, server):
+        client = await _connect(server)
+        await client.fetch_data()
+
+        await client.send_set_max_charge_current(1, 10)
+        await client.send_battery_remote_power(-1500)
+
+        assert server.plant.wallboxes[1].max_charge_current == 10
+        assert server.plant.setpoint == -1500
+        await client.fetch_data()
+        assert client.get_wallbox(1).currents.max == 10
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_fluctuation_changes_the_power_values(self, server):
+        server.fluctuation = 0.1
+        client = await _connect(server)
+
+        await client.fetch_data()
+        first = client.storage.powers.pv
+        await client.fetch_data()
+
+        assert client.storage.powers.pv != first
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pipelined", [False, True])
+    async def test_poll_metrics(self, server, pipelined):
+        client = await _connect(server, pipelined=pipelined)
+
+        await client.fetch_data()
+        await client.fetch_data()
+
+        metrics = client.poll_metrics
+        assert metrics.polls == 2
+        assert metrics["request_tags"].last > 0
+        assert metrics["response_tags"].last == metrics["request_tags"].last
+        assert metrics["unhandled_tags"].last == 0
+        assert metrics["response_bytes"].last > metrics["request_bytes"].last > 0
+        assert metrics["frames"].last >= 1
+        for name in ("network", "decrypt", "decode", "dispatch"):
+            assert 0 < metrics[name].last < metrics["total"].last
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_energy_is_integrated(self, server):
+        client = await _connect(server)
+
+        await client.fetch_data()
+        await client.fetch_data()
+
+        energy = client.energy
+        assert energy.pv_production > 0
+        assert energy.home_consumption > 0
+        assert energy.grid_consumption == 0
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_changed_fields_of_a_poll(self, server):
+        client = await _connect(server)
+        await client.fetch_data()
+        client.pop_changed_fields()
+
+        await client.fetch_data()
+        # the energy grows with every poll
+        assert not _without_energy(client.pop_changed_fields())
+
+        server.plant.bat_soc = 12
+        server.plant.wallboxes[0].max_charge_current = 8
+        await client.fetch_data()
+        assert _without_energy(client.pop_changed_fields()) == {
+            "storage.bat_soc",
+            "wallboxes.0.currents.max",
+        }
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pipelined", [False, True])
+    async def test_steady_state_poll_is_quiet(self, server, pipelined, caplog):
+        client = await _connect(server, pipelined=pipelined)
+        # the first polls probe the inverters and report the missing battery
+        await client.fetch_data()
+        await client.fetch_data()
+        caplog.clear()
+
+        with (
+            caplog.at_level(logging.INFO),
+            patch.object(
+                RscpValue, "toString", autospec=True, side_effect=RscpValue.toString
+            ) as to_string,
+        ):
+            await client.fetch_data()
+
+        assert not caplog.records
+        to_string.assert_not_called()
+        client.client.disconnect()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Inverter and battery discovery
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestDeviceDiscovery:
+    @pytest.mark.asyncio
+    async def test_first_poll_probes_all_indexes(self, server):
+        client = await _connect(server)
+        requests = _record_device_requests(server)
+
+        await client.fetch_data()
+
+        assert requests == [
+            *[f"TAG_PVI_REQ_DATA[{index}]" for index in range(7)],
+            "TAG_BAT_REQ_DATA[0]",
+            "TAG_BAT_REQ_DATA[1]",
+        ]
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_only_answering_indexes_are_polled(self, server):
+        client = await _connect(server)
+        await client.fetch_data()
+        requests = _record_device_requests(server)
+
+        await client.fetch_data()
+
+        assert requests == [
+            "TAG_PVI_REQ_DATA[0]",
+            "TAG_PVI_REQ_DATA[1]",
+            "TAG_BAT_REQ_DATA[0]",
+        ]
+        assert list(client.storage.device_states.battery) == [0]
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_missing_indexes_are_probed_periodically(self, server):
+        client = await _connect(server)
+        await client.fetch_data()
+        server.plant.inverters.append(FakeInverter(dc_power=[500.0]))
+        requests = _record_device_requests(server)
+
+        with patch(
+            "e3dc_rscp_connect.model.StorageRscpModel.time.monotonic",
+            return_value=time.monotonic() + DEVICE_PROBE_INTERVAL,
+        ):
+            await client.fetch_data()
+        await client.fetch_data()
+
+        assert "TAG_PVI_REQ_DATA[6]" in requests
+        assert sorted(client.storage.inverters) == [0, 1, 2]
+        # the last poll requests the found inverters
+        assert requests[-4:] == [
+            *[f"TAG_PVI_REQ_DATA[{index}]" for index in range(3)],
+            "TAG_BAT_REQ_DATA[0]",
+        ]
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_index_answering_with_an_error_is_dropped(self, server):
+        client = await _connect(server)
+        await client.fetch_data()
+        server.plant.inverters.pop()
+        requests = _record_device_requests(server)
+
+        for _ in range(DEVICE_DROP_ERRORS + 1):
+            await client.fetch_data()
+
+        assert [x for x in requests if x.startswith("TAG_PVI")] == [
+            *["TAG_PVI_REQ_DATA[0]", "TAG_PVI_REQ_DATA[1]"] * DEVICE_DROP_ERRORS,
+            "TAG_PVI_REQ_DATA[0]",
+        ]
+        # the values of the dropped inverter are unknown
+        assert set(client.storage.inverters[1].power_mppt.values()) == {None}
+        assert client.poll_metrics["unhandled_tags"].last == 0
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_single_error_answer_keeps_index(self, server):
+        client = await _connect(server)
+        await client.fetch_data()
+        battery = server.plant.batteries.pop()
+        await client.fetch_data()
+        server.plant.batteries.append(battery)
+        requests = _record_device_requests(server)
+
+        await client.fetch_data()
+
+        assert "TAG_BAT_REQ_DATA[0]" in requests
+        assert client.storage.device_states.battery[0].working is not None
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_dropped_battery_state_is_unknown(self, server):
+        client = await _connect(server)
+        await client.fetch_data()
+        server.plant.batteries.pop()
+
+        for _ in range(DEVICE_DROP_ERRORS):
+            await client.fetch_data()
+
+        assert client.storage.device_states.battery[0].working is None
+        client.client.disconnect()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fault injection
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestFaults:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pipelined", [False, True])
+    async def test_split_segments_are_reassembled(self, server, pipelined):
+        client = await _connect(server, pipelined=pipelined)
+        # after the login, rscp_lib reads the authentication in a single chunk
+        server.segment_size = 7
+        server.segment_delay = 0.001
+
+        await client.fetch_data()
+
+        assert len(client.wallboxes) == 3
+        assert client.storage.bat_soc == server.plant.bat_soc
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_fails_poll_and_next_poll_reconnects(self, server):
+        client = await _connect(server)
+        server.disconnect_after = 1
+
+        with pytest.raises(Exception, match="Error during data fetch"):
+            await client.fetch_data()
+        assert not client.client.is_connected()
+        assert client.poll_metrics.failed == 1
+
+        server.disconnect_after = None
+        await client.fetch_data()
+
+        assert server.connections == 2
+        assert (
+            client.storage.powers.home == server.plant.ems_power["TAG_EMS_POWER_HOME"]
+        )
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_server_side_disconnect(self, server):
+        client = await _connect(server)
+
+        server.disconnect()
+
+        with pytest.raises(Exception, match="Error during data fetch"):
+            await client.fetch_data()
+        await client.fetch_data()
+        assert server.connections == 2
+        client.client.disconnect()
+
+
+def _serial_request() -> list[RscpValue]:
+    return [RscpValue().withTagName("TAG_INFO_REQ_SERIAL_NUMBER", None)]
+
+
+class TestTimeouts:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pipelined", [False, True])
+    async def test_late_response_is_dropped(self, server, pipelined):
+        client = await _connect(server, pipelined=pipelined)
+        server.latency = 0.2
+
+        with (
+            patch.dict(
+                "e3dc_rscp_connect.client.REQUEST_TIMEOUTS",
+                {RequestPriority.CONTROL: 0.05},
+            ),
+            pytest.raises(RscpRequestTimeoutException),
+        ):
+            await client.send_and_receive(_serial_request())
+        server.latency = 0.0
+
+        # the device answers in order, the late response arrives first
+        await client.fetch_data()
+
+        assert client.storage.bat_soc == server.plant.bat_soc
+        assert client.timeout_stats.timeouts["control"] == 1
+        assert client.timeout_stats.late_frames == 1
+        assert server.connections == 1
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_poll_keeps_the_connection(self, server):
+        client = await _connect(server)
+        server.latency = 0.2
+
+        with (
+            patch.dict(
+                "e3dc_rscp_connect.client.REQUEST_TIMEOUTS",
+                {RequestPriority.POLL: 0.05},
+            ),
+            pytest.raises(RscpRequestTimeoutException),
+        ):
+            await client.fetch_data()
+        server.latency = 0.0
+
+        assert client.client.is_connected()
+        assert client.poll_metrics.failed == 1
+        values = await client.send_and_receive(_serial_request())
+        assert values[0].getValue() == server.plant.serial
+        assert client.timeout_stats.timeouts["poll"] == 1
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_request_resynchronizes_the_stream(self, server):
+        client = await _connect(server)
+        server.latency = 0.1
+        request = asyncio.create_task(client.send_and_receive(_serial_request()))
+        await asyncio.sleep(0.02)
+
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        server.latency = 0.0
+
+        values = await client.send_and_receive(
+            [RscpValue().withTagName("TAG_INFO_REQ_SW_RELEASE", None)]
+        )
+        assert values[0].getValue() == server.plant.sw_release
+        assert client.timeout_stats.late_frames == 1
+        client.client.disconnect()
@@ -0,0 +1,235 @@
+"""Tests for the scheduling of the polls of many config entries (fleet_scheduler.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import asyncio
+from dataclasses import asdict
+from datetime import timedelta
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+import pytest_asyncio
+
+from e3dc_rscp_connect.diagnostics import async_get_config_entry_diagnostics
+from e3dc_rscp_connect.fleet_scheduler import (
+    DEFAULT_CRYPTO_WORKERS,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    FleetScheduler,
+)
+
+from .fake_plant import FakePlant
+from .fake_rscp_server import FakeRscpServer
+from .helpers import KEY, FakeClock, create_coordinator
+
+# number of fake devices of the load test
+FLEET_SIZE = 12
+
+
+@pytest_asyncio.fixture
+async def servers():
+    servers = [
+        FakeRscpServer(
+            KEY, plant=FakePlant.create(wallboxes=1, inverters=1, batteries=1)
+        )
+        for _ in range(FLEET_SIZE)
+    ]
+    for server in servers:
+        await server.start()
+    yield servers
+    for server in servers:
+        await server.stop()
+
+
+def _crypto_threads() -> int:
+    return sum(x.name.startswith("e3dc_rscp_crypto") for x in threading.enumerate())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Phases
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestPhases:
+    @pytest.mark.parametrize("entries", [2, 5, 12, 48])
+    def test_phases_are_spread_over_the_interval(self, entries):
+        scheduler = FleetScheduler()
+
+        phases = sorted(scheduler.register(f"entry{x}") for x in range(entries))
+
+        gaps = [b - a for a, b in zip(phases, [*phases[1:], phases[0] + 1])]
+        # at least half of the gap of evenly spread phases
+        assert min(gaps) >= 0.5 / entries
+
+    def test_freed_slot_is_reused(self):
+        scheduler = FleetScheduler()
+        phases = [scheduler.register(x) for x in ("a", "b", "c")]
+
+        scheduler.unregister("b")
+
+        assert scheduler.register("d") == phases[1]
+        assert scheduler.register("a") == phases[0]
+        assert scheduler.entries == 3
+
+    def test_polls_are_due_at_the_phase(self):
+        clock = FakeClock()
+        scheduler = FleetScheduler(clock=clock)
+        scheduler.register("a")
+        phase = scheduler.register("b")
+
+        assert scheduler.next_poll("a", 30) == 1020
+        assert scheduler.next_poll("b", 30) == pytest.approx(990 + 30 * phase + 30)
+
+    def test_next_poll_is_at_least_half_an_interval_away(self):
+        clock = FakeClock()
+        scheduler = FleetScheduler(clock=clock)
+        scheduler.register("a")
+
+        clock.now = 1019
+        assert scheduler.next_poll("a", 30) == 1050
+        clock.now = 1005
+        assert scheduler.next_poll("a", 30) == 1020
+
+    @pytest.mark.parametrize("interval", [0, -5])
+    def test_intervals_below_the_minimum_are_raised_to_it(self, interval):
+        clock = FakeClock()
+        scheduler = FleetScheduler(clock=clock)
+        scheduler.register("a")
+
+        assert scheduler.next_poll("a", interval) == 1001
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Poll slots
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestPollSlots:
+    @pytest.mark.asyncio
+    async def test_concurrent_polls_are_capped(self):
+        scheduler = FleetScheduler(max_concurrent_polls=2)
+        release = asyncio.Event()
+        running = []
+
+        async def poll(index):
+            async with scheduler.poll_slot():
+                running.append(index)
+                await release.wait()
+
+        tasks = [asyncio.create_task(poll(x)) for x in range(5)]
+        await asyncio.sleep(0.01)
+
+        assert running == [0, 1]
+        assert scheduler.in_flight == 2
+        release.set()
+        await asyncio.gather(*tasks)
+        assert asdict(scheduler.stats) == {
+            "polls": 5,
+            "queued": 3,
+            "peak_in_flight": 2,
+        }
+        assert scheduler.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_lateness_of_scheduled_polls(self):
+        clock = FakeClock()
+        scheduler = FleetScheduler(clock=clock)
+
+        async with scheduler.poll_slot(due=997.5) as lateness:
+            assert lateness == 2.5
+        async with scheduler.poll_slot(due=1001) as lateness:
+            assert lateness == 0
+        async with scheduler.poll_slot() as lateness:
+            assert lateness is None
+
+    def test_last_entry_stops_the_crypto_pool(self):
+        scheduler = FleetScheduler()
+        scheduler.register("a")
+        scheduler.register("b")
+        executor = scheduler.crypto_executor
+
+        assert scheduler.crypto_executor is executor
+        scheduler.unregister("a")
+        assert scheduler.as_dict()["crypto_pool_running"]
+        scheduler.unregister("b")
+        assert not scheduler.as_dict()["crypto_pool_running"]
+        with pytest.raises(RuntimeError):
+            executor.submit(print)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Load test
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestFleetLoad:
+    @pytest.mark.asyncio
+    async def test_many_devices_are_polled_staggered(self, hass, servers):
+        for server in servers:
+            server.latency = 0.01
+        coordinators = [
+            create_coordinator(hass, server, f"entry{index}", offload_crypto=True)
+            for index, server in enumerate(servers)
+        ]
+        for coordinator in coordinators:
+            coordinator.poll_interval = timedelta(seconds=1)
+        fleet = coordinators[0].fleet
+
+        # the first refresh of all entries at once is capped
+        await asyncio.gather(*(x.async_refresh() for x in coordinators))
+
+        assert fleet.stats.peak_in_flight == DEFAULT_MAX_CONCURRENT_POLLS
+        assert fleet.stats.queued >= FLEET_SIZE - DEFAULT_MAX_CONCURRENT_POLLS
+        assert _crypto_threads() <= DEFAULT_CRYPTO_WORKERS
+
+        # the scheduled polls are spread over the interval
+        fleet.stats.peak_in_flight = 0
+        unsubscribe = [x.async_add_listener(Mock()) for x in coordinators]
+        await asyncio.sleep(2.2)
+
+        assert fleet.stats.peak_in_flight < DEFAULT_MAX_CONCURRENT_POLLS
+        for coordinator, server in zip(coordinators, servers):
+            assert coordinator.last_update_success
+            assert coordinator.storage.bat_soc == server.plant.bat_soc
+            assert server.connections == 1
+            lateness = coordinator.poll_metrics["lateness"]
+            assert lateness.count >= 1
+            assert lateness.as_dict()["max"] < 0.5
+
+        diagnostics = await async_get_config_entry_diagnostics(
+            hass, Mock(entry_id="entry1", data={}, options={})
+        )
+        assert diagnostics["fleet"]["entries"] == FLEET_SIZE
+        assert diagnostics["fleet"]["poll_phase"] == coordinators[1].poll_phase
+        assert diagnostics["poll_metrics"]["lateness"]["count"] >= 1
+
+        for remove_listener in unsubscribe:
+            remove_listener()
+        for coordinator in coordinators:
+            await coordinator.async_shutdown()
+        assert fleet.entries == 0
+        assert not fleet.as_dict()["crypto_pool_running"]
+
+    @pytest.mark.asyncio
+    async def test_polls_are_scheduled_while_there_are_listeners(self, hass, servers):
+        coordinator = create_coordinator(hass, servers[0], "entry0")
+        coordinator.poll_interval = timedelta(seconds=0.2)
+        fleet = coordinator.fleet
+
+        with patch("e3dc_rscp_connect.fleet_scheduler.MIN_POLL_INTERVAL", 0.1):
+            await coordinator.async_refresh()
+            remove_listener = coordinator.async_add_listener(Mock())
+            await asyncio.sleep(0.7)
+            polls = fleet.stats.polls
+            assert polls >= 3
+
+            remove_listener()
+            await asyncio.sleep(0.5)
+            assert fleet.stats.polls == polls
+        await coordinator.async_shutdown()
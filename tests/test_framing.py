@@ -0,0 +1,278 @@
+"""Tests for RscpFrameDecoder (framing.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import struct
+from unittest.mock import patch
+
+import pytest
+from rscp_lib.RscpEncryption import RscpEncryption
+from rscp_lib.RscpFrame import RscpFrame
+from rscp_lib.RscpValue import RscpValue
+
+from e3dc_rscp_connect.framing import (
+    RscpFrameDecoder,
+    RscpRequest,
+    RscpRequestFrame,
+    split_values,
+)
+
+
+KEY = "test_key"
+
+
+def _frame(power: int) -> bytes:
+    "Returns a frame of 62 bytes, so it spans two cipher blocks."
+    return RscpFrame().packFrame(
+        [RscpValue().withTagName("TAG_EMS_POWER_HOME", power) for _ in range(4)]
+    )
+
+
+def _values(buffer: bytes) -> list:
+    "Returns the first value of each frame."
+    frame = RscpFrame()
+    frame.unpack(buffer)
+    return [frame.getRscpValues()[0].getValue()]
+
+
+@pytest.fixture
+def device():
+    """Encryption of the device side, its IV chain matches the decoder one."""
+    return RscpEncryption(KEY)
+
+
+@pytest.fixture
+def decoder():
+    return RscpFrameDecoder(RscpEncryption(KEY))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Encrypted stream
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestEncryptedStream:
+    def test_complete_frame_in_one_chunk(self, device, decoder):
+        decoder.feed(device.encrypt(_frame(100)))
+
+        frames = decoder.pop_frames()
+
+        assert len(frames) == 1
+        assert _values(frames[0]) == [100]
+        assert decoder.buffered_bytes == 0
+
+    def test_frame_split_across_chunks(self, device, decoder):
+        data = device.encrypt(_frame(100))
+
+        # split inside a cipher block
+        decoder.feed(data[:7])
+        assert not decoder.has_frames()
+        decoder.feed(data[7:40])
+        assert not decoder.has_frames()
+        decoder.feed(data[40:])
+
+        assert [_values(x) for x in decoder.pop_frames()] == [[100]]
+
+    def test_frame_with_length_multiple_of_block_size(self, device, decoder):
+        # 18 byte frame header + 7 byte value header + 7 byte CString = 32 bytes
+        frame = RscpFrame().packFrame(
+            [RscpValue().withTagName("TAG_INFO_SERIAL_NUMBER", "S10-123")]
+        )
+        assert len(frame) % RscpEncryption.BLOCK_SIZE == 0
+
+        decoder.feed(device.encrypt(frame))
+
+        frames = decoder.pop_frames()
+        assert len(frames) == 1
+        assert frames[0] == frame
+
+    def test_multiple_frames_in_one_chunk(self, device, decoder):
+        data = device.encrypt(_frame(1)) + device.encrypt(_frame(2))
+
+        decoder.feed(data)
+
+        assert [_values(x) for x in decoder.pop_frames()] == [[1], [2]]
+
+    def test_leftover_is_kept_for_next_frame(self, device, decoder):
+        first = device.encrypt(_frame(1))
+        second = device.encrypt(_frame(2))
+
+        decoder.feed(first + second[:40])
+        assert [_values(x) for x in decoder.pop_frames()] == [[1]]
+        assert decoder.buffered_bytes > 0
+
+        decoder.feed(second[40:])
+        assert [_values(x) for x in decoder.pop_frames()] == [[2]]
+        assert decoder.buffered_bytes == 0
+
+    def test_pop_frames_empties_decoder(self, device, decoder):
+        decoder.feed(device.encrypt(_frame(1)))
+        decoder.pop_frames()
+
+        assert not decoder.has_frames()
+        assert decoder.pop_frames() == []
+
+    def test_reset_drops_buffered_data(self, device, decoder):
+        decoder.feed(device.encrypt(_frame(1))[:20])
+        decoder.reset()
+
+        assert decoder.buffered_bytes == 0
+        assert not decoder.has_frames()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Plain stream & errors
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestPlainStream:
+    def test_frames_without_padding(self):
+        decoder = RscpFrameDecoder(None)
+        data = _frame(1) + _frame(2)
+
+        decoder.feed(data[:10])
+        decoder.feed(data[10:])
+
+        assert [_values(x) for x in decoder.pop_frames()] == [[1], [2]]
+
+    def test_crc_is_part_of_frame(self):
+        decoder = RscpFrameDecoder(None)
+        frame = bytearray(_frame(1))
+        # set the CRC flag in the ctrl field and append a dummy checksum
+        frame[2] |= 0x10
+        data = bytes(frame) + b"\x01\x02\x03\x04" + _frame(2)
+
+        decoder.feed(data)
+
+        frames = decoder.pop_frames()
+        assert len(frames) == 2
+        assert frames[0].endswith(b"\x01\x02\x03\x04")
+        assert _values(frames[1]) == [2]
+
+    def test_invalid_magic_raises_and_resets(self):
+        decoder = RscpFrameDecoder(None)
+
+        with pytest.raises(ValueError, match="out of sync"):
+            decoder.feed(b"\x12\x34" + bytes(30))
+
+        assert decoder.buffered_bytes == 0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RscpRequestFrame
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestRscpRequestFrame:
+    def test_pack_returns_valid_frame(self):
+        values = [RscpValue().withTagName("TAG_EMS_REQ_POWER_HOME", None)]
+        request = RscpRequestFrame(values)
+
+        frame = RscpFrame()
+        frame.unpack(request.pack())
+
+        assert [x.getTagName() for x in frame.getRscpValues()] == [
+            "TAG_EMS_REQ_POWER_HOME"
+        ]
+        assert request.values is values
+        assert len(request) == len(RscpFrame().packFrame(values))
+
+    def test_pack_updates_timestamp_only(self):
+        request = RscpRequestFrame(
+            [RscpValue().withTagName("TAG_EMS_REQ_POWER_HOME", None)]
+        )
+
+        with patch(
+            "e3dc_rscp_connect.framing.time.time_ns", return_value=5_000_000_007
+        ):
+            first = request.pack()
+        with patch(
+            "e3dc_rscp_connect.framing.time.time_ns", return_value=6_000_000_008
+        ):
+            second = request.pack()
+
+        assert struct.unpack_from("<QI", first, 4) == (5, 7)
+        assert struct.unpack_from("<QI", second, 4) == (6, 8)
+        assert first[:4] == second[:4]
+        assert first[16:] == second[16:]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# split_values & RscpRequest
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+def _requests(count: int) -> list[RscpValue]:
+    "Returns count values of 7 bytes each."
+    return [
+        RscpValue().withTagName("TAG_EMS_REQ_POWER_HOME", None) for _ in range(count)
+    ]
+
+
+class TestSplitValues:
+    def test_without_budget_returns_one_chunk(self):
+        values = _requests(10)
+
+        assert split_values(values, None) == [values]
+
+    def test_chunks_respect_budget(self):
+        # 18 byte header + 4 * 7 byte = 46 bytes
+        chunks = split_values(_requests(10), 46)
+
+        assert [len(x) for x in chunks] == [4, 4, 2]
+
+    def test_too_large_value_gets_own_frame(self):
+        container = RscpValue.construct_rscp_value(
+            "TAG_WB_REQ_DATA",
+            [("TAG_WB_INDEX", 0), ("TAG_WB_REQ_CP_STATE", None)] * 4,
+        )
+        values = [*_requests(1), container, *_requests(1)]
+
+        chunks = split_values(values, 30)
+
+        assert chunks == [[values[0]], [container], [values[2]]]
+
+    def test_empty_values_give_one_empty_chunk(self):
+        assert split_values([], 46) == [[]]
+
+
+class TestRscpRequest:
+    def test_frames_contain_all_values(self):
+        values = _requests(10)
+        request = RscpRequest(values, frozenset({"power"}), max_frame_size=46)
+
+        packed = request.pack()
+
+        assert len(packed) == 3
+        assert all(len(x) <= 46 for x in packed)
+        assert len(request) == sum(len(x) for x in packed)
+        assert request.values is values
+        assert all(frame.groups == {"power"} for frame in request.frames)
+
+        received = []
+        for buffer in packed:
+            frame = RscpFrame()
+            frame.unpack(buffer)
+            received.extend(frame.getRscpValues())
+        assert len(received) == 10
+
+    def test_extra_values_are_appended_to_last_frame(self):
+        request = RscpRequest(_requests(6), max_frame_size=46)
+        extra = RscpValue().withTagName("TAG_EMS_REQ_POWER_PV", None)
+
+        packed = request.pack([extra])
+
+        assert len(packed) == 2
+        frame = RscpFrame()
+        frame.unpack(packed[-1])
+        assert [x.getTagName() for x in frame.getRscpValues()][-1] == (
+            "TAG_EMS_REQ_POWER_PV"
+        )
+        # the cached frames stay unchanged
+        assert len(request.pack()[-1]) == len(packed[-1]) - extra.getPackedDataSize()
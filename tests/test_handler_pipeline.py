@@ -0,0 +1,330 @@
+"""Tests for RscpHandlerPipeline (model/RscpHandlerPipeline.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+from unittest.mock import Mock
+import pytest
+from rscp_lib.RscpValue import RscpValue
+
+from e3dc_rscp_connect.model.RscpHandlerPipeline import RscpHandlerPipeline
+from e3dc_rscp_connect.model.StorageRscpModel import StorageRscpModel
+from e3dc_rscp_connect.model.WallboxRscpModel import WallboxRscpModel
+
+from .fake_plant import error_value
+
+
+def _make_handler(tag_names=("TAG_EMS_REQ_POWER_HOME",), revision=0, handled_tags=()):
+    handler = Mock()
+    handler.get_handled_tags.return_value = list(handled_tags)
+    handler.handle_rscp_data.return_value = True
+    handler.get_rscp_tags.side_effect = lambda: [
+        RscpValue().withTagName(name, None) for name in tag_names
+    ]
+    handler.get_rscp_tag_groups.side_effect = lambda: {"power": handler.get_rscp_tags()}
+    handler.get_rscp_tags_revision.return_value = revision
+    return handler
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# collect_request
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestCollectRequest:
+    @pytest.mark.asyncio
+    async def test_contains_tags_of_all_handlers(self):
+        pipeline = RscpHandlerPipeline()
+        pipeline.add_handler(_make_handler(("TAG_EMS_REQ_POWER_HOME",)))
+        pipeline.add_handler(_make_handler(("TAG_EMS_REQ_POWER_PV",)))
+
+        request = await pipeline.collect_request()
+
+        assert [x.getTagName() for x in request.values] == [
+            "TAG_EMS_REQ_POWER_HOME",
+            "TAG_EMS_REQ_POWER_PV",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_request_is_reused(self):
+        pipeline = RscpHandlerPipeline()
+        handler = _make_handler()
+        pipeline.add_handler(handler)
+
+        first = await pipeline.collect_request()
+        second = await pipeline.collect_request()
+
+        assert first is second
+        handler.get_rscp_tags.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_rebuilt_when_handler_added(self):
+        pipeline = RscpHandlerPipeline()
+        pipeline.add_handler(_make_handler())
+        first = await pipeline.collect_request()
+
+        pipeline.add_handler(_make_handler(("TAG_EMS_REQ_POWER_PV",)))
+        second = await pipeline.collect_request()
+
+        assert first is not second
+        assert len(second.values) == 2
+
+    @pytest.mark.asyncio
+    async def test_rebuilt_when_revision_changes(self):
+        pipeline = RscpHandlerPipeline()
+        handler = _make_handler()
+        pipeline.add_handler(handler)
+        first = await pipeline.collect_request()
+
+        handler.get_rscp_tags_revision.return_value = 1
+        second = await pipeline.collect_request()
+
+        assert first is not second
+        assert handler.get_rscp_tags.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_storage_requests_inverter_identification_only_once(self):
+        pipeline = RscpHandlerPipeline()
+        pipeline.add_handler(StorageRscpModel("S10-1", "A-1", "MAC", "1.0"))
+
+        first = await pipeline.collect_request()
+        second = await pipeline.collect_request()
+        third = await pipeline.collect_request()
+
+        def count_pvi(request):
+            return sum(
+                1 for x in request.values if x.getTagName() == "TAG_PVI_REQ_DATA"
+            )
+
+        assert count_pvi(first) == 7
+        # no inverter answered, so no inverter is requested anymore
+        assert count_pvi(second) == 0
+        assert second is third
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# poll groups
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+def _make_grouped_handler():
+    handler = _make_handler()
+    handler.get_rscp_tag_groups.side_effect = lambda: {
+        "power": [RscpValue().withTagName("TAG_EMS_REQ_POWER_HOME", None)],
+        "state": [RscpValue().withTagName("TAG_EMS_REQ_EMERGENCY_POWER_STATUS", None)],
+        "slow": [RscpValue().withTagName("TAG_INFO_REQ_SW_RELEASE", None)],
+    }
+    return handler
+
+
+def _tag_names(request) -> list[str]:
+    return [x.getTagName() for x in request.values]
+
+
+class TestPollGroups:
+    def test_all_groups_due_initially(self):
+        pipeline = RscpHandlerPipeline({"state": 30, "slow": 600})
+
+        assert pipeline.get_due_groups(now=0) == {"power", "state", "slow"}
+
+    def test_groups_due_after_their_interval(self):
+        pipeline = RscpHandlerPipeline({"state": 30, "slow": 600})
+        pipeline.mark_polled(frozenset({"power", "state", "slow"}), now=100)
+
+        assert pipeline.get_due_groups(now=110) == {"power"}
+        assert pipeline.get_due_groups(now=130) == {"power", "state"}
+        assert pipeline.get_due_groups(now=700) == {"power", "state", "slow"}
+
+    def test_timer_jitter_is_tolerated(self):
+        pipeline = RscpHandlerPipeline({"state": 30})
+        pipeline.mark_polled(frozenset({"state"}), now=100)
+
+        assert "state" in pipeline.get_due_groups(now=129.8)
+
+    def test_request_group_polls_group_next_time(self):
+        pipeline = RscpHandlerPipeline({"state": 30, "slow": 600})
+        pipeline.mark_polled(frozenset({"power", "state", "slow"}), now=100)
+
+        pipeline.request_group("state")
+
+        assert pipeline.get_due_groups(now=101) == {"power", "state"}
+
+    def test_set_group_intervals(self):
+        pipeline = RscpHandlerPipeline()
+        pipeline.mark_polled(frozenset({"power", "state", "slow"}), now=100)
+        pipeline.set_group_intervals({"slow": 600})
+
+        assert pipeline.get_due_groups(now=110) == {"power", "state"}
+
+    @pytest.mark.asyncio
+    async def test_request_contains_due_groups_only(self):
+        pipeline = RscpHandlerPipeline({"state": 30, "slow": 600})
+        pipeline.add_handler(_make_grouped_handler())
+
+        first = await pipeline.collect_request(now=100)
+        pipeline.mark_polled(first.groups, now=100)
+        second = await pipeline.collect_request(now=110)
+
+        assert first.groups == {"power", "state", "slow"}
+        assert _tag_names(first) == [
+            "TAG_EMS_REQ_POWER_HOME",
+            "TAG_EMS_REQ_EMERGENCY_POWER_STATUS",
+            "TAG_INFO_REQ_SW_RELEASE",
+        ]
+        assert second.groups == {"power"}
+        assert _tag_names(second) == ["TAG_EMS_REQ_POWER_HOME"]
+
+    @pytest.mark.asyncio
+    async def test_request_is_cached_per_due_groups(self):
+        pipeline = RscpHandlerPipeline({"state": 30, "slow": 600})
+        handler = _make_grouped_handler()
+        pipeline.add_handler(handler)
+        pipeline.mark_polled(frozenset({"power", "state", "slow"}), now=100)
+
+        power_only = await pipeline.collect_request(now=110)
+        with_state = await pipeline.collect_request(now=130)
+
+        assert power_only is not with_state
+        assert await pipeline.collect_request(now=110) is power_only
+        assert await pipeline.collect_request(now=130) is with_state
+        assert handler.get_rscp_tag_groups.call_count == 2
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# process
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+def _wb_data(index: int) -> RscpValue:
+    return RscpValue.construct_rscp_value(
+        "TAG_WB_DATA", [("TAG_WB_INDEX", index), ("TAG_WB_CP_STATE", "C")]
+    )
+
+
+class TestProcess:
+    @pytest.mark.asyncio
+    async def test_routes_tag_to_declaring_handler(self):
+        pipeline = RscpHandlerPipeline()
+        other = _make_handler(handled_tags=[("TAG_EMS_POWER_PV", None)])
+        owner = _make_handler(handled_tags=[("TAG_EMS_POWER_HOME", None)])
+        pipeline.add_handler(other)
+        pipeline.add_handler(owner)
+        value = RscpValue().withTagName("TAG_EMS_POWER_HOME", 100)
+
+        await pipeline.process([value])
+
+        owner.handle_rscp_data.assert_called_once_with(value)
+        other.handle_rscp_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_routes_indexed_container_by_index(self):
+        pipeline = RscpHandlerPipeline()
+        wallboxes = [
+            WallboxRscpModel(index, serial=f"WB-{index}") for index in range(3)
+        ]
+        for wallbox in wallboxes:
+            pipeline.add_handler(wallbox)
+
+        await pipeline.process([_wb_data(2), _wb_data(0)])
+
+        assert [wb.get_model().cp_state for wb in wallboxes] == ["C", None, "C"]
+
+    @pytest.mark.asyncio
+    async def test_error_answer_resets_value(self):
+        pipeline = RscpHandlerPipeline()
+        wallbox = WallboxRscpModel(0, serial="WB-0")
+        pipeline.add_handler(wallbox)
+        await pipeline.process(
+            [
+                RscpValue.construct_rscp_value(
+                    "TAG_WB_DATA",
+                    [
+                        ("TAG_WB_INDEX", 0),
+                        ("TAG_WB_SUN_MODE_ACTIVE", True),
+                        ("TAG_WB_MAX_CHARGE_CURRENT", 16),
+                    ],
+                )
+            ]
+        )
+
+        container = RscpValue.construct_rscp_value(
+            "TAG_WB_DATA", [("TAG_WB_INDEX", 0), ("TAG_WB_MAX_CHARGE_CURRENT", 14)]
+        )
+        container.getValue().append(error_value("TAG_WB_REQ_SUN_MODE_ACTIVE"))
+        await pipeline.process([container])
+
+        model = wallbox.get_model()
+        assert model.sun_mode is None
+        assert model.currents.max == 14
+
+    @pytest.mark.asyncio
+    async def test_unindexed_handler_gets_unknown_tags(self):
+        pipeline = RscpHandlerPipeline()
+        owner = _make_handler(handled_tags=[("TAG_EMS_POWER_HOME", None)])
+        fallback = _make_handler()
+        pipeline.add_handler(owner)
+        pipeline.add_handler(fallback)
+        value = RscpValue().withTagName("TAG_EMS_POWER_PV", 100)
+
+        await pipeline.process([value])
+
+        fallback.handle_rscp_data.assert_called_once_with(value)
+        owner.handle_rscp_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unhandled_tag_is_logged(self, caplog):
+        pipeline = RscpHandlerPipeline()
+        pipeline.add_handler(WallboxRscpModel(0, serial="WB-0"))
+
+        unhandled = await pipeline.process([_wb_data(5), _wb_data(0), _wb_data(6)])
+
+        assert "Unhandled RSCP tag: TAG_WB_DATA" in caplog.text
+        assert unhandled == 2
+
+    @pytest.mark.asyncio
+    async def test_storage_handles_ems_values(self):
+        pipeline = RscpHandlerPipeline()
+        storage = StorageRscpModel("S10-1", "A-1", "MAC", "1.0")
+        pipeline.add_handler(storage)
+
+        await pipeline.process(
+            [
+                RscpValue().withTagName("TAG_EMS_POWER_GRID", -300),
+                RscpValue().withTagName("TAG_EMS_BAT_SOC", 55),
+            ]
+        )
+
+        assert storage.get_model().powers.grid == -300
+        assert storage.get_model().bat_soc == 55
+
+    @pytest.mark.asyncio
+    async def test_reading_the_storage_revision_keeps_the_probe(self):
+        pipeline = RscpHandlerPipeline()
+        storage = StorageRscpModel("S10-1", "A-1", "MAC", "1.0")
+        pipeline.add_handler(storage)
+
+        revision = storage.get_rscp_tags_revision()
+        assert storage.get_rscp_tags_revision() == revision
+
+        request = await pipeline.collect_request(0.0)
+
+        # the first request probes all inverter indexes
+        inverter_tags = [
+            value
+            for value in request.values
+            if value.getTagName() == "TAG_PVI_REQ_DATA"
+        ]
+        assert inverter_tags
+        assert storage.get_rscp_tags_revision() != revision
+        # the next request only contains the answering indexes, i.e. none
+        request = await pipeline.collect_request(1.0)
+        assert not [
+            value
+            for value in request.values
+            if value.getTagName() == "TAG_PVI_REQ_DATA"
+        ]
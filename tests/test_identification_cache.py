@@ -0,0 +1,280 @@
+"""Tests for the cached and incremental identification of the devices (identification_cache.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import asyncio
+import copy
+from unittest.mock import AsyncMock
+
+import pytest
+
+from e3dc_rscp_connect.client import RscpClient
+from e3dc_rscp_connect.identification_cache import IdentificationCache
+
+from .fake_plant import FakePlant, FakeWallbox
+from .fake_rscp_server import FakeRscpServer
+from .helpers import KEY, create_coordinator, wait_for
+
+
+@pytest.fixture
+def plant() -> FakePlant:
+    return FakePlant.create(wallboxes=2, inverters=2, batteries=1)
+
+
+def _client(server: FakeRscpServer) -> RscpClient:
+    return RscpClient("127.0.0.1", server.port, "user", "password", KEY)
+
+
+async def _identification(server: FakeRscpServer) -> dict:
+    client = _client(server)
+    await client.identify_device()
+    await client.fetch_data()
+    client.client.disconnect()
+    return client.identification
+
+
+def _record_requests(server: FakeRscpServer) -> list[str]:
+    "Returns the list the names of the requested tags are appended to."
+    requests = []
+    answer = server.plant.answer
+
+    def record(request):
+        name = request.getTagName()
+        if name == "TAG_WB_REQ_DATA":
+            name += f"[{request.get_child('TAG_WB_INDEX').getValue()}]"
+        requests.append(name)
+        return answer(request)
+
+    server.plant.answer = record
+    return requests
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Client
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestClientIdentification:
+    @pytest.mark.asyncio
+    async def test_identification_contains_the_found_devices(self, server):
+        identification = await _identification(server)
+
+        assert identification == {
+            "storage": {
+                "serial": server.plant.serial,
+                "assembly_serial": server.plant.assembly_serial,
+                "mac_addr": server.plant.mac_address,
+                "sw_version": server.plant.sw_release,
+                "inverters": [0, 1],
+                "batteries": [0],
+            },
+            "sg_ready": True,
+            "wallboxes": [
+                {
+                    "index": index,
+                    "serial": f"WB-{index:06d}",
+                    "device_name": f"Wallbox {index}",
+                    "firmware_version": "1.0.0",
+                }
+                for index in range(2)
+            ],
+        }
+
+    @pytest.mark.asyncio
+    async def test_restored_devices_are_polled_without_identification(self, server):
+        identification = await _identification(server)
+        client = _client(server)
+
+        client.restore_identification(identification)
+        assert client.identification == identification
+        assert [x.serial for x in client.wallboxes] == ["WB-000000", "WB-000001"]
+
+        await client.fetch_data()
+
+        # the inverters aren't probed again
+        assert sorted(client.storage.inverters) == [0, 1]
+        assert client.storage.powers.pv == server.plant.ems_power["TAG_EMS_POWER_PV"]
+        assert client.get_wallbox(1).currents.max is not None
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_identification_applies_differences(self, server):
+        identification = await _identification(server)
+        cached = copy.deepcopy(identification)
+        cached["storage"]["sw_version"] = "S10_2023_01"
+        cached["wallboxes"][0]["firmware_version"] = "0.1"
+        client = _client(server)
+        client.restore_identification(cached)
+        storage = client.storage
+        client.pop_changed_fields()
+
+        await client.identify_device()
+
+        assert client.storage is storage
+        assert client.identification == identification
+        assert {
+            "storage.sw_version",
+            "wallboxes.0.firmware_version",
+        } <= client.pop_changed_fields()
+        client.client.disconnect()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Coordinator
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestCoordinatorCache:
+    @pytest.mark.asyncio
+    async def test_first_update_fills_the_cache(self, hass, server):
+        coordinator = create_coordinator(hass, server)
+        assert not await coordinator.async_restore_identification()
+
+        await coordinator._async_update_data()
+
+        cached = await IdentificationCache(hass, "entry").async_load()
+        assert cached == coordinator.client.identification
+        assert cached["storage"]["inverters"] == [0, 1]
+        coordinator.client.client.disconnect()
+        await coordinator.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_restored_devices_are_available_before_the_first_update(
+        self, hass, server
+    ):
+        await IdentificationCache(hass, "entry").async_save(
+            await _identification(server)
+        )
+        coordinator = create_coordinator(hass, server)
+
+        assert await coordinator.async_restore_identification()
+
+        assert coordinator.storage.serial == server.plant.serial
+        assert [x.index for x in coordinator.wallboxes] == [0, 1]
+        assert server.connections == 1
+
+        await coordinator._async_update_data()
+        hass.config_entries.async_schedule_reload.assert_not_called()
+        coordinator.client.client.disconnect()
+        await coordinator.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_changed_devices_reload_the_entry(self, hass, server):
+        identification = await _identification(server)
+        identification["wallboxes"].pop()
+        await IdentificationCache(hass, "entry").async_save(identification)
+        coordinator = create_coordinator(hass, server)
+        await coordinator.async_restore_identification()
+
+        await coordinator._async_update_data()
+
+        hass.config_entries.async_schedule_reload.assert_called_once_with("entry")
+        cached = await IdentificationCache(hass, "entry").async_load()
+        assert len(cached["wallboxes"]) == 2
+        coordinator.client.client.disconnect()
+        await coordinator.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_removed_wallbox_reloads_the_entry(self, hass, server):
+        await IdentificationCache(hass, "entry").async_save(
+            await _identification(server)
+        )
+        server.plant.wallboxes.pop()
+        coordinator = create_coordinator(hass, server)
+        await coordinator.async_restore_identification()
+
+        await coordinator._async_update_data()
+
+        hass.config_entries.async_schedule_reload.assert_called_once_with("entry")
+        cached = await IdentificationCache(hass, "entry").async_load()
+        assert [x["index"] for x in cached["wallboxes"]] == [0]
+        coordinator.client.client.disconnect()
+        await coordinator.async_shutdown()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Re-identification
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestReidentification:
+    @pytest.mark.asyncio
+    async def test_only_missing_devices_are_probed(self, server):
+        client = _client(server)
+        await client.identify_device()
+        requests = _record_requests(server)
+
+        await client.reidentify_device()
+
+        assert requests == [
+            "TAG_INFO_REQ_SW_RELEASE",
+            *[f"TAG_WB_REQ_DATA[{index}]" for index in range(2, 7)],
+        ]
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_added_wallbox_is_identified(self, server):
+        client = _client(server)
+        await client.identify_device()
+        server.plant.wallboxes.append(FakeWallbox(serial="WB-000002"))
+
+        await client.reidentify_device()
+
+        assert [x.serial for x in client.wallboxes] == [
+            "WB-000000",
+            "WB-000001",
+            "WB-000002",
+        ]
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_new_software_release_reads_the_identification(self, server):
+        client = _client(server)
+        await client.identify_device()
+        server.plant.sw_release = "S10_2025_01"
+        server.plant.wallboxes[0].firmware_version = "1.1.0"
+        requests = _record_requests(server)
+
+        await client.reidentify_device()
+
+        assert client.storage.sw_version == "S10_2025_01"
+        assert client.get_wallbox(0).firmware_version == "1.1.0"
+        assert "TAG_INFO_REQ_SERIAL_NUMBER" in requests
+        client.client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_reidentification_doesnt_delay_the_poll(self, hass, server):
+        coordinator = create_coordinator(hass, server, identify_interval=0)
+        await coordinator._async_update_data()
+        coordinator.client.reidentify_device = AsyncMock(
+            side_effect=asyncio.Event().wait
+        )
+
+        await coordinator._async_update_data()
+        await coordinator._async_update_data()
+
+        # the running re-identification isn't started again
+        coordinator.client.reidentify_device.assert_awaited_once()
+        coordinator.client.client.disconnect()
+        await coordinator.async_shutdown()
+
+    @pytest.mark.asyncio
+    async def test_new_devices_reload_the_entry(self, hass, server):
+        coordinator = create_coordinator(hass, server, identify_interval=0)
+        await coordinator._async_update_data()
+        server.plant.wallboxes.append(FakeWallbox(serial="WB-000002"))
+
+        await coordinator._async_update_data()
+
+        await wait_for(lambda: hass.config_entries.async_schedule_reload.called)
+        hass.config_entries.async_schedule_reload.assert_called_once_with("entry")
+        cached = await IdentificationCache(hass, "entry").async_load()
+        assert len(cached["wallboxes"]) == 3
+        coordinator.client.client.disconnect()
+        await coordinator.async_shutdown()
@@ -0,0 +1,161 @@
+"""Tests for the logging helpers (log.py)."""
+
+import logging
+from pathlib import Path
+import sys
+from unittest.mock import MagicMock, patch
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+from e3dc_rscp_connect.log import (
+    REDACTED,
+    LazyRscpValue,
+    RateLimitedLogger,
+    RedactionFilter,
+    add_secrets,
+    get_logger,
+)
+from rscp_lib.RscpValue import RscpValue
+
+LOGGER_NAME = "e3dc_rscp_connect.test_log"
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Redaction
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestRedaction:
+    def test_secrets_are_replaced(self):
+        redaction = RedactionFilter()
+        redaction.add_secrets(["secret", "secret-key", None, ""])
+
+        assert redaction.redact("key secret-key, password secret") == (
+            f"key {REDACTED}, password {REDACTED}"
+        )
+
+    def test_filter_rewrites_the_record(self):
+        redaction = RedactionFilter()
+        redaction.add_secrets(["hunter2"])
+        record = logging.LogRecord(
+            "x", logging.INFO, __file__, 1, "password: %s", ("hunter2",), None
+        )
+
+        assert redaction.filter(record)
+        assert record.getMessage() == f"password: {REDACTED}"
+
+    def test_filter_keeps_records_without_secrets(self):
+        redaction = RedactionFilter()
+        redaction.add_secrets(["hunter2"])
+        args = ("a value",)
+        record = logging.LogRecord(
+            "x", logging.INFO, __file__, 1, "value: %s", args, None
+        )
+
+        assert redaction.filter(record)
+        assert record.msg == "value: %s"
+        assert record.args is args
+
+    def test_module_loggers_redact_registered_secrets(self, caplog):
+        logger = get_logger(LOGGER_NAME)
+        add_secrets("rscp-key-of-the-test")
+
+        with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+            logger.info("connecting with key %s", "rscp-key-of-the-test")
+
+        assert "rscp-key-of-the-test" not in caplog.text
+        # other tests may have registered short secrets, e.g. "key"
+        assert caplog.text.rstrip().endswith(REDACTED)
+
+    def test_traceback_is_redacted(self):
+        redaction = RedactionFilter()
+        redaction.add_secrets(["hunter2"])
+        try:
+            raise ValueError("wrong password hunter2")
+        except ValueError:
+            exc_info = sys.exc_info()
+        record = logging.LogRecord(
+            "x", logging.ERROR, __file__, 1, "login failed", (), exc_info
+        )
+
+        assert redaction.filter(record)
+        assert "hunter2" not in logging.Formatter().format(record)
+        assert f"wrong password {REDACTED}" in record.exc_text
+
+    def test_rscp_lib_loggers_redact_registered_secrets(self, caplog):
+        add_secrets("rscp-password-of-the-test")
+        logger = logging.getLogger("rscp_lib.RscpConnection")
+
+        with caplog.at_level(logging.INFO, logger="rscp_lib.RscpConnection"):
+            logger.info("login with %s", "rscp-password-of-the-test")
+
+        assert "rscp-password-of-the-test" not in caplog.text
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Lazy values
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestLazyRscpValue:
+    def test_value_is_serialized_when_formatted(self):
+        value = RscpValue().withTagName("TAG_EMS_POWER_PV", 100)
+
+        assert str(LazyRscpValue(value)) == value.toString()
+        assert str(LazyRscpValue(None)) == "None"
+
+    def test_value_isnt_serialized_for_disabled_levels(self, caplog):
+        logger = get_logger(LOGGER_NAME)
+        value = MagicMock()
+
+        with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+            logger.debug("value: %s", LazyRscpValue(value))
+
+        value.toString.assert_not_called()
+        assert not caplog.records
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rate limit
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestRateLimitedLogger:
+    def test_repeated_messages_are_suppressed(self, caplog):
+        log = RateLimitedLogger(logging.getLogger(LOGGER_NAME), interval=60)
+
+        with (
+            caplog.at_level(logging.INFO, logger=LOGGER_NAME),
+            patch("e3dc_rscp_connect.log.time.monotonic") as monotonic,
+        ):
+            for now in (0.0, 10.0, 20.0):
+                monotonic.return_value = now
+                log.warning("Unhandled RSCP tag: %s", "TAG_BAT_DATA")
+            log.warning("Unhandled RSCP tag: %s", "TAG_WB_DATA")
+            monotonic.return_value = 61.0
+            log.warning("Unhandled RSCP tag: %s", "TAG_BAT_DATA")
+
+        assert [x.getMessage() for x in caplog.records] == [
+            "Unhandled RSCP tag: TAG_BAT_DATA",
+            "Unhandled RSCP tag: TAG_WB_DATA",
+            "Unhandled RSCP tag: TAG_BAT_DATA (2 similar messages suppressed)",
+        ]
+
+    def test_caller_is_the_origin_of_the_record(self, caplog):
+        log = RateLimitedLogger(logging.getLogger(LOGGER_NAME))
+
+        with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+            log.info("origin")
+
+        assert caplog.records[0].funcName == "test_caller_is_the_origin_of_the_record"
+
+    def test_disabled_level_isnt_counted(self, caplog):
+        log = RateLimitedLogger(logging.getLogger(LOGGER_NAME))
+
+        with caplog.at_level(logging.WARNING, logger=LOGGER_NAME):
+            log.info("disabled")
+            log.warning("enabled")
+
+        assert [x.getMessage() for x in caplog.records] == ["enabled"]
@@ -0,0 +1,66 @@
+"Tests the diagnostic poll metric sensor!"
+
+from pathlib import Path
+import sys
+
+# Add custom_components to path
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+from unittest.mock import Mock
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import EntityCategory, UnitOfTime
+import pytest
+
+from e3dc_rscp_connect.entities import PollMetricSensor
+from e3dc_rscp_connect.poll_metrics import PollMetrics, PollSample
+
+
+@pytest.fixture
+def mock_entry():
+    return type("MockEntry", (), {"entry_id": "test_entry_id"})
+
+
+@pytest.fixture
+def coordinator():
+    coordinator = Mock()
+    coordinator.storage.serial = "S10-123456789012"
+    coordinator.poll_metrics = PollMetrics()
+    return coordinator
+
+
+def test_poll_metric_sensor_attributes(mock_entry, coordinator) -> None:
+    sensor = PollMetricSensor(
+        coordinator,
+        mock_entry,
+        "Poll Duration",
+        "total",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+        scale=1000,
+        enabled_default=True,
+    )
+
+    assert sensor.unique_id == "s10_123456789012_poll_total"
+    assert sensor.entity_category == EntityCategory.DIAGNOSTIC
+    assert sensor.entity_registry_enabled_default
+    assert sensor.native_unit_of_measurement == UnitOfTime.MILLISECONDS
+    assert sensor.native_value is None
+
+
+def test_poll_metric_sensor_value_and_statistics(mock_entry, coordinator) -> None:
+    sensor = PollMetricSensor(
+        coordinator, mock_entry, "Poll Network Time", "network", scale=1000
+    )
+    coordinator.poll_metrics.record(PollSample(network=0.25))
+    coordinator.poll_metrics.record(PollSample(network=0.05))
+
+    assert not sensor.entity_registry_enabled_default
+    assert sensor.native_value == 50.0
+    attributes = sensor.extra_state_attributes
+    assert attributes["count"] == 2
+    assert attributes["max"] == 250.0
+    assert attributes["mean"] == 150.0
@@ -0,0 +1,111 @@
+"""Tests for the poll metrics (poll_metrics.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import pytest
+
+from e3dc_rscp_connect.poll_metrics import PollMetrics, PollSample, RollingHistogram
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RollingHistogram
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestRollingHistogram:
+    def test_empty_histogram(self):
+        histogram = RollingHistogram((1, 10))
+
+        stats = histogram.as_dict()
+
+        assert stats["count"] == 0
+        assert stats["last"] is None
+        assert stats["p95"] is None
+        assert stats["buckets"] == {"le_1": 0, "le_10": 0, "inf": 0}
+
+    def test_statistics_of_window(self):
+        histogram = RollingHistogram((1, 10), window=4)
+        for value in (100, 1, 2, 3, 4):
+            histogram.add(value)
+
+        stats = histogram.as_dict()
+
+        # 100 dropped out of the window, but is still counted
+        assert stats["count"] == 5
+        assert stats["last"] == 4
+        assert stats["min"] == 1
+        assert stats["max"] == 4
+        assert stats["mean"] == pytest.approx(2.5)
+        assert stats["p50"] == 2
+        assert stats["p99"] == 4
+        assert stats["buckets"] == {"le_1": 1, "le_10": 3, "inf": 0}
+
+    def test_values_above_the_last_bound(self):
+        histogram = RollingHistogram((0.5,))
+        histogram.add(0.5)
+        histogram.add(7)
+
+        assert histogram.buckets() == {"le_0.5": 1, "inf": 1}
+
+    def test_percentile_nearest_rank(self):
+        histogram = RollingHistogram((1,))
+        for value in range(1, 101):
+            histogram.add(value)
+
+        assert histogram.percentile(95) == 95
+        assert histogram.percentile(0) == 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PollMetrics
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestPollMetrics:
+    def test_record_adds_each_field(self):
+        metrics = PollMetrics()
+
+        metrics.record(PollSample(network=0.2, total=0.3, response_bytes=4096))
+        metrics.record(PollSample(network=0.4, total=0.5, unhandled_tags=2))
+
+        assert metrics.polls == 2
+        assert metrics["network"].as_dict()["max"] == 0.4
+        assert metrics["response_bytes"].last == 0
+        assert metrics["unhandled_tags"].last == 2
+
+    def test_failures_and_fan_out(self):
+        metrics = PollMetrics()
+
+        metrics.record_failure()
+        metrics.record_fan_out(0.002, 7)
+
+        assert metrics.polls == 0
+        assert metrics.failed == 1
+        assert metrics["fan_out"].last == 0.002
+        assert metrics["entity_updates"].last == 7
+
+    def test_as_dict_has_all_metrics(self):
+        metrics = PollMetrics()
+        metrics.record(PollSample(total=0.1))
+
+        result = metrics.as_dict()
+
+        assert result["polls"] == 1
+        assert result["failed"] == 0
+        assert result["total"]["last"] == 0.1
+        assert set(result) >= {
+            "queue_wait",
+            "encrypt",
+            "network",
+            "decrypt",
+            "decode",
+            "dispatch",
+            "fan_out",
+            "request_bytes",
+            "response_tags",
+        }
@@ -7,12 +7,13 @@ custom_components_path = (
 )
 sys.path.insert(0, str(custom_components_path))
 
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 import pytest
 from homeassistant.components.sensor import SensorDeviceClass
 from homeassistant.const import UnitOfPower
 
 from e3dc_rscp_connect.entities import PowerSensor
+from e3dc_rscp_connect.write_filter import PowerWriteFilter
 
 
 class MockCoordinator:
@@ -87,3 +88,86 @@ def test_power_sensor_missing_value(mock_entry):
     )
 
     assert sensor.native_value is None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Write filter
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+def _filtered_sensor(mock_entry, storage, write_filter):
+    coordinator = MockCoordinator(storage=storage)
+    coordinator.last_update_success = True
+    sensor = PowerSensor(
+        coordinator=coordinator,
+        entry=mock_entry,
+        name="Grid Power",
+        data_getter=lambda: coordinator.storage.powers.grid,
+        write_filter=write_filter,
+    )
+    sensor.async_write_ha_state = Mock()
+    return sensor
+
+
+def test_power_sensor_deadband(mock_entry):
+    """Changes within the deadband aren't written, the latest value is still available."""
+    storage = Mock()
+    storage.serial = "S10-123456789012"
+    storage.powers.grid = 1000
+    sensor = _filtered_sensor(mock_entry, storage, PowerWriteFilter(deadband=50))
+
+    sensor._handle_coordinator_update()
+    storage.powers.grid = 1020
+    sensor._handle_coordinator_update()
+
+    assert sensor.async_write_ha_state.call_count == 1
+    assert sensor.native_value == 1000
+    assert sensor.latest_value == 1020
+
+    storage.powers.grid = 1100
+    sensor._handle_coordinator_update()
+
+    assert sensor.async_write_ha_state.call_count == 2
+    assert sensor.native_value == 1100
+
+
+def test_power_sensor_availability_change_is_written(mock_entry):
+    """Becoming unavailable is written, even if the value didn't change."""
+    storage = Mock()
+    storage.serial = "S10-123456789012"
+    storage.powers.grid = 1000
+    sensor = _filtered_sensor(mock_entry, storage, PowerWriteFilter(deadband=50))
+    sensor._handle_coordinator_update()
+
+    sensor.coordinator.last_update_success = False
+    sensor._handle_coordinator_update()
+
+    assert sensor.async_write_ha_state.call_count == 2
+
+
+def test_power_sensor_rate_limit_writes_later(mock_entry):
+    """A change held back by the rate limit is written when the interval expired."""
+    storage = Mock()
+    storage.serial = "S10-123456789012"
+    storage.powers.grid = 1000
+    sensor = _filtered_sensor(mock_entry, storage, PowerWriteFilter(min_interval=30))
+    sensor._handle_coordinator_update()
+
+    with patch(
+        "e3dc_rscp_connect.entities.power_sensor.async_call_later"
+    ) as call_later:
+        storage.powers.grid = 1200
+        sensor._handle_coordinator_update()
+        storage.powers.grid = 1300
+        sensor._handle_coordinator_update()
+
+    assert sensor.async_write_ha_state.call_count == 1
+    # only one write is scheduled
+    call_later.assert_called_once()
+    delay, delayed_write = call_later.call_args.args[1:]
+    assert 29 < delay <= 30
+
+    delayed_write(None)
+
+    assert sensor.async_write_ha_state.call_count == 2
+    assert sensor.native_value == 1300
@@ -0,0 +1,163 @@
+"""Tests for RscpRequestQueue (request_queue.py)."""
+
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+import asyncio
+import time
+
+import pytest
+
+from e3dc_rscp_connect.request_queue import (
+    RequestPriority,
+    RscpRequestExpiredException,
+    RscpRequestQueue,
+    RscpRequestSupersededException,
+)
+
+
+async def _use(queue, order, name, priority, **kwargs):
+    async with queue.slot(priority, **kwargs):
+        order.append(name)
+        await asyncio.sleep(0.01)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Ordering
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestOrdering:
+    @pytest.mark.asyncio
+    async def test_idle_queue_grants_immediately(self):
+        queue = RscpRequestQueue()
+
+        async with queue.slot(RequestPriority.POLL):
+            assert queue.waiting == 0
+
+        assert queue.stats[RequestPriority.POLL].count == 1
+        assert queue.stats[RequestPriority.POLL].max == 0.0
+
+    @pytest.mark.asyncio
+    async def test_control_is_served_before_poll_and_identification(self):
+        queue = RscpRequestQueue()
+        order = []
+
+        await queue.acquire(RequestPriority.POLL)
+        tasks = [
+            asyncio.ensure_future(
+                _use(queue, order, "ident", RequestPriority.IDENTIFICATION)
+            ),
+            asyncio.ensure_future(_use(queue, order, "poll", RequestPriority.POLL)),
+            asyncio.ensure_future(
+                _use(queue, order, "control", RequestPriority.CONTROL)
+            ),
+        ]
+        await asyncio.sleep(0)
+        assert queue.waiting == 3
+        queue.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["control", "poll", "ident"]
+
+    @pytest.mark.asyncio
+    async def test_same_priority_is_fifo(self):
+        queue = RscpRequestQueue()
+        order = []
+
+        await queue.acquire(RequestPriority.POLL)
+        tasks = [
+            asyncio.ensure_future(_use(queue, order, name, RequestPriority.CONTROL))
+            for name in ("first", "second", "third")
+        ]
+        await asyncio.sleep(0)
+        queue.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["first", "second", "third"]
+
+    @pytest.mark.asyncio
+    async def test_queueing_delay_is_measured_per_class(self):
+        queue = RscpRequestQueue()
+
+        await queue.acquire(RequestPriority.POLL)
+        task = asyncio.ensure_future(
+            _use(queue, [], "control", RequestPriority.CONTROL)
+        )
+        await asyncio.sleep(0.05)
+        queue.release()
+        await task
+
+        stats = queue.stats[RequestPriority.CONTROL]
+        assert stats.count == 1
+        assert stats.last >= 0.04
+        assert stats.mean == stats.last
+        assert queue.stats[RequestPriority.IDENTIFICATION].count == 0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Deadlines, superseding & cancellation
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class TestDropping:
+    @pytest.mark.asyncio
+    async def test_request_expires_at_deadline(self):
+        queue = RscpRequestQueue()
+        await queue.acquire(RequestPriority.POLL)
+
+        with pytest.raises(RscpRequestExpiredException):
+            await queue.acquire(
+                RequestPriority.CONTROL, deadline=time.monotonic() + 0.02
+            )
+
+        assert queue.stats[RequestPriority.CONTROL].expired == 1
+        assert queue.waiting == 0
+        queue.release()
+        # the queue is idle again
+        await asyncio.wait_for(queue.acquire(RequestPriority.POLL), 0.1)
+
+    @pytest.mark.asyncio
+    async def test_newer_request_supersedes_waiting_one(self):
+        queue = RscpRequestQueue()
+        order = []
+        await queue.acquire(RequestPriority.CONTROL)
+
+        stale = asyncio.ensure_future(
+            _use(queue, order, "stale", RequestPriority.POLL, key="poll")
+        )
+        await asyncio.sleep(0)
+        fresh = asyncio.ensure_future(
+            _use(queue, order, "fresh", RequestPriority.POLL, key="poll")
+        )
+        await asyncio.sleep(0)
+        queue.release()
+
+        with pytest.raises(RscpRequestSupersededException):
+            await stale
+        await fresh
+        assert order == ["fresh"]
+        assert queue.stats[RequestPriority.POLL].superseded == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_is_skipped(self):
+        queue = RscpRequestQueue()
+        order = []
+        await queue.acquire(RequestPriority.POLL)
+
+        cancelled = asyncio.ensure_future(
+            _use(queue, order, "cancelled", RequestPriority.CONTROL)
+        )
+        other = asyncio.ensure_future(_use(queue, order, "other", RequestPriority.POLL))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        queue.release()
+        await other
+
+        assert order == ["other"]
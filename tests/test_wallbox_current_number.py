@@ -16,7 +16,10 @@ from e3dc_rscp_connect.entities.wallbox_current_number import (
     WallboxMaxCurrentNumber,
     WallboxMinCurrentNumber,
 )
-from e3dc_rscp_connect.model.WallboxDataModel import WallboxCurrentModel, WallboxDataModel
+from e3dc_rscp_connect.model.WallboxDataModel import (
+    WallboxCurrentModel,
+    WallboxDataModel,
+)
 
 
 # --- Fixtures ---
@@ -65,31 +68,40 @@ def min_entity(mock_coordinator, mock_entry, mock_wallbox):
 
 
 class TestWallboxMaxCurrentNumber:
-
     def test_initialization(self, max_entity, mock_coordinator, mock_entry):
         """Test that name, unique_id and wallbox index are set correctly."""
         assert max_entity._attr_name == "Max Ladestrom"
-        assert max_entity._attr_unique_id == "s10_2023_001_test_wallbox_max_charge_current"
+        assert (
+            max_entity._attr_unique_id == "s10_2023_001_test_wallbox_max_charge_current"
+        )
         assert max_entity._sub_device_index == 0
 
-    def test_initialization_different_wallbox_index(self, mock_coordinator, mock_entry, mock_wallbox):
+    def test_initialization_different_wallbox_index(
+        self, mock_coordinator, mock_entry, mock_wallbox
+    ):
         """Test that the wallbox index is stored correctly."""
         mock_wallbox.index = 3
         entity = WallboxMaxCurrentNumber(mock_coordinator, mock_entry, mock_wallbox)
         assert entity._sub_device_index == 3
 
-    def test_native_value_returns_real_max(self, max_entity, mock_coordinator, mock_wallbox):
+    def test_native_value_returns_real_max(
+        self, max_entity, mock_coordinator, mock_wallbox
+    ):
         """native_value returns currents.max from the device when no assumed value is set."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
         assert max_entity.native_value == 14.0
 
-    def test_native_value_returns_assumed_value_when_set(self, max_entity, mock_coordinator, mock_wallbox):
+    def test_native_value_returns_assumed_value_when_set(
+        self, max_entity, mock_coordinator, mock_wallbox
+    ):
         """native_value returns the optimistic value while waiting for device confirmation."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
         max_entity._assumed_value = 10.0
         assert max_entity.native_value == 10.0
 
-    def test_native_value_returns_none_without_wallbox(self, max_entity, mock_coordinator):
+    def test_native_value_returns_none_without_wallbox(
+        self, max_entity, mock_coordinator
+    ):
         """native_value returns None when the wallbox is not available."""
         mock_coordinator.get_wallbox.return_value = None
         assert max_entity.native_value is None
@@ -104,12 +116,16 @@ class TestWallboxMaxCurrentNumber:
         mock_coordinator.get_wallbox.return_value = mock_wallbox
         assert max_entity.native_max_value == 16.0
 
-    def test_native_min_value_fallback_without_wallbox(self, max_entity, mock_coordinator):
+    def test_native_min_value_fallback_without_wallbox(
+        self, max_entity, mock_coordinator
+    ):
         """native_min_value returns 0.0 when the wallbox is not available."""
         mock_coordinator.get_wallbox.return_value = None
         assert max_entity.native_min_value == 0.0
 
-    def test_native_max_value_fallback_without_wallbox(self, max_entity, mock_coordinator):
+    def test_native_max_value_fallback_without_wallbox(
+        self, max_entity, mock_coordinator
+    ):
         """native_max_value returns 32.0 when the wallbox is not available."""
         mock_coordinator.get_wallbox.return_value = None
         assert max_entity.native_max_value == 32.0
@@ -124,33 +140,52 @@ class TestWallboxMaxCurrentNumber:
         assert max_entity.assumed_state is True
 
     @pytest.mark.asyncio
-    async def test_async_set_native_value_stores_assumed_value(self, max_entity, mock_coordinator):
+    async def test_async_set_native_value_stores_assumed_value(
+        self, max_entity, mock_coordinator
+    ):
         """Setting a value stores it as the assumed value."""
         with patch.object(max_entity, "async_write_ha_state"):
             await max_entity.async_set_native_value(12.0)
         assert max_entity._assumed_value == 12.0
 
     @pytest.mark.asyncio
-    async def test_async_set_native_value_writes_ha_state_immediately(self, max_entity, mock_coordinator):
+    async def test_async_set_native_value_writes_ha_state_immediately(
+        self, max_entity, mock_coordinator
+    ):
         """HA state is written immediately before the device call completes."""
         with patch.object(max_entity, "async_write_ha_state") as mock_write:
             await max_entity.async_set_native_value(12.0)
         mock_write.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_async_set_native_value_calls_coordinator(self, max_entity, mock_coordinator):
+    async def test_async_set_native_value_calls_coordinator(
+        self, max_entity, mock_coordinator
+    ):
         """Setting a value sends the correct command to the coordinator."""
         with patch.object(max_entity, "async_write_ha_state"):
             await max_entity.async_set_native_value(12.0)
         mock_coordinator.set_max_charge_current.assert_called_once_with(0, 12)
 
     @pytest.mark.asyncio
-    async def test_async_set_native_value_triggers_refresh(self, max_entity, mock_coordinator):
+    async def test_async_set_native_value_triggers_refresh(
+        self, max_entity, mock_coordinator
+    ):
         """A coordinator refresh is triggered after the device call."""
         with patch.object(max_entity, "async_write_ha_state"):
             await max_entity.async_set_native_value(12.0)
         mock_coordinator.async_request_refresh.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_async_set_native_value_marks_currents_changed(
+        self, max_entity, mock_coordinator
+    ):
+        """The entity is updated by the refresh, even if the device kept the old current."""
+        with patch.object(max_entity, "async_write_ha_state"):
+            await max_entity.async_set_native_value(12.0)
+        mock_coordinator.async_mark_changed.assert_called_once_with(
+            "wallboxes.0.currents"
+        )
+
     def test_handle_coordinator_update_clears_assumed_value(self, max_entity):
         """Coordinator update clears the pending optimistic value."""
         max_entity._assumed_value = 12.0
@@ -158,7 +193,9 @@ class TestWallboxMaxCurrentNumber:
             max_entity._handle_coordinator_update()
         assert max_entity._assumed_value is None
 
-    def test_optimistic_flow_accepted_by_device(self, max_entity, mock_coordinator, mock_wallbox):
+    def test_optimistic_flow_accepted_by_device(
+        self, max_entity, mock_coordinator, mock_wallbox
+    ):
         """Full optimistic flow: assumed value shown, then real device value after update."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
 
@@ -178,7 +215,9 @@ class TestWallboxMaxCurrentNumber:
         assert max_entity._assumed_value is None
         assert max_entity.native_value == 12.0
 
-    def test_optimistic_flow_rejected_by_device(self, max_entity, mock_coordinator, mock_wallbox):
+    def test_optimistic_flow_rejected_by_device(
+        self, max_entity, mock_coordinator, mock_wallbox
+    ):
         """If the device rejects the change, the real value is shown after the update."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
 
@@ -195,15 +234,20 @@ class TestWallboxMaxCurrentNumber:
 
     def test_is_number_entity(self, max_entity):
         from homeassistant.components.number import NumberEntity
+
         assert isinstance(max_entity, NumberEntity)
 
     def test_device_class(self, max_entity):
         from homeassistant.components.number import NumberDeviceClass
+
         assert max_entity._attr_device_class == NumberDeviceClass.CURRENT
 
     def test_unit_of_measurement(self, max_entity):
         from homeassistant.const import UnitOfElectricCurrent
-        assert max_entity._attr_native_unit_of_measurement == UnitOfElectricCurrent.AMPERE
+
+        assert (
+            max_entity._attr_native_unit_of_measurement == UnitOfElectricCurrent.AMPERE
+        )
 
     def test_step(self, max_entity):
         assert max_entity._attr_native_step == 1
@@ -213,25 +257,32 @@ class TestWallboxMaxCurrentNumber:
 
 
 class TestWallboxMinCurrentNumber:
-
     def test_initialization(self, min_entity, mock_coordinator, mock_entry):
         """Test that name, unique_id and wallbox index are set correctly."""
         assert min_entity._attr_name == "Min Ladestrom"
-        assert min_entity._attr_unique_id == "s10_2023_001_test_wallbox_min_charge_current"
+        assert (
+            min_entity._attr_unique_id == "s10_2023_001_test_wallbox_min_charge_current"
+        )
         assert min_entity._sub_device_index == 0
 
-    def test_native_value_returns_real_min(self, min_entity, mock_coordinator, mock_wallbox):
+    def test_native_value_returns_real_min(
+        self, min_entity, mock_coordinator, mock_wallbox
+    ):
         """native_value returns currents.min from the device when no assumed value is set."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
         assert min_entity.native_value == 8.0
 
-    def test_native_value_returns_assumed_value_when_set(self, min_entity, mock_coordinator, mock_wallbox):
+    def test_native_value_returns_assumed_value_when_set(
+        self, min_entity, mock_coordinator, mock_wallbox
+    ):
         """native_value returns the optimistic value while waiting for device confirmation."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
         min_entity._assumed_value = 10.0
         assert min_entity.native_value == 10.0
 
-    def test_native_value_returns_none_without_wallbox(self, min_entity, mock_coordinator):
+    def test_native_value_returns_none_without_wallbox(
+        self, min_entity, mock_coordinator
+    ):
         """native_value returns None when the wallbox is not available."""
         mock_coordinator.get_wallbox.return_value = None
         assert min_entity.native_value is None
@@ -241,27 +292,47 @@ class TestWallboxMinCurrentNumber:
         mock_coordinator.get_wallbox.return_value = mock_wallbox
         assert min_entity.native_min_value == 6.0
 
-    def test_native_max_value_is_capped_at_max_current(self, min_entity, mock_coordinator, mock_wallbox):
+    def test_native_max_value_is_capped_at_max_current(
+        self, min_entity, mock_coordinator, mock_wallbox
+    ):
         """native_max_value for min entity is capped at currents.max, not upper_limit."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
         assert min_entity.native_max_value == 14.0  # currents.max, not upper_limit (16)
 
-    def test_native_max_value_tracks_max_current_changes(self, min_entity, mock_coordinator, mock_wallbox):
+    def test_native_max_value_tracks_max_current_changes(
+        self, min_entity, mock_coordinator, mock_wallbox
+    ):
         """native_max_value updates dynamically when currents.max changes."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
         mock_wallbox.currents.max = 10
         assert min_entity.native_max_value == 10.0
 
-    def test_native_min_value_fallback_without_wallbox(self, min_entity, mock_coordinator):
+    def test_native_min_value_fallback_without_wallbox(
+        self, min_entity, mock_coordinator
+    ):
         """native_min_value returns 0.0 when the wallbox is not available."""
         mock_coordinator.get_wallbox.return_value = None
         assert min_entity.native_min_value == 0.0
 
-    def test_native_max_value_fallback_without_wallbox(self, min_entity, mock_coordinator):
+    def test_native_max_value_fallback_without_wallbox(
+        self, min_entity, mock_coordinator
+    ):
         """native_max_value returns 32.0 when the wallbox is not available."""
         mock_coordinator.get_wallbox.return_value = None
         assert min_entity.native_max_value == 32.0
 
+    def test_unknown_currents_after_error_answer(
+        self, min_entity, mock_coordinator, mock_wallbox
+    ):
+        """Currents reset to None by an error answer are unknown, the bounds fall back."""
+        mock_coordinator.get_wallbox.return_value = mock_wallbox
+        mock_wallbox.currents.min = None
+        mock_wallbox.currents.max = None
+        mock_wallbox.currents.lower_limit = None
+        assert min_entity.native_value is None
+        assert min_entity.native_min_value == 0.0
+        assert min_entity.native_max_value == 32.0
+
     def test_assumed_state_false_initially(self, min_entity):
         """assumed_state is False when no optimistic value is pending."""
         assert min_entity.assumed_state is False
@@ -272,28 +343,36 @@ class TestWallboxMinCurrentNumber:
         assert min_entity.assumed_state is True
 
     @pytest.mark.asyncio
-    async def test_async_set_native_value_stores_assumed_value(self, min_entity, mock_coordinator):
+    async def test_async_set_native_value_stores_assumed_value(
+        self, min_entity, mock_coordinator
+    ):
         """Setting a value stores it as the assumed value."""
         with patch.object(min_entity, "async_write_ha_state"):
             await min_entity.async_set_native_value(7.0)
         assert min_entity._assumed_value == 7.0
 
     @pytest.mark.asyncio
-    async def test_async_set_native_value_writes_ha_state_immediately(self, min_entity, mock_coordinator):
+    async def test_async_set_native_value_writes_ha_state_immediately(
+        self, min_entity, mock_coordinator
+    ):
         """HA state is written immediately before the device call completes."""
         with patch.object(min_entity, "async_write_ha_state") as mock_write:
             await min_entity.async_set_native_value(7.0)
         mock_write.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_async_set_native_value_calls_coordinator(self, min_entity, mock_coordinator):
+    async def test_async_set_native_value_calls_coordinator(
+        self, min_entity, mock_coordinator
+    ):
         """Setting a value sends the correct command to the coordinator."""
         with patch.object(min_entity, "async_write_ha_state"):
             await min_entity.async_set_native_value(7.0)
         mock_coordinator.set_min_charge_current.assert_called_once_with(0, 7)
 
     @pytest.mark.asyncio
-    async def test_async_set_native_value_triggers_refresh(self, min_entity, mock_coordinator):
+    async def test_async_set_native_value_triggers_refresh(
+        self, min_entity, mock_coordinator
+    ):
         """A coordinator refresh is triggered after the device call."""
         with patch.object(min_entity, "async_write_ha_state"):
             await min_entity.async_set_native_value(7.0)
@@ -306,7 +385,9 @@ class TestWallboxMinCurrentNumber:
             min_entity._handle_coordinator_update()
         assert min_entity._assumed_value is None
 
-    def test_optimistic_flow_accepted_by_device(self, min_entity, mock_coordinator, mock_wallbox):
+    def test_optimistic_flow_accepted_by_device(
+        self, min_entity, mock_coordinator, mock_wallbox
+    ):
         """Full optimistic flow: assumed value shown, then real device value after update."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
 
@@ -326,7 +407,9 @@ class TestWallboxMinCurrentNumber:
         assert min_entity._assumed_value is None
         assert min_entity.native_value == 7.0
 
-    def test_optimistic_flow_rejected_by_device(self, min_entity, mock_coordinator, mock_wallbox):
+    def test_optimistic_flow_rejected_by_device(
+        self, min_entity, mock_coordinator, mock_wallbox
+    ):
         """If the device rejects the change, the real value is shown after the update."""
         mock_coordinator.get_wallbox.return_value = mock_wallbox
 
@@ -343,12 +426,17 @@ class TestWallboxMinCurrentNumber:
 
     def test_is_number_entity(self, min_entity):
         from homeassistant.components.number import NumberEntity
+
         assert isinstance(min_entity, NumberEntity)
 
     def test_device_class(self, min_entity):
         from homeassistant.components.number import NumberDeviceClass
+
         assert min_entity._attr_device_class == NumberDeviceClass.CURRENT
 
     def test_unit_of_measurement(self, min_entity):
         from homeassistant.const import UnitOfElectricCurrent
-        assert min_entity._attr_native_unit_of_measurement == UnitOfElectricCurrent.AMPERE
+
+        assert (
+            min_entity._attr_native_unit_of_measurement == UnitOfElectricCurrent.AMPERE
+        )
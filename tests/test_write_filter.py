@@ -0,0 +1,71 @@
+"""Tests for the write filter of the power sensors (write_filter.py)."""
+
+from dataclasses import asdict
+from pathlib import Path
+import sys
+
+custom_components_path = (
+    Path(__file__).parent.parent.parent.parent / "config" / "custom_components"
+)
+sys.path.insert(0, str(custom_components_path))
+
+from e3dc_rscp_connect.write_filter import PowerWriteFilter
+
+
+def _write(write_filter: PowerWriteFilter, value, now: float) -> float | None:
+    delay = write_filter.delay(value, now)
+    if delay == 0:
+        write_filter.record_write(value, now)
+    return delay
+
+
+class TestPowerWriteFilter:
+    def test_disabled_filter_writes_every_change(self):
+        write_filter = PowerWriteFilter()
+
+        assert not write_filter.enabled
+        assert _write(write_filter, 100, 0.0) == 0
+        assert _write(write_filter, 101, 0.1) == 0
+        assert _write(write_filter, 101, 0.2) is None
+
+    def test_absolute_deadband(self):
+        write_filter = PowerWriteFilter(deadband=50)
+
+        assert _write(write_filter, 1000, 0.0) == 0
+        assert _write(write_filter, 1049, 1.0) is None
+        assert _write(write_filter, 951, 2.0) is None
+        assert _write(write_filter, 1050, 3.0) == 0
+        assert write_filter.value == 1050
+        assert asdict(write_filter.stats) == {
+            "written": 2,
+            "suppressed_deadband": 2,
+            "suppressed_rate": 0,
+        }
+
+    def test_relative_deadband_is_combined_with_absolute(self):
+        write_filter = PowerWriteFilter(deadband=20, deadband_percent=5)
+
+        _write(write_filter, 4000, 0.0)
+        # 5 % of 4000 W are larger than 20 W
+        assert _write(write_filter, 4150, 1.0) is None
+        assert _write(write_filter, 4200, 2.0) == 0
+        _write(write_filter, 100, 3.0)
+        # at low power the absolute deadband applies
+        assert _write(write_filter, 110, 4.0) is None
+        assert _write(write_filter, 120, 5.0) == 0
+
+    def test_changes_to_and_from_unknown_are_written(self):
+        write_filter = PowerWriteFilter(deadband=1000)
+
+        _write(write_filter, 0, 0.0)
+        assert _write(write_filter, None, 1.0) == 0
+        assert _write(write_filter, None, 2.0) is None
+        assert _write(write_filter, 1, 3.0) == 0
+
+    def test_rate_limit_returns_the_remaining_time(self):
+        write_filter = PowerWriteFilter(min_interval=10)
+
+        assert _write(write_filter, 100, 0.0) == 0
+        assert _write(write_filter, 200, 4.0) == 6.0
+        assert _write(write_filter, 300, 10.0) == 0
+        assert write_filter.stats.suppressed_rate == 1